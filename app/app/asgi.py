@@ -2,6 +2,9 @@
 ASGI config for app project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Token requests are served by ``user.asgi.TokenEndpoint`` so that password
+hashing runs in a bounded pool of its own. ``manage.py serve`` runs WSGI
+workers and doesn't use this module.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
@@ -9,8 +12,15 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
-application = get_asgi_application()
+# streams responses of the recipe import and export off the event loop
+from core.asgi import get_asgi_application  # noqa: E402
+
+django_application = get_asgi_application()
+
+# imported once Django is set up, as it loads models
+from user.asgi import TokenEndpoint  # noqa: E402
+
+application = TokenEndpoint(django_application)
@@ -48,6 +48,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.middleware.ServerTimingMiddleware",
+    "core.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -81,17 +83,165 @@ WSGI_APPLICATION = "app.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# Connections are checked out of a per process pool and returned at the
+# end of each request (see core.db.backends.postgresql). With DB_POOL_SIZE
+# set to 0 the pool is off and DB_CONN_MAX_AGE can keep persistent
+# connections instead
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": "core.db.backends.postgresql",
         "HOST": os.environ.get("DB_HOST"),
         "NAME": os.environ.get("DB_NAME"),
         "USER": os.environ.get("DB_USER"),
         "PASSWORD": os.environ.get("DB_PASSWORD"),
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", 0)),
+        "POOL": {
+            "MAX_SIZE": int(os.environ.get("DB_POOL_SIZE", 10)),
+            "MAX_LIFETIME": int(os.environ.get("DB_POOL_MAX_LIFETIME", 1800)),
+            "TIMEOUT": float(os.environ.get("DB_POOL_TIMEOUT", 5)),
+            "CHECK_AFTER": float(os.environ.get("DB_POOL_CHECK_AFTER", 1)),
+        },
+    }
+}
+
+# Read replicas, one per host of DB_REPLICA_HOSTS. List and retrieve reads
+# of the recipe APIs go to a replica unless the user wrote in the last
+# DB_REPLICA_PIN_SECONDS (see core.db.routers)
+
+REPLICA_DATABASES = []
+for number, host in enumerate(
+    filter(None, os.environ.get("DB_REPLICA_HOSTS", "").split(",")), start=1
+):
+    alias = f"replica_{number}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "NAME": os.environ.get("DB_REPLICA_NAME", DATABASES["default"]["NAME"]),
+        # tests read the test database through a connection of their own
+        "TEST": {"MIRROR": "default"},
+    }
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ["core.db.routers.ReplicaRouter"]
+REPLICA_PIN_SECONDS = int(os.environ.get("DB_REPLICA_PIN_SECONDS", 5))
+
+# without replicas, the test runner adds a replica_1 mirror of the test
+# database so the replica tests always have a replica to read from
+TEST_RUNNER = "core.tests.runner.TestRunner"
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# The ETag versions of the recipe APIs, replica pins and shared token
+# lookups live in the cache, so deployments running more than one process
+# need a shared backend such as the memcached of docker-compose.yaml;
+# manage.py serve refuses to start several workers without one
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", ""),
     }
 }
 
 
+# Conditional GET
+# RECIPE_CONDITIONAL_GET answers If-None-Match on the recipe APIs from
+# versions kept in the cache. An ETag is only as consistent as the cache,
+# so manage.py check --deploy fails unless every process shares it
+
+RECIPE_CONDITIONAL_GET = os.environ.get("RECIPE_CONDITIONAL_GET", "1") == "1"
+
+
+# Recipe search
+# ?q= ranks the RECIPE_SEARCH_CANDIDATES most recent matches, so terms that
+# match most recipes cost the same as selective ones. Lists that left out
+# older matches have an X-Search-Truncated header
+
+RECIPE_SEARCH_CANDIDATES = int(
+    os.environ.get("RECIPE_SEARCH_CANDIDATES", 1000)
+)
+
+
+# Token authentication cache
+# Each process keeps up to MAXSIZE token lookups for TTL seconds. SHARED
+# also stores them in the default cache so processes share lookups and
+# revocations, at the price of a cache read per request; without it a
+# process may keep serving a token revoked by another until TTL ends
+
+TOKEN_AUTH_CACHE = {
+    "MAXSIZE": int(os.environ.get("TOKEN_AUTH_CACHE_MAXSIZE", 10000)),
+    "TTL": int(os.environ.get("TOKEN_AUTH_CACHE_TTL", 60)),
+    "SHARED": os.environ.get("TOKEN_AUTH_CACHE_SHARED") == "1",
+}
+
+
+# Token endpoint under ASGI
+# Token requests check passwords on WORKERS threads of their own; up to
+# QUEUE more wait for a thread and the rest are answered with 503
+
+TOKEN_ENDPOINT = {
+    "WORKERS": int(os.environ.get("TOKEN_ENDPOINT_WORKERS", 4)),
+    "QUEUE": int(os.environ.get("TOKEN_ENDPOINT_QUEUE", 32)),
+}
+
+
+# OpenAPI schema
+# The schema is served from artifacts built by manage.py build_schema;
+# formats without one are generated once per process (see core.schema)
+
+SCHEMA_ROOT = BASE_DIR / "openapi"
+
+
+# Async views
+# RECIPE_ASYNC_VIEWS serves the recipe APIs from the async view sets of
+# recipe.async_views, which only pays off under an ASGI server such as
+# uvicorn app.asgi:application. manage.py serve runs WSGI workers, where
+# each async request runs in an event loop of its own
+
+RECIPE_ASYNC_VIEWS = os.environ.get("RECIPE_ASYNC_VIEWS") == "1"
+
+
+# Server timing
+# A SERVER_TIMING_SAMPLE_RATE share of the requests to the views of
+# SERVER_TIMING_NAMESPACES get a Server-Timing header and a log line with
+# their queries and the time spent in them, in serializers and in
+# renderers (see core.middleware); 0 turns it off
+
+SERVER_TIMING_SAMPLE_RATE = float(
+    os.environ.get("SERVER_TIMING_SAMPLE_RATE", 0)
+)
+SERVER_TIMING_NAMESPACES = ["recipe", "user"]
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "core.timing": {"handlers": ["console"], "level": "INFO"},
+    },
+}
+
+
+# Metrics
+# /metrics serves Prometheus metrics of the requests (see core.metrics);
+# processes share theirs through the METRICS_DIR spool directory, which
+# manage.py serve creates for its workers unless set. Only clients from
+# the addresses and networks of METRICS_ALLOWED_IPS may scrape it; behind
+# a proxy that is the address of the proxy
+
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+METRICS_DIR = os.environ.get("METRICS_DIR")
+METRICS_ALLOWED_IPS = os.environ.get(
+    "METRICS_ALLOWED_IPS", "127.0.0.1,::1"
+).split(",")
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -137,4 +287,17 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 AUTH_USER_MODEL = "core.User"
 
-REST_FRAMEWORK = {"DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema"}
+REST_FRAMEWORK = {
+    "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_RENDERER_CLASSES": [
+        "core.renderers.ORJSONRenderer",
+        "core.renderers.MessagePackRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "core.parsers.ORJSONParser",
+        "core.parsers.MessagePackParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+}
@@ -16,14 +16,13 @@ Including another URLconf
 
 from django.contrib import admin
 from django.urls import path, include
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularSwaggerView,
-)
+from drf_spectacular.views import SpectacularSwaggerView
+
+from core import views as core_views
 
 urlpatterns = [
     path("admin/", admin.site.urls),
-    path("api/schema/", SpectacularAPIView.as_view(), name="api-schema"),
+    path("api/schema/", core_views.SchemaView.as_view(), name="api-schema"),
     path(
         "api/docs",
         SpectacularSwaggerView.as_view(url_name="api-schema"),
@@ -31,5 +30,13 @@ urlpatterns = [
     ),
     path("api/user/", include("user.urls")),
     path("api/recipe/", include("recipe.urls")),
+    path(
+        "api/internal/db-pool/",
+        core_views.DatabasePoolView.as_view(),
+        name="db-pool",
+    ),
+    path("healthz", core_views.LivenessView.as_view(), name="healthz"),
+    path("readyz", core_views.ReadinessView.as_view(), name="readyz"),
+    path("metrics", core_views.MetricsView.as_view(), name="metrics"),
     # path("api/")
 ]
@@ -0,0 +1,6 @@
+"""
+Benchmarks for the recipe API.
+
+They are not collected by ``manage.py test``; run a module explicitly, for
+example ``python manage.py test benchmarks.bench_filtering``.
+"""
@@ -0,0 +1,136 @@
+"""
+Load test of the recipe list under WSGI and ASGI serving models.
+
+    python manage.py test benchmarks.bench_async
+
+Requests go straight to the views, without middleware, under three
+serving models:
+
+- WSGI: synchronous view sets, one thread per request in flight
+- ASGI, sync views: synchronous view sets run the way Django 3.2 runs them
+  under ASGI, in one shared thread
+- ASGI, async views: the async view sets on the event loop
+
+Concurrency pays off while requests wait on the database, so every query
+waits BENCH_DB_LATENCY_MS more (default 2), the round trip to a database
+on another host. BENCH_ROWS sets the number of recipes (default 200),
+BENCH_PAGE_SIZE the recipes per response (default 50), BENCH_REQUESTS the
+requests per run (default 400) and BENCH_CONCURRENCY the comma separated
+numbers of requests in flight (default 1,4,16).
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import TransactionTestCase
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from benchmarks.utils import env_int, seed_recipes
+from recipe import async_views, views
+
+
+def add_latency(sender, connection, **kwargs):
+    """Delay the queries of connection by the database round trip"""
+    if network_latency not in connection.execute_wrappers:
+        connection.execute_wrappers.append(network_latency)
+
+
+def network_latency(execute, sql, params, many, context):
+    """Wait for the database round trip, then run the query"""
+    time.sleep(env_int("BENCH_DB_LATENCY_MS", 2) / 1000)
+    return execute(sql, params, many, context)
+
+
+class AsyncViewsBenchmark(TransactionTestCase):
+    """Requests per second as the number of requests in flight grows"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "bench@example.com", "benchpass123"
+        )
+        seed_recipes(self.user, env_int("BENCH_ROWS", 200))
+        self.path = f"/?page_size={env_int('BENCH_PAGE_SIZE', 50)}"
+        self.total = env_int("BENCH_REQUESTS", 400)
+        connection_created.connect(add_latency)
+        self.addCleanup(connection_created.disconnect, add_latency)
+
+    def request(self):
+        """Return an authenticated list request"""
+        request = APIRequestFactory().get(self.path)
+        force_authenticate(request, self.user)
+        return request
+
+    def wsgi(self, concurrency):
+        """Serve the requests from concurrency threads"""
+        view = views.RecipeViewSet.as_view({"get": "list"})
+
+        def serve(_):
+            try:
+                return view(self.request()).render().status_code
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(concurrency) as executor:
+            return list(executor.map(serve, range(self.total)))
+
+    async def asgi(self, view, concurrency):
+        """Serve the requests with concurrency of them in flight"""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def serve():
+            async with semaphore:
+                response = await view(self.request())
+                return response.render().status_code
+
+        return await asyncio.gather(*(serve() for _ in range(self.total)))
+
+    def asgi_sync(self, concurrency):
+        """Serve the synchronous view set in Django's shared thread"""
+        view = views.RecipeViewSet.as_view({"get": "list"})
+
+        def serve(request):
+            try:
+                return view(request)
+            finally:
+                connections.close_all()
+
+        return asyncio.run(
+            self.asgi(sync_to_async(serve, thread_sensitive=True), concurrency)
+        )
+
+    def asgi_async(self, concurrency):
+        """Serve the async view set on the event loop"""
+        view = async_views.RecipeViewSet.as_view({"get": "list"})
+        return asyncio.run(self.asgi(view, concurrency))
+
+    def test_concurrency(self):
+        """Compare throughput of the serving models"""
+        levels = [
+            int(level) for level in
+            os.environ.get("BENCH_CONCURRENCY", "1,4,16").split(",")
+        ]
+        print()
+        for name, serve in (
+            ("WSGI", self.wsgi),
+            ("ASGI, sync views", self.asgi_sync),
+            ("ASGI, async views", self.asgi_async),
+        ):
+            for concurrency in levels:
+                serve(concurrency)
+                start = time.perf_counter()
+                statuses = serve(concurrency)
+                elapsed = time.perf_counter() - start
+
+                self.assertEqual(set(statuses), {200})
+                print(
+                    f"{name:<20} concurrency={concurrency:<4} "
+                    f"{self.total / elapsed:8.0f} req/s"
+                )
@@ -0,0 +1,66 @@
+"""
+Benchmark token authentication with and without the token cache.
+
+    python manage.py test benchmarks.bench_auth
+
+BENCH_REPEAT sets the number of requests per scenario (default 2000).
+"""
+
+import time
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from benchmarks.utils import env_int, measure, report
+from user.authentication import CachedTokenAuthentication, token_cache
+from user.views import ManageUserView
+
+
+ME_URL = reverse("user:me")
+
+
+class AuthBenchmark(TestCase):
+    """Throughput of authenticated requests"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            "bench@example.com", "benchpass123"
+        )
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        token_cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def run_scenario(self, name, authentication_class):
+        """Request the current user repeatedly with authentication_class"""
+        def request():
+            res = self.client.get(ME_URL)
+            assert res.status_code == 200, res.status_code
+
+        repeat = env_int("BENCH_REPEAT", 2000)
+        with patch.object(
+            ManageUserView, "authentication_classes", [authentication_class]
+        ):
+            start = time.perf_counter()
+            samples = measure(request, repeat)
+            elapsed = time.perf_counter() - start
+
+        report(name, samples)
+        print(f"{'':<40} {repeat / elapsed:.0f} requests/s")
+
+    def test_authentication(self):
+        """Report throughput of uncached and cached token lookups"""
+        print()
+        self.run_scenario("TokenAuthentication", TokenAuthentication)
+        self.run_scenario("CachedTokenAuthentication",
+                          CachedTokenAuthentication)
+        print(f"{'':<40} {token_cache.stats()}")
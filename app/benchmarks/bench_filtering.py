@@ -0,0 +1,67 @@
+"""
+Benchmark filtering the recipe list by tags and ingredients.
+
+    python manage.py test benchmarks.bench_filtering
+
+BENCH_RECIPES sets the number of recipes of the user (default 100000) and
+BENCH_REPEAT the number of requests per scenario (default 200).
+"""
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from benchmarks.utils import env_int, measure, report, seed_recipes
+from core.models import Recipe
+
+
+RECIPES_URL = reverse("recipe:recipe-list")
+
+
+class FilteringBenchmark(TestCase):
+    """Latency of filtered, paginated recipe lists"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            "bench@example.com", "benchpass123"
+        )
+        cls.tags, cls.ingredients = seed_recipes(
+            cls.user, env_int("BENCH_RECIPES", 100000)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def run_scenario(self, name, params):
+        """Request the first page of a filtered list repeatedly"""
+        params = {"page_size": 50, **params}
+
+        def request():
+            res = self.client.get(RECIPES_URL, params)
+            assert res.status_code == 200, res.status_code
+
+        report(name, measure(request, env_int("BENCH_REPEAT", 200)))
+
+    def test_filtering(self):
+        """Report latency percentiles of the filter scenarios"""
+        tags = [str(tag.id) for tag in self.tags]
+        ingredients = [str(ingredient.id) for ingredient in self.ingredients]
+        print(f"\n{Recipe.objects.count()} recipes")
+
+        self.run_scenario("unfiltered", {})
+        self.run_scenario("tags any of 1", {"tags": tags[0]})
+        self.run_scenario("tags any of 3", {"tags": ",".join(tags[:3])})
+        self.run_scenario(
+            "tags all of 2", {"tags": ",".join(tags[:2]), "match": "all"}
+        )
+        self.run_scenario(
+            "tags and ingredients",
+            {"tags": tags[0], "ingredients": ingredients[0]},
+        )
@@ -0,0 +1,56 @@
+"""
+Benchmark representing recipes with serializers and from values() rows.
+
+    python manage.py test benchmarks.bench_readers
+
+BENCH_ROWS sets the number of recipes represented per run (default 5000)
+and BENCH_REPEAT the number of runs per scenario (default 20).
+"""
+
+from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
+from django.test import TestCase
+
+from benchmarks.utils import env_int, measure, report, seed_recipes
+from core.models import Recipe, Tag, Ingredient
+from recipe.readers import RecipeRepresentation
+from recipe.serializers import RecipeSerializer
+
+
+class ReadersBenchmark(TestCase):
+    """Rows per second of the two ways to represent recipe lists"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            "bench@example.com", "benchpass123"
+        )
+        seed_recipes(cls.user, env_int("BENCH_ROWS", 5000))
+
+    def run_scenario(self, name, func):
+        """Report latency and rows per second of func"""
+        rows = Recipe.objects.count()
+        samples = measure(func, env_int("BENCH_REPEAT", 20), warmup=2)
+        report(name, samples)
+        print(f"{'':<40} {rows * len(samples) / sum(samples):.0f} rows/s")
+
+    def test_readers(self):
+        """Compare RecipeSerializer with RecipeRepresentation"""
+        queryset = Recipe.objects.filter(user=self.user).order_by("-id")
+        representation = RecipeRepresentation(RecipeSerializer)
+
+        def serializer():
+            RecipeSerializer(
+                queryset.prefetch_related(
+                    Prefetch("tags", Tag.objects.order_by("id")),
+                    Prefetch("ingredients", Ingredient.objects.order_by("id")),
+                ),
+                many=True,
+            ).data
+
+        def values():
+            representation.represent(representation.values(queryset))
+
+        print()
+        self.run_scenario("RecipeSerializer", serializer)
+        self.run_scenario("RecipeRepresentation", values)
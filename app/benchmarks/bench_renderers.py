@@ -0,0 +1,77 @@
+"""
+Benchmark rendering and parsing recipe lists as JSON and MessagePack.
+
+    python manage.py test benchmarks.bench_renderers
+
+BENCH_ROWS sets the number of recipes in the payload (default 10000) and
+BENCH_REPEAT the number of runs per scenario (default 20).
+"""
+
+import io
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from benchmarks.utils import env_int, measure, report, seed_recipes
+from core.models import Recipe
+from core.parsers import MessagePackParser, ORJSONParser
+from core.renderers import MessagePackRenderer, ORJSONRenderer
+from recipe.readers import RecipeRepresentation
+from recipe.serializers import RecipeSerializer
+
+
+class RenderersBenchmark(TestCase):
+    """Size and throughput of the renderers and parsers"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            "bench@example.com", "benchpass123"
+        )
+        seed_recipes(cls.user, env_int("BENCH_ROWS", 10000))
+
+    def run_scenario(self, name, func, size):
+        """Report latency and megabytes per second of func"""
+        samples = measure(func, env_int("BENCH_REPEAT", 20), warmup=2)
+        report(name, samples)
+        print(
+            f"{'':<40} {size * len(samples) / sum(samples) / 1e6:.1f} MB/s"
+        )
+
+    def compare(self, name, payload):
+        """Compare the renderers and parsers on payload"""
+        assert ORJSONRenderer().render(payload) == JSONRenderer().render(
+            payload
+        )
+        for renderer, parser in (
+            (JSONRenderer(), JSONParser()),
+            (ORJSONRenderer(), ORJSONParser()),
+            (MessagePackRenderer(), MessagePackParser()),
+        ):
+            body = renderer.render(payload)
+            print(f"{name}: {renderer.media_type} {len(body)} bytes")
+            self.run_scenario(
+                f"{name}: {type(renderer).__name__}",
+                lambda: renderer.render(payload),
+                len(body),
+            )
+            self.run_scenario(
+                f"{name}: {type(parser).__name__}",
+                lambda: parser.parse(io.BytesIO(body)),
+                len(body),
+            )
+
+    def test_renderers(self):
+        """Report throughput on the recipe list and raw recipe rows"""
+        queryset = Recipe.objects.filter(user=self.user).order_by("-id")
+        representation = RecipeRepresentation(RecipeSerializer)
+        print()
+        self.compare(
+            "list",
+            representation.represent(representation.values(queryset)),
+        )
+        # values() rows keep their prices as Decimal
+        self.compare("rows", list(queryset.values()))
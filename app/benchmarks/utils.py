@@ -0,0 +1,89 @@
+"""
+Helpers shared by the benchmarks
+"""
+
+import os
+import time
+from decimal import Decimal
+
+from core.models import Recipe, Tag, Ingredient
+
+
+def env_int(name, default):
+    """Return an integer benchmark setting from the environment"""
+    return int(os.environ.get(name, default))
+
+
+def percentile(samples, pct):
+    """Return the nearest rank percentile of samples"""
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def measure(func, repeat, warmup=5):
+    """Call func repeat times and return the duration of each call"""
+    for _ in range(warmup):
+        func()
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+
+    return samples
+
+
+def report(name, samples, unit="ms"):
+    """Print latency percentiles of samples"""
+    scale = {"ms": 1000, "us": 1000000}[unit]
+    print(
+        f"{name:<40} "
+        + " ".join(
+            f"p{pct}={percentile(samples, pct) * scale:8.2f}{unit}"
+            for pct in (50, 95, 99)
+        )
+        + f" n={len(samples)}"
+    )
+
+
+def seed_recipes(user, count, tags=50, ingredients=200, per_recipe=3,
+                 batch_size=5000):
+    """Bulk create recipes linked to a rotating set of tags and ingredients"""
+    tag_objs = Tag.objects.bulk_create(
+        [Tag(user=user, name=f"Tag {i}") for i in range(tags)]
+    )
+    ingredient_objs = Ingredient.objects.bulk_create(
+        [Ingredient(user=user, name=f"Ingredient {i}") for i in range(
+            ingredients)]
+    )
+    for start in range(0, count, batch_size):
+        recipes = Recipe.objects.bulk_create([
+            Recipe(
+                user=user,
+                title=f"Recipe {i}",
+                description=f"Description of recipe {i}",
+                time_minutes=i % 120,
+                price=Decimal(i % 10000) / 100,
+            )
+            for i in range(start, min(count, start + batch_size))
+        ])
+        Recipe.tags.through.objects.bulk_create([
+            Recipe.tags.through(
+                recipe_id=recipe.id,
+                tag_id=tag_objs[(recipe.id * 7 + j) % tags].id,
+            )
+            for recipe in recipes for j in range(per_recipe)
+        ])
+        Recipe.ingredients.through.objects.bulk_create([
+            Recipe.ingredients.through(
+                recipe_id=recipe.id,
+                ingredient_id=ingredient_objs[
+                    (recipe.id * 13 + j) % ingredients
+                ].id,
+            )
+            for recipe in recipes for j in range(per_recipe)
+        ])
+
+    return tag_objs, ingredient_objs
@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        """Register the checks and time the queries of every connection"""
+        from core import checks, metrics, timing  # noqa: F401
+
+        connection_created.connect(timing.attach)
+        connection_created.connect(metrics.attach)
@@ -0,0 +1,77 @@
+"""
+ASGI handler streaming responses off the event loop.
+
+Django 3.2 iterates the content of a streaming response on the event loop,
+so generators that query the database, such as the recipe import and
+export, raise SynchronousOnlyOperation. This handler reads their content a
+chunk at a time in the thread Django runs sync views in, and only sends it
+from the loop.
+"""
+
+from asgiref.sync import sync_to_async
+
+import django
+from django.core.handlers import asgi
+
+
+def read_chunk(parts, size):
+    """Return about size bytes of parts, or b"" once they are exhausted"""
+    chunk = bytearray()
+    for part in parts:
+        chunk += part
+        if len(chunk) >= size:
+            break
+
+    return bytes(chunk)
+
+
+class ASGIHandler(asgi.ASGIHandler):
+    """Django's ASGI handler, iterating streaming responses in a thread"""
+
+    async def send_response(self, response, send):
+        """Encode and send a response out over ASGI"""
+        if not response.streaming:
+            return await super().send_response(response, send)
+
+        await send({
+            "type": "http.response.start",
+            "status": response.status_code,
+            "headers": self.response_headers(response),
+        })
+        # Access __iter__ and not streaming_content, like Django does
+        parts = iter(response)
+        read = sync_to_async(read_chunk, thread_sensitive=True)
+        while True:
+            chunk = await read(parts, self.chunk_size)
+            if not chunk:
+                break
+
+            await send({
+                "type": "http.response.body",
+                "body": chunk,
+                "more_body": True,
+            })
+        await send({"type": "http.response.body"})
+        await sync_to_async(response.close, thread_sensitive=True)()
+
+    @staticmethod
+    def response_headers(response):
+        """Return the headers and cookies of response as ASGI headers"""
+        headers = []
+        for header, value in response.items():
+            if isinstance(header, str):
+                header = header.encode("ascii")
+            if isinstance(value, str):
+                value = value.encode("latin1")
+            headers.append((bytes(header), bytes(value)))
+        for cookie in response.cookies.values():
+            value = cookie.output(header="").encode("ascii").strip()
+            headers.append((b"Set-Cookie", value))
+
+        return headers
+
+
+def get_asgi_application():
+    """Like django.core.asgi.get_asgi_application, with ASGIHandler"""
+    django.setup(set_prefix=False)
+    return ASGIHandler()
@@ -0,0 +1,475 @@
+"""
+End to end benchmark of the API.
+
+Every route of the recipe and user APIs is driven with the requests of a
+scenario, in process through the Django test client and over HTTP through
+a local server, while the SQL queries of each request are counted. The
+report is plain JSON with sorted keys, so two runs can be compared and a
+regression of throughput, latency, queries or payload size shows up. The
+transports run in turn, in a fixed order, over the same data: the writes of
+one are seen by the next, the same way in every run.
+"""
+
+import http.client
+import itertools
+import json
+import statistics
+import threading
+import time
+from urllib.parse import urlencode
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import Client
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+
+from rest_framework.authtoken.models import Token
+
+from core.models import Recipe
+
+
+BENCH_HOST = "localhost"
+BENCH_PASSWORD = "bench-password"
+URLCONFS = ("recipe.urls", "user.urls")
+
+
+def percentile(samples, pct):
+    """Return the nearest rank percentile of samples"""
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class Dataset:
+    """The seeded data the requests of the scenarios refer to"""
+
+    def __init__(self, user, recipe_ids, tag_ids, ingredient_ids):
+        self.user = user
+        self.token = Token.objects.get_or_create(user=user)[0].key
+        self.recipe_ids = recipe_ids
+        self.tag_ids = tag_ids
+        self.ingredient_ids = ingredient_ids
+        self.counter = itertools.count()
+
+    def pick(self, ids):
+        """Return the next of ids, in turn"""
+        return ids[next(self.counter) % len(ids)]
+
+
+class Request:
+    """A request to send, independent of the transport"""
+
+    def __init__(self, method, path, body=b"", content_type=None,
+                 token=None):
+        self.method = method
+        self.path = path
+        self.body = body
+        self.content_type = content_type
+        self.token = token
+
+
+class Scenario:
+    """A request repeated against one route of the API"""
+
+    def __init__(self, method, route, expect, params=None, prepare=None,
+                 auth=True, content_type="application/json"):
+        self.method = method
+        self.route = route
+        self.expect = expect
+        self.params = params
+        self.prepare = prepare
+        self.auth = auth
+        self.content_type = content_type
+
+    @property
+    def name(self):
+        """Return the name of the scenario in the report"""
+        if not self.params:
+            return f"{self.method} {self.route}"
+
+        params = {
+            name: value.__name__ if callable(value) else value
+            for name, value in self.params.items()
+        }
+        return f"{self.method} {self.route}?{urlencode(params)}"
+
+    def request(self, dataset):
+        """Return the next request, prepare runs before the clock starts"""
+        kwargs, body = self.prepare(dataset) if self.prepare else ({}, None)
+        path = reverse(self.route, kwargs=kwargs)
+        if self.params:
+            params = {
+                name: value(dataset) if callable(value) else value
+                for name, value in self.params.items()
+            }
+            path = f"{path}?{urlencode(params)}"
+        if body is None:
+            body = b""
+        elif not isinstance(body, (bytes, str)):
+            body = json.dumps(body)
+        if isinstance(body, str):
+            body = body.encode()
+
+        return Request(
+            self.method,
+            path,
+            body,
+            self.content_type if body else None,
+            dataset.token if self.auth else None,
+        )
+
+
+def recipe_detail(dataset):
+    """Return the next seeded recipe"""
+    return {"pk": dataset.pick(dataset.recipe_ids)}, None
+
+
+def recipe_update(dataset):
+    """Return a change to the next seeded recipe"""
+    return {"pk": dataset.pick(dataset.recipe_ids)}, {"time_minutes": 30}
+
+
+def recipe_create(dataset):
+    """Return a new recipe with a tag and an ingredient"""
+    return {}, {
+        "title": "Bench recipe",
+        "time_minutes": 10,
+        "price": "5.25",
+        "tags": [{"name": "Tag 0"}],
+        "ingredients": [{"name": "Ingredient 0"}],
+    }
+
+
+def recipe_delete(dataset):
+    """Create a recipe to delete"""
+    recipe = Recipe.objects.create(
+        user=dataset.user, title="Doomed", time_minutes=1, price="1.00"
+    )
+    return {"pk": recipe.pk}, None
+
+
+def recipe_import(dataset):
+    """Return an NDJSON body of ten recipes"""
+    _, recipe = recipe_create(dataset)
+    return {}, "".join(json.dumps(recipe) + "\n" for _ in range(10))
+
+
+def tag_update(dataset):
+    """Return a change to the next seeded tag"""
+    pk = dataset.pick(dataset.tag_ids)
+    return {"pk": pk}, {"name": f"Renamed tag {pk}"}
+
+
+def ingredient_update(dataset):
+    """Return a change to the next seeded ingredient"""
+    pk = dataset.pick(dataset.ingredient_ids)
+    return {"pk": pk}, {"name": f"Renamed ingredient {pk}"}
+
+
+def user_create(dataset):
+    """Return a user that does not exist yet"""
+    return {}, {
+        "email": f"bench-{next(dataset.counter)}@example.com",
+        "password": BENCH_PASSWORD,
+        "name": "Bench",
+    }
+
+
+def user_token(dataset):
+    """Return the credentials of the benchmark user"""
+    return {}, {"email": dataset.user.email, "password": BENCH_PASSWORD}
+
+
+def user_update(dataset):
+    """Return a change to the benchmark user"""
+    return {}, {"name": "Bench"}
+
+
+def first_tags(dataset):
+    """Return the ids of the first seeded tags, to filter recipes on"""
+    return ",".join(str(pk) for pk in dataset.tag_ids[:3])
+
+
+SCENARIOS = [
+    Scenario("GET", "recipe:api-root", 200),
+    Scenario("GET", "recipe:recipe-list", 200),
+    Scenario("GET", "recipe:recipe-list", 200, params={"page_size": 50}),
+    Scenario("GET", "recipe:recipe-list", 200,
+             params={"page_size": 50, "fields": "id,title"}),
+    Scenario("GET", "recipe:recipe-list", 200,
+             params={"page_size": 50, "tags": first_tags}),
+    Scenario("POST", "recipe:recipe-list", 201, prepare=recipe_create),
+    Scenario("GET", "recipe:recipe-detail", 200, prepare=recipe_detail),
+    Scenario("PATCH", "recipe:recipe-detail", 200, prepare=recipe_update),
+    Scenario("DELETE", "recipe:recipe-detail", 204, prepare=recipe_delete),
+    Scenario("POST", "recipe:recipe-import", 200, prepare=recipe_import,
+             content_type="application/x-ndjson"),
+    Scenario("GET", "recipe:recipe-export", 200),
+    Scenario("GET", "recipe:tag-list", 200),
+    Scenario("PATCH", "recipe:tag-detail", 200, prepare=tag_update),
+    Scenario("GET", "recipe:ingredient-list", 200),
+    Scenario("PATCH", "recipe:ingredient-detail", 200,
+             prepare=ingredient_update),
+    Scenario("POST", "user:create", 201, prepare=user_create, auth=False),
+    Scenario("POST", "user:token", 200, prepare=user_token, auth=False),
+    Scenario("GET", "user:me", 200),
+    Scenario("PATCH", "user:me", 200, prepare=user_update),
+]
+
+
+def iter_route_names(patterns, namespace):
+    """Yield the namespaced names of the routes of patterns"""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_route_names(pattern.url_patterns, namespace)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield f"{namespace}:{pattern.name}"
+
+
+def route_names():
+    """Return the names of the routes of the benchmarked APIs"""
+    names = set()
+    for urlconf in URLCONFS:
+        resolver = get_resolver(urlconf)
+        app_name = resolver.urlconf_module.app_name
+        names.update(iter_route_names(resolver.url_patterns, app_name))
+    return names
+
+
+def uncovered_routes(scenarios=SCENARIOS):
+    """Return the names of the routes no scenario drives"""
+    return sorted(route_names() - {scenario.route for scenario in scenarios})
+
+
+def seed(recipes, tags, ingredients):
+    """Seed the data of the benchmark, return it as a Dataset"""
+    # imported here as the benchmarks package needs the app registry
+    from benchmarks.utils import seed_recipes
+
+    user = get_user_model().objects.create_user(
+        email="bench@example.com", password=BENCH_PASSWORD, name="Bench"
+    )
+    tag_objs, ingredient_objs = seed_recipes(
+        user, recipes, tags=tags, ingredients=ingredients,
+        per_recipe=min(3, tags, ingredients),
+    )
+    recipe_ids = list(
+        Recipe.objects.filter(user=user).order_by("id")
+        .values_list("id", flat=True)
+    )
+    return Dataset(
+        user,
+        recipe_ids,
+        [tag.id for tag in tag_objs],
+        [ingredient.id for ingredient in ingredient_objs],
+    )
+
+
+class QueryCounter:
+    """Count the SQL queries run on every connection, in every thread"""
+
+    def __init__(self):
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        with self.lock:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+    def attach(self, sender=None, connection=None, **kwargs):
+        """Count the queries of connection"""
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+    def __enter__(self):
+        connection_created.connect(self.attach)
+        for connection in connections.all():
+            self.attach(connection=connection)
+        return self
+
+    def __exit__(self, *exc_info):
+        connection_created.disconnect(self.attach)
+        for connection in connections.all():
+            if self in connection.execute_wrappers:
+                connection.execute_wrappers.remove(self)
+
+
+class InProcessTransport:
+    """Send requests through the Django test client"""
+
+    name = "inprocess"
+
+    def __init__(self):
+        self.client = Client(HTTP_HOST=BENCH_HOST)
+
+    def send(self, request):
+        """Send request, return the status and the body"""
+        extra = {}
+        if request.token:
+            extra["HTTP_AUTHORIZATION"] = f"Token {request.token}"
+        response = self.client.generic(
+            request.method,
+            request.path,
+            request.body,
+            content_type=request.content_type or "application/octet-stream",
+            **extra,
+        )
+        if response.streaming:
+            content = b"".join(response.streaming_content)
+        else:
+            content = response.content
+        response.close()
+        return response.status_code, content
+
+    def close(self):
+        """Release the transport"""
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    """Request handler that does not log every request"""
+
+    def log_message(self, format, *args):
+        """Skip the access log"""
+
+
+class HttpTransport:
+    """Send requests over HTTP to a server running in a thread"""
+
+    name = "http"
+
+    def __init__(self):
+        self.server = ThreadedWSGIServer(
+            ("127.0.0.1", 0), QuietRequestHandler, allow_reuse_address=False
+        )
+        self.server.set_app(WSGIHandler())
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, daemon=True
+        )
+        self.thread.start()
+        self.port = self.server.server_address[1]
+
+    def send(self, request):
+        """Send request, return the status and the body"""
+        headers = {"Host": BENCH_HOST}
+        if request.content_type:
+            headers["Content-Type"] = request.content_type
+        if request.token:
+            headers["Authorization"] = f"Token {request.token}"
+        connection = http.client.HTTPConnection("127.0.0.1", self.port)
+        try:
+            connection.request(
+                request.method, request.path, request.body, headers
+            )
+            response = connection.getresponse()
+            return response.status, response.read()
+        finally:
+            connection.close()
+
+    def close(self):
+        """Stop the server"""
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+
+TRANSPORTS = {
+    transport.name: transport
+    for transport in (InProcessTransport, HttpTransport)
+}
+
+
+class BenchmarkError(Exception):
+    """A request of a scenario did not get its expected status"""
+
+
+def run_scenario(scenario, dataset, transport, counter, requests, warmup):
+    """Send the requests of scenario, return their statistics"""
+    samples, queries, sizes = [], [], []
+    for i in range(warmup + requests):
+        request = scenario.request(dataset)
+        before = counter.count
+        start = time.perf_counter()
+        status, content = transport.send(request)
+        elapsed = time.perf_counter() - start
+        if status != scenario.expect:
+            raise BenchmarkError(
+                f"{scenario.name} over {transport.name} answered {status} "
+                f"instead of {scenario.expect}: {content[:200]!r}"
+            )
+        if i >= warmup:
+            samples.append(elapsed)
+            queries.append(counter.count - before)
+            sizes.append(len(content))
+
+    return {
+        "requests": requests,
+        "requests_per_second": round(requests / sum(samples), 1),
+        "latency_ms": {
+            f"p{pct}": round(percentile(samples, pct) * 1000, 3)
+            for pct in (50, 95, 99)
+        },
+        "queries": statistics.median_low(queries),
+        "bytes": statistics.median_low(sizes),
+    }
+
+
+def run(dataset, transports, requests, warmup, scenarios=SCENARIOS):
+    """Run every scenario over every transport, return the results"""
+    results = {}
+    with QueryCounter() as counter:
+        for name in transports:
+            transport = TRANSPORTS[name]()
+            try:
+                for scenario in scenarios:
+                    results.setdefault(scenario.name, {})[name] = (
+                        run_scenario(
+                            scenario, dataset, transport, counter,
+                            requests, warmup,
+                        )
+                    )
+            finally:
+                transport.close()
+
+    return results
+
+
+def compare(baseline, current, threshold):
+    """Yield a line per result and whether it regressed from baseline"""
+    for name, transports in sorted(current.items()):
+        for transport, result in sorted(transports.items()):
+            before = baseline.get(name, {}).get(transport)
+            line = (
+                f"{name:<55} {transport:<9} "
+                f"{result['requests_per_second']:>8.1f} req/s "
+                f"p95={result['latency_ms']['p95']:>8.2f}ms "
+                f"queries={result['queries']:<3} bytes={result['bytes']}"
+            )
+            if before is None:
+                yield line + "  (new)", False
+                continue
+
+            changes, regressed = [], False
+            rps = change(before["requests_per_second"],
+                         result["requests_per_second"])
+            p95 = change(before["latency_ms"]["p95"],
+                         result["latency_ms"]["p95"])
+            changes.append(f"req/s {rps:+.0f}%")
+            changes.append(f"p95 {p95:+.0f}%")
+            regressed |= rps < -threshold or p95 > threshold
+            for key in ("queries", "bytes"):
+                if result[key] != before[key]:
+                    changes.append(f"{key} {before[key]}->{result[key]}")
+                    regressed |= result[key] > before[key]
+            yield (
+                f"{line}  ({', '.join(changes)})"
+                f"{'  REGRESSION' if regressed else ''}"
+            ), regressed
+
+
+def change(before, after):
+    """Return the change from before to after in percent"""
+    return (after - before) / before * 100 if before else 0.0
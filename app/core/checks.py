@@ -0,0 +1,34 @@
+"""
+System checks of the core app.
+"""
+
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+
+# backends whose entries only the process that wrote them can see
+LOCAL_CACHE_BACKENDS = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+def cache_is_shared(alias="default"):
+    """Return whether every process of the app sees the cache alias"""
+    return settings.CACHES[alias]["BACKEND"] not in LOCAL_CACHE_BACKENDS
+
+
+@register(Tags.caches, deploy=True)
+def check_conditional_get_cache(app_configs, **kwargs):
+    """Check the ETag versions of the recipe APIs are in a shared cache"""
+    if not settings.RECIPE_CONDITIONAL_GET or cache_is_shared():
+        return []
+
+    return [Error(
+        "Conditional GET of the recipe APIs needs a cache shared by every "
+        "process.",
+        hint="Set CACHE_BACKEND to a shared cache such as memcached, or "
+             "turn conditional GET off with RECIPE_CONDITIONAL_GET=0.",
+        obj=settings.CACHES["default"]["BACKEND"],
+        id="core.E001",
+    )]
@@ -0,0 +1,38 @@
+"""
+Database access from async code.
+
+Django's ORM is synchronous, so coroutines run queries in worker threads.
+Each call checks a connection out of the pool and returns it when done,
+so concurrent calls use concurrent connections and idle worker threads
+hold none. Without the pool, connections are handled like at the end of a
+request: kept for CONN_MAX_AGE by their worker thread unless unusable.
+"""
+
+import functools
+
+from asgiref.sync import sync_to_async
+
+from django.db import connections
+
+
+def database_sync_to_async(func):
+    """Return a coroutine function running func in a worker thread"""
+
+    @functools.wraps(func)
+    def run(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            release_connections()
+
+    return sync_to_async(run, thread_sensitive=False)
+
+
+def release_connections():
+    """Return the pooled connections of the thread, close obsolete ones"""
+    for connection in connections.all():
+        if getattr(connection, "pool", None) is not None:
+            # closing returns the connection to its pool
+            connection.close()
+        else:
+            connection.close_if_unusable_or_obsolete()
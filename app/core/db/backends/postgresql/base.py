@@ -0,0 +1,68 @@
+"""
+PostgreSQL backend checking connections out of a pool.
+
+Django closes its connection at the end of every request when
+CONN_MAX_AGE is 0. With this backend closing returns the connection to a
+per process pool instead, configured by the POOL options of the database:
+
+    MAX_SIZE      connections per process, 0 disables pooling
+    MAX_LIFETIME  seconds after which a connection is replaced
+    TIMEOUT       seconds to wait for a free connection
+    CHECK_AFTER   idle seconds after which a connection is pinged before use
+"""
+
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.base import Database
+
+from core.db.backends.postgresql.creation import DatabaseCreation
+from core.db.pool import ConnectionPool, PoolTimeout, get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL database wrapper with pooled connections"""
+
+    creation_class = DatabaseCreation
+
+    def get_pool(self, conn_params):
+        """Return the pool of the connection parameters, or None"""
+        options = self.settings_dict.get("POOL", {})
+        if not options.get("MAX_SIZE"):
+            return None
+
+        # the test runner switches databases under the same alias, so pools
+        # are kept per set of connection parameters
+        key = (self.alias, tuple(sorted(conn_params.items())))
+        return get_pool(key, lambda: ConnectionPool(
+            lambda: super(DatabaseWrapper, self).get_new_connection(
+                conn_params
+            ),
+            name=self.alias,
+            max_size=options["MAX_SIZE"],
+            max_lifetime=options.get("MAX_LIFETIME", 1800),
+            timeout=options.get("TIMEOUT", 5),
+            check_after=options.get("CHECK_AFTER", 1),
+        ))
+
+    def get_new_connection(self, conn_params):
+        """Check a connection out of the pool"""
+        self.pool = self.get_pool(conn_params)
+        if self.pool is None:
+            return super().get_new_connection(conn_params)
+
+        try:
+            connection = self.pool.acquire()
+        except PoolTimeout as exc:
+            raise Database.OperationalError(str(exc))
+
+        self.isolation_level = self.settings_dict["OPTIONS"].get(
+            "isolation_level", connection.isolation_level
+        )
+        return connection
+
+    def _close(self):
+        """Return the connection to its pool"""
+        if getattr(self, "pool", None) is None:
+            return super()._close()
+
+        with self.wrap_database_errors:
+            self.pool.release(self.connection)
@@ -0,0 +1,16 @@
+"""
+Test database creation for the pooled PostgreSQL backend
+"""
+
+from django.db.backends.postgresql import creation
+
+from core.db.pool import close_pools
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    """Close pooled connections before test databases are dropped"""
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        """Drop the test database once no pooled connection uses it"""
+        close_pools()
+        super()._destroy_test_db(test_database_name, verbosity)
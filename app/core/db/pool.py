@@ -0,0 +1,305 @@
+"""
+A thread safe pool of database connections.
+
+Each process keeps one pool per database. Connections idle for a while
+are pinged before being handed out, connections older than the maximum
+lifetime are closed and replaced, and callers wait up to a timeout when
+every connection is in use. Processes publish their statistics to the
+cache so that every worker's pool can be inspected from one place.
+"""
+
+import os
+import socket
+import threading
+import time
+
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+from django.core.cache import caches
+from django.core.cache.backends.db import DatabaseCache
+
+
+STATS_KEY = "db:pool:workers"
+STATS_INTERVAL = 5
+
+
+class PoolTimeout(Exception):
+    """No connection became available in time"""
+
+
+class ConnectionPool:
+    """Pool of connections created by connect"""
+
+    def __init__(self, connect, name="default", max_size=10,
+                 max_lifetime=1800, timeout=5, check_after=1):
+        self.connect = connect
+        self.name = name
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.timeout = timeout
+        self.check_after = check_after
+        self._cond = threading.Condition()
+        self._reset(os.getpid())
+
+    def _reset(self, pid):
+        """Start over with no connections, as a new process"""
+        self._pid = pid
+        # (connection, created, last used) of idle connections, most
+        # recently used last
+        self._idle = []
+        # creation time of connections in use, by connection id
+        self._in_use = {}
+        self._size = 0
+        self._waiting = 0
+        self._published = 0
+        self.counters = dict.fromkeys(
+            (
+                "checkouts", "created", "recycled", "failed_checks",
+                "timeouts", "wait_seconds", "max_wait_seconds",
+            ),
+            0,
+        )
+
+    def _check_fork(self):
+        """Forget the connections inherited from a parent process"""
+        pid = os.getpid()
+        if pid != self._pid:
+            # closing would end the parent's sessions on the shared
+            # sockets, so the inherited connections are left to the parent
+            _orphans.extend(conn for conn, _, _ in self._idle)
+            self._reset(pid)
+
+    def acquire(self):
+        """Return a connection, waiting up to timeout for a free one"""
+        start = time.monotonic()
+        while True:
+            conn, created, check = self._checkout(start)
+            if conn is None:
+                conn = self._create()
+                created = time.monotonic()
+            elif check and not self.is_alive(conn):
+                self._discard(conn, failed=True)
+                continue
+
+            waited = time.monotonic() - start
+            with self._cond:
+                self._in_use[id(conn)] = created
+                self.counters["checkouts"] += 1
+                self.counters["wait_seconds"] += waited
+                self.counters["max_wait_seconds"] = max(
+                    self.counters["max_wait_seconds"], waited
+                )
+            return conn
+
+    def _checkout(self, start):
+        """Take an idle connection, or reserve room for a new one"""
+        with self._cond:
+            self._check_fork()
+            while True:
+                now = time.monotonic()
+                while self._idle:
+                    conn, created, used = self._idle.pop()
+                    if now - created < self.max_lifetime:
+                        return conn, created, now - used >= self.check_after
+                    self._size -= 1
+                    self.counters["recycled"] += 1
+                    self._close(conn)
+
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None, None, False
+
+                remaining = self.timeout - (now - start)
+                if remaining <= 0:
+                    self.counters["timeouts"] += 1
+                    raise PoolTimeout(
+                        f"No database connection available in the "
+                        f"{self.name} pool after {self.timeout}s."
+                    )
+                self._waiting += 1
+                self._cond.wait(remaining)
+                self._waiting -= 1
+
+    def _create(self):
+        """Open a connection in the room reserved for it"""
+        try:
+            conn = self.connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self.counters["created"] += 1
+        return conn
+
+    def release(self, conn):
+        """Return a connection to the pool, or close it when unusable"""
+        with self._cond:
+            self._check_fork()
+            created = self._in_use.pop(id(conn), None)
+        if created is None:
+            # checked out before a fork or before the pool was closed
+            self._close(conn)
+            return
+
+        if time.monotonic() - created >= self.max_lifetime:
+            self._discard(conn, recycled=True)
+        elif not self.reset(conn):
+            self._discard(conn)
+        else:
+            with self._cond:
+                self._idle.append((conn, created, time.monotonic()))
+                self._cond.notify()
+
+        self.publish()
+
+    def _discard(self, conn, failed=False, recycled=False):
+        """Close a checked out connection and free its room"""
+        self._close(conn)
+        with self._cond:
+            self._size -= 1
+            self.counters["failed_checks"] += failed
+            self.counters["recycled"] += recycled
+            self._cond.notify()
+
+    @staticmethod
+    def _close(conn):
+        """Close conn, ignoring errors of broken connections"""
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    @staticmethod
+    def is_alive(conn):
+        """Return whether the server still answers on conn"""
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            if not conn.autocommit:
+                conn.rollback()
+        except Exception:
+            return False
+
+        return True
+
+    @staticmethod
+    def reset(conn):
+        """Roll back any open transaction, return whether conn is usable"""
+        if conn.closed:
+            return False
+
+        try:
+            if conn.info.transaction_status != TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+        except Exception:
+            return False
+
+        return conn.info.transaction_status == TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        """Close the idle connections and those in use once returned"""
+        with self._cond:
+            self._check_fork()
+            idle, self._idle = self._idle, []
+            self._size -= len(idle) + len(self._in_use)
+            self._in_use = {}
+        for conn, _, _ in idle:
+            self._close(conn)
+
+    def stats(self):
+        """Return the statistics of the pool"""
+        with self._cond:
+            checkouts = self.counters["checkouts"]
+            return {
+                "name": self.name,
+                "pid": self._pid,
+                "host": socket.gethostname(),
+                "max_size": self.max_size,
+                "in_use": len(self._in_use),
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                **self.counters,
+                "avg_wait_seconds": (
+                    self.counters["wait_seconds"] / checkouts
+                    if checkouts else 0
+                ),
+            }
+
+    def publish(self, force=False):
+        """Store the statistics in the cache, at most every few seconds"""
+        now = time.monotonic()
+        if not force and now - self._published < STATS_INTERVAL:
+            return
+        cache = caches["default"]
+        # a database cache would check connections out of this very pool
+        if isinstance(cache, DatabaseCache):
+            return
+
+        self._published = now
+        stats = self.stats()
+        key = f"db:pool:{stats['name']}:{stats['host']}:{stats['pid']}"
+        try:
+            cache.set(key, stats, STATS_INTERVAL * 6)
+            workers = cache.get(STATS_KEY) or {}
+            workers[key] = time.time()
+            cache.set(STATS_KEY, workers, None)
+        except Exception:
+            pass
+
+
+_orphans = []
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(key, factory):
+    """Return the pool registered under key, creating it with factory"""
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = factory()
+        return _pools[key]
+
+
+def all_pools():
+    """Return the pools of this process"""
+    with _pools_lock:
+        return list(_pools.values())
+
+
+def close_pools():
+    """Close the pools of this process"""
+    for pool in all_pools():
+        pool.close()
+
+
+def collect_stats():
+    """Return the statistics published by every worker, and their totals"""
+    cache = caches["default"]
+    workers = cache.get(STATS_KEY) or {}
+    snapshots = cache.get_many(list(workers))
+    # workers that stopped publishing have expired
+    stale = set(workers).difference(snapshots)
+    if stale:
+        cache.set(
+            STATS_KEY,
+            {key: at for key, at in workers.items() if key not in stale},
+            None,
+        )
+
+    workers = sorted(
+        snapshots.values(), key=lambda stats: (stats["host"], stats["pid"])
+    )
+    totals = {
+        name: sum(stats[name] for stats in workers)
+        for name in (
+            "max_size", "in_use", "idle", "waiting", "checkouts", "created",
+            "recycled", "failed_checks", "timeouts", "wait_seconds",
+        )
+    }
+    totals["max_wait_seconds"] = max(
+        (stats["max_wait_seconds"] for stats in workers), default=0
+    )
+    return {"workers": workers, "totals": totals}
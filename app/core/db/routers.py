@@ -0,0 +1,76 @@
+"""
+Routing of reads to database replicas.
+
+Views opt in by setting the replica flag for reads that may see slightly
+stale data. Reads of core models made while the flag is set go to one of
+the REPLICA_DATABASES, everything else goes to the primary. Users who just
+wrote are pinned to the primary for REPLICA_PIN_SECONDS so they read their
+own writes.
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+PRIMARY = "default"
+
+replica_reads = ContextVar("replica_reads", default=False)
+
+
+@contextmanager
+def use_replica(enabled=True):
+    """Let the reads of the block go to a replica"""
+    token = replica_reads.set(enabled)
+    try:
+        yield
+    finally:
+        replica_reads.reset(token)
+
+
+def pin_key(user_id):
+    """Return the cache key pinning a user to the primary"""
+    return f"db:pinned:user:{user_id}"
+
+
+def pin_to_primary(user_id):
+    """Send the reads of a user to the primary for the pin window"""
+    cache.set(pin_key(user_id), True, settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user_id):
+    """Return whether the reads of a user must go to the primary"""
+    return bool(cache.get(pin_key(user_id)))
+
+
+class ReplicaRouter:
+    """Route reads of core models to a replica when the flag is set"""
+
+    app_labels = {"core"}
+
+    def db_for_read(self, model, **hints):
+        """Return a replica for flagged reads of core models"""
+        replicas = getattr(settings, "REPLICA_DATABASES", [])
+        if (
+            replicas
+            and replica_reads.get()
+            and model._meta.app_label in self.app_labels
+        ):
+            return random.choice(replicas)
+
+        return None
+
+    def db_for_write(self, model, **hints):
+        """Send every write to the primary"""
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Relate objects of the primary and its replicas"""
+        databases = {PRIMARY, *getattr(settings, "REPLICA_DATABASES", [])}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+
+        return None
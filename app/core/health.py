@@ -0,0 +1,92 @@
+"""
+Health checks of the database.
+
+A check borrows a connection for a single round trip and gives it back
+straight away, so probes hitting a struggling database don't hold on to
+connections. Once every migration is applied a process stops loading the
+migration graph, as its code can't gain migrations while it runs.
+
+Errors and pending migrations are logged, and reported to probes by a
+fixed code or a count only, as the probes are unauthenticated and driver
+errors and migration names describe the deployment.
+"""
+
+import logging
+import time
+
+from django.db import DatabaseError, connections
+from django.db.migrations.executor import MigrationExecutor
+
+
+logger = logging.getLogger(__name__)
+
+_migrated = set()
+
+DATABASE_UNAVAILABLE = {"ok": False, "error": "database_unavailable"}
+
+
+def release(connection):
+    """Return connection to its pool unless a transaction uses it"""
+    if not connection.in_atomic_block:
+        connection.close()
+
+
+def check_database(alias="default"):
+    """Return whether the database answers and its round trip latency"""
+    connection = connections[alias]
+    start = time.perf_counter()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+    except DatabaseError:
+        logger.exception("Database check of %s failed", alias)
+        return dict(DATABASE_UNAVAILABLE)
+    finally:
+        release(connection)
+
+    return {
+        "ok": True,
+        "latency_ms": round((time.perf_counter() - start) * 1000, 3),
+    }
+
+
+def pending_migrations(alias="default"):
+    """Return the names of the migrations not applied to the database"""
+    if alias in _migrated:
+        return []
+
+    connection = connections[alias]
+    try:
+        executor = MigrationExecutor(connection)
+        plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    finally:
+        release(connection)
+
+    pending = [f"{migration.app_label}.{migration.name}"
+               for migration, backwards in plan]
+    if not pending:
+        _migrated.add(alias)
+    return pending
+
+
+def readiness(alias="default"):
+    """Return whether the app can serve requests, and the details"""
+    database = check_database(alias)
+    if not database["ok"]:
+        return False, {"database": database}
+
+    try:
+        pending = pending_migrations(alias)
+    except DatabaseError:
+        logger.exception("Migration check of %s failed", alias)
+        return False, {"database": dict(DATABASE_UNAVAILABLE)}
+
+    if pending:
+        logger.warning(
+            "Migrations pending on %s: %s", alias, ", ".join(pending)
+        )
+    return not pending, {
+        "database": database,
+        "pending_migrations": len(pending),
+    }
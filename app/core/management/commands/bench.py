@@ -0,0 +1,172 @@
+"""
+Django command to benchmark every route of the API end to end
+"""
+
+import json
+import platform
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    override_settings,
+    setup_databases,
+    teardown_databases,
+)
+
+from core import bench
+
+
+class Command(BaseCommand):
+    """Benchmark the API against a throwaway database"""
+
+    help = (
+        "Seed a throwaway database, drive every route of the recipe and "
+        "user APIs in process and over HTTP, and report throughput, "
+        "latency percentiles, SQL queries and response sizes as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--recipes",
+            type=int,
+            default=1000,
+            help="Number of recipes to seed.",
+        )
+        parser.add_argument(
+            "--tags",
+            type=int,
+            default=50,
+            help="Number of tags to seed.",
+        )
+        parser.add_argument(
+            "--ingredients",
+            type=int,
+            default=200,
+            help="Number of ingredients to seed.",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=50,
+            help="Number of measured requests of each route.",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=5,
+            help="Number of requests of each route sent before measuring.",
+        )
+        parser.add_argument(
+            "--transport",
+            action="append",
+            choices=sorted(bench.TRANSPORTS),
+            help="Transport to benchmark, may be repeated. Defaults to all.",
+        )
+        parser.add_argument(
+            "--output",
+            help="Write the JSON report to this file and print a summary.",
+        )
+        parser.add_argument(
+            "--compare",
+            help="JSON report of an earlier run to compare the summary to.",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=10,
+            help="Change of req/s or p95 latency, in percent, that counts "
+                 "as a regression.",
+        )
+        parser.add_argument(
+            "--fail-on-regression",
+            action="store_true",
+            help="Fail when a route regressed from the compared report.",
+        )
+
+    def handle(self, *args, **options):
+        """Entry point for command"""
+        if options["compare"] and not options["output"]:
+            raise CommandError("--compare needs --output for the report.")
+        for name in ("requests", "recipes", "tags", "ingredients"):
+            if options[name] < 1:
+                raise CommandError(f"--{name} must be at least 1.")
+        baseline = None
+        if options["compare"]:
+            baseline = self.load(options["compare"])
+        uncovered = bench.uncovered_routes()
+        if uncovered:
+            raise CommandError(
+                f"No scenario drives {', '.join(uncovered)}, add them to "
+                "core.bench.SCENARIOS."
+            )
+
+        transports = options["transport"] or sorted(bench.TRANSPORTS)
+        verbosity = max(0, options["verbosity"] - 1)
+        old_config = setup_databases(
+            verbosity, interactive=False, aliases={"default"}
+        )
+        try:
+            # measure what production runs, without the debug cursor
+            with override_settings(DEBUG=False, ALLOWED_HOSTS=[
+                bench.BENCH_HOST
+            ]):
+                dataset = bench.seed(
+                    options["recipes"], options["tags"],
+                    options["ingredients"],
+                )
+                results = bench.run(
+                    dataset, transports, options["requests"],
+                    options["warmup"],
+                )
+        except bench.BenchmarkError as exc:
+            raise CommandError(str(exc))
+        finally:
+            connection.close()
+            teardown_databases(old_config, verbosity)
+
+        report = {
+            "meta": self.meta(options),
+            "results": results,
+        }
+        content = json.dumps(report, indent=2, sort_keys=True) + "\n"
+        if not options["output"]:
+            self.stdout.write(content, ending="")
+            return
+
+        with open(options["output"], "w") as output:
+            output.write(content)
+        regressed = False
+        for line, line_regressed in bench.compare(
+            baseline["results"] if baseline else {},
+            results,
+            options["threshold"],
+        ):
+            regressed |= line_regressed
+            self.stdout.write(line)
+        if regressed and options["fail_on_regression"]:
+            raise CommandError("Routes regressed, see the summary above.")
+
+    def load(self, path):
+        """Return the report at path"""
+        try:
+            with open(path) as report:
+                return json.load(report)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Can't read the report {path}: {exc}")
+
+    def meta(self, options):
+        """Return what the results of a run depend on, besides the code"""
+        return {
+            "dataset": {
+                "ingredients": options["ingredients"],
+                "recipes": options["recipes"],
+                "tags": options["tags"],
+            },
+            "django": django.get_version(),
+            "python": platform.python_version(),
+            "recipe_async_views": settings.RECIPE_ASYNC_VIEWS,
+            "requests": options["requests"],
+            "warmup": options["warmup"],
+        }
@@ -0,0 +1,42 @@
+"""
+Django command to build the OpenAPI schema artifacts
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.schema import artifact_path, build_schema, generate_schema
+
+
+class Command(BaseCommand):
+    """Write the schema of the live code to SCHEMA_ROOT"""
+
+    help = (
+        "Build the OpenAPI schema artifacts served by the API, or check "
+        "that the built ones match the code."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Fail when a built artifact differs from the live schema.",
+        )
+
+    def handle(self, *args, **options):
+        """Entry point for command"""
+        if options["check"]:
+            stale = []
+            for fmt, content in generate_schema().items():
+                path = artifact_path(fmt)
+                if path.exists() and path.read_bytes() != content:
+                    stale.append(path.name)
+            if stale:
+                raise CommandError(
+                    f"Out of date: {', '.join(stale)}. Run "
+                    f"'manage.py build_schema' to rebuild."
+                )
+            self.stdout.write(self.style.SUCCESS("Schema up to date."))
+            return
+
+        for path in build_schema():
+            self.stdout.write(f"Wrote {path} ({path.stat().st_size} bytes)")
@@ -0,0 +1,70 @@
+"""
+Django command to show the database connection pools of every worker
+"""
+
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.db.pool import collect_stats
+
+
+COLUMNS = [
+    "in_use", "idle", "waiting", "max_size", "checkouts", "created",
+    "recycled", "failed_checks", "timeouts",
+]
+
+
+class Command(BaseCommand):
+    """Print the pool statistics published by the workers"""
+
+    help = (
+        "Show the database connection pools of the workers sharing this "
+        "cache."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--json", action="store_true", help="Print the raw statistics."
+        )
+
+    def handle(self, *args, **options):
+        """Entry point for command"""
+        stats = collect_stats()
+        if options["json"]:
+            self.stdout.write(json.dumps(stats, indent=2))
+            return
+
+        if not stats["workers"]:
+            self.stdout.write("No worker published pool statistics.")
+            return
+
+        header = ["worker"] + COLUMNS + ["avg_wait_ms", "max_wait_ms"]
+        rows = [
+            [f"{worker['host']}:{worker['pid']}"]
+            + [worker[name] for name in COLUMNS]
+            + [
+                f"{worker['avg_wait_seconds'] * 1000:.2f}",
+                f"{worker['max_wait_seconds'] * 1000:.2f}",
+            ]
+            for worker in stats["workers"]
+        ]
+        totals = stats["totals"]
+        checkouts = totals["checkouts"]
+        rows.append(
+            ["total"]
+            + [totals[name] for name in COLUMNS]
+            + [
+                f"{totals['wait_seconds'] / checkouts * 1000:.2f}"
+                if checkouts else "0.00",
+                f"{totals['max_wait_seconds'] * 1000:.2f}",
+            ]
+        )
+        widths = [
+            max(len(str(row[i])) for row in [header] + rows)
+            for i in range(len(header))
+        ]
+        for row in [header] + rows:
+            self.stdout.write("  ".join(
+                str(value).rjust(width) for value, width in zip(row, widths)
+            ))
@@ -0,0 +1,134 @@
+"""
+Django command to load synthetic users and recipes with COPY
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.seed import SeedPlan, load
+
+
+class Command(BaseCommand):
+    """Load deterministic synthetic data at production volumes"""
+
+    help = (
+        "Generate users, tags, ingredients and recipes from a seed and "
+        "stream them into the database with COPY. Recipes are spread over "
+        "users, and tags and ingredients over recipes, with a Zipf skew. "
+        "The tables are locked while loading."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=1000,
+            help="Number of users to create.",
+        )
+        parser.add_argument(
+            "--recipes",
+            type=int,
+            default=100000,
+            help="Number of recipes to create, spread over the users.",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Seed of the generated data, the same seed loads the same "
+                 "data.",
+        )
+        parser.add_argument(
+            "--skew",
+            type=float,
+            default=1.1,
+            help="Zipf exponent of the distributions, 0 spreads evenly.",
+        )
+        parser.add_argument(
+            "--tags-per-user",
+            type=int,
+            default=20,
+        )
+        parser.add_argument(
+            "--ingredients-per-user",
+            type=int,
+            default=60,
+        )
+        parser.add_argument(
+            "--tags-per-recipe",
+            type=int,
+            default=3,
+            help="Average number of tags of a recipe.",
+        )
+        parser.add_argument(
+            "--ingredients-per-recipe",
+            type=int,
+            default=6,
+            help="Average number of ingredients of a recipe.",
+        )
+        parser.add_argument(
+            "--password",
+            default="password",
+            help="Password of every created user.",
+        )
+        parser.add_argument(
+            "--keep-constraints",
+            action="store_true",
+            help="Check constraints and update indexes row by row instead "
+                 "of restoring them after loading.",
+        )
+        parser.add_argument(
+            "--database",
+            default="default",
+            help="Database to load into.",
+        )
+
+    def handle(self, *args, **options):
+        """Entry point for command"""
+        for name in ("users", "recipes", "tags_per_user",
+                     "ingredients_per_user", "tags_per_recipe",
+                     "ingredients_per_recipe"):
+            if options[name] < 0:
+                raise CommandError(
+                    f"--{name.replace('_', '-')} can't be negative."
+                )
+        if options["recipes"] and not options["users"]:
+            raise CommandError("Recipes need at least one user.")
+        if options["skew"] < 0:
+            raise CommandError("--skew can't be negative.")
+
+        plan = SeedPlan(
+            options["users"],
+            options["recipes"],
+            seed=options["seed"],
+            skew=options["skew"],
+            tags_per_user=options["tags_per_user"],
+            ingredients_per_user=options["ingredients_per_user"],
+            tags_per_recipe=options["tags_per_recipe"],
+            ingredients_per_recipe=options["ingredients_per_recipe"],
+            password=options["password"],
+        )
+        start = time.perf_counter()
+        counts = load(
+            plan,
+            using=options["database"],
+            defer=not options["keep_constraints"],
+            report=self.report,
+        )
+        elapsed = time.perf_counter() - start
+
+        rows = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Loaded {rows} rows in {elapsed:.1f}s "
+            f"({rows / elapsed:.0f} rows/s)."
+        ))
+
+    def report(self, name, rows, elapsed):
+        """Print the progress of a step of the load"""
+        if rows is None:
+            self.stdout.write(f"Restored {name} in {elapsed:.1f}s")
+        else:
+            self.stdout.write(
+                f"Copied {rows} rows to {name} in {elapsed:.1f}s"
+            )
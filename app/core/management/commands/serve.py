@@ -0,0 +1,215 @@
+"""
+Django command to serve the app from pre-forked gunicorn workers
+"""
+
+import gc
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+
+from gunicorn.app.base import BaseApplication
+
+from core import metrics
+from core.checks import cache_is_shared
+from core.warmup import warm_up
+
+
+def process_uptime():
+    """Return the seconds since this process started, None when unknown"""
+    try:
+        with open("/proc/self/stat") as stat, open("/proc/uptime") as uptime:
+            # the start time is the 22nd field, the command name before it
+            # may contain spaces
+            ticks = int(stat.read().rsplit(")", 1)[1].split()[19])
+            system_uptime = float(uptime.read().split()[0])
+    except (OSError, IndexError, ValueError):
+        return None
+
+    return system_uptime - ticks / os.sysconf("SC_CLK_TCK")
+
+
+class Server(BaseApplication):
+    """Gunicorn application serving the app returned by load"""
+
+    def __init__(self, options, load):
+        self.options = options
+        self.load_app = load
+        super().__init__()
+
+    def load_config(self):
+        """Apply the options to the gunicorn configuration"""
+        for name, value in self.options.items():
+            self.cfg.set(name, value)
+
+    def load(self):
+        """Return the WSGI application"""
+        return self.load_app()
+
+
+class Command(BaseCommand):
+    """Serve the app from workers forked off a warmed up parent"""
+
+    help = (
+        "Serve the app from pre-forked workers that share a warmed up copy "
+        "of it and restart gracefully after a number of requests."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--bind",
+            default=os.environ.get("SERVE_BIND", "0.0.0.0:8000"),
+            help="Address to listen on.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=int(os.environ.get(
+                "WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1
+            )),
+            help="Number of worker processes.",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=int(os.environ.get("SERVE_THREADS", 1)),
+            help="Number of threads of each worker.",
+        )
+        parser.add_argument(
+            "--max-requests",
+            type=int,
+            default=int(os.environ.get("SERVE_MAX_REQUESTS", 1000)),
+            help="Restart a worker after this many requests, 0 for never.",
+        )
+        parser.add_argument(
+            "--max-requests-jitter",
+            type=int,
+            default=int(os.environ.get("SERVE_MAX_REQUESTS_JITTER", 100)),
+            help="Random extra requests, so workers don't restart together.",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=int,
+            default=int(os.environ.get("SERVE_TIMEOUT", 30)),
+            help="Seconds a request may take, and a restart may wait for.",
+        )
+        parser.add_argument(
+            "--startup-budget",
+            type=float,
+            default=float(os.environ.get("SERVE_STARTUP_BUDGET", 10)),
+            help="Seconds loading the app may take before it is reported.",
+        )
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Load the app, report the startup time and exit, failing "
+                 "when over the budget.",
+        )
+
+    def handle(self, *args, **options):
+        """Entry point for command"""
+        # startup includes starting Python and setting up Django
+        self.started = time.perf_counter() - (process_uptime() or 0)
+        if options["check"]:
+            self.load(options)
+            return
+        if options["workers"] > 1 and not cache_is_shared():
+            # ETag versions, replica pins and shared token lookups live in the
+            # cache, each worker would only see its own
+            raise CommandError(
+                f"The default cache {settings.CACHES['default']['BACKEND']} "
+                "is local to each process, set CACHE_BACKEND to a shared "
+                "cache to run more than one worker."
+            )
+
+        if settings.RECIPE_ASYNC_VIEWS:
+            self.stderr.write(self.style.WARNING(
+                "RECIPE_ASYNC_VIEWS is set but serve runs WSGI workers, serve "
+                "app.asgi:application from an ASGI server to run the views "
+                "concurrently."
+            ))
+
+        Server(self.get_config(options), lambda: self.preload(options)).run()
+
+    def get_config(self, options):
+        """Return the gunicorn settings for options"""
+        def when_ready(arbiter):
+            self.stdout.write(
+                f"Serving on {options['bind']} with {options['workers']} "
+                f"workers, ready in {self.elapsed():.2f}s"
+            )
+
+        return {
+            "bind": options["bind"],
+            "workers": options["workers"],
+            "threads": options["threads"],
+            "worker_class": "gthread" if options["threads"] > 1 else "sync",
+            "max_requests": options["max_requests"],
+            "max_requests_jitter": options["max_requests_jitter"],
+            "timeout": options["timeout"],
+            "graceful_timeout": options["timeout"],
+            # the parent loads the app, the workers inherit it
+            "preload_app": True,
+            "accesslog": "-",
+            "when_ready": when_ready,
+            # the counts of a worker outlive it in the metrics spool
+            "worker_exit": lambda server, worker: metrics.flush(),
+            "on_exit": lambda server: self.remove_spool_dir(),
+        }
+
+    def load(self, options):
+        """Load and warm up the app, report how long it took"""
+        application = get_wsgi_application()
+        timings = warm_up()
+        elapsed = self.elapsed()
+        # the warm up steps are what each forked worker is spared
+        self.stdout.write(
+            f"App loaded in {elapsed:.2f}s (warmed up for the workers: "
+            + ", ".join(
+                f"{name} {seconds * 1000:.1f}ms"
+                for name, seconds in timings.items()
+            )
+            + ")"
+        )
+
+        budget = options["startup_budget"]
+        if elapsed > budget:
+            message = (
+                f"Loading the app took {elapsed:.2f}s, over the startup "
+                f"budget of {budget:.2f}s."
+            )
+            if options["check"]:
+                raise CommandError(message)
+            self.stderr.write(self.style.WARNING(message))
+
+        return application
+
+    def preload(self, options):
+        """Load the app in the parent process, ready to fork workers"""
+        application = self.load(options)
+        # workers share their metrics through a spool directory
+        self.spool_dir = None
+        if metrics.spool_dir() is None:
+            self.spool_dir = tempfile.mkdtemp(prefix="metrics-")
+            metrics.use_spool_dir(self.spool_dir)
+        else:
+            metrics.clear_spool()
+        # objects alive now are never collected, so collections in the
+        # workers don't write to the memory they share with the parent
+        gc.collect()
+        gc.freeze()
+        return application
+
+    def remove_spool_dir(self):
+        """Remove the metrics spool directory created for the workers"""
+        if getattr(self, "spool_dir", None):
+            shutil.rmtree(self.spool_dir, ignore_errors=True)
+
+    def elapsed(self):
+        """Return the seconds since the process started"""
+        return time.perf_counter() - self.started
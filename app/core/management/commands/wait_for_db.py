@@ -2,27 +2,84 @@
 Django command to wait for database to be available
 """
 
-from django.core.management.base import BaseCommand
+import random
 import time
-from psycopg2 import OperationalError as Psycopg2Error
+
+from django.core.management.base import BaseCommand, CommandError
 from django.db.utils import OperationalError
+from psycopg2 import OperationalError as Psycopg2Error
+
+from core.health import pending_migrations
 
 
 class Command(BaseCommand):
     """Django command to pause execution until database is available"""
 
+    help = (
+        "Wait for the database to accept connections, and optionally for "
+        "its migrations, retrying with exponential backoff."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=0,
+            help="Seconds to wait before failing, 0 (the default) to wait "
+                 "forever.",
+        )
+        parser.add_argument(
+            "--migrations",
+            action="store_true",
+            help="Also wait until every migration is applied.",
+        )
+        parser.add_argument(
+            "--max-delay",
+            type=float,
+            default=5,
+            help="Longest pause between attempts, in seconds.",
+        )
+
     def handle(self, *args, **options):
         """Entry point for command"""
+        self.deadline = (
+            time.monotonic() + options["timeout"]
+            if options["timeout"] else None
+        )
+        self.max_delay = options["max_delay"]
+        self.attempt = 0
 
         self.stdout.write("Waiting for database...")
-        db_up = False
-        while db_up is False:
+        while True:
             try:
                 self.check(databases=["default"])
-                db_up = True
+                break
             except (Psycopg2Error, OperationalError):
-                self.stdout.write("Database unavailable, waiting 1 second...")
-                time.sleep(1)
+                self.backoff("Database unavailable")
         self.stdout.write(self.style.SUCCESS("Database available!"))
-        # self.stdout.write("Waiting for database...")
-        # self.stdout.write("Database available!")
+
+        if options["migrations"]:
+            while True:
+                try:
+                    pending = pending_migrations()
+                except (Psycopg2Error, OperationalError):
+                    self.backoff("Database unavailable")
+                    continue
+                if not pending:
+                    break
+                self.backoff(f"{len(pending)} migrations pending")
+            self.stdout.write(self.style.SUCCESS("Migrations applied!"))
+
+    def backoff(self, reason):
+        """Sleep before the next attempt, or fail past the deadline"""
+        # full jitter: a random pause up to the exponential delay, so
+        # replicas starting together don't retry in lockstep
+        delay = random.uniform(0, min(self.max_delay, 0.1 * 2 ** self.attempt))
+        self.attempt += 1
+        if self.deadline is not None and time.monotonic() + delay > (
+            self.deadline
+        ):
+            raise CommandError(f"{reason}, giving up.")
+
+        self.stdout.write(f"{reason}, waiting {delay:.2f} seconds...")
+        time.sleep(delay)
@@ -0,0 +1,476 @@
+"""
+Prometheus metrics of the app.
+
+Every thread records into a shard of its own, plain dicts no other thread
+writes to, so recording takes no lock. When a thread exits its shard is
+folded into the retired totals of the process, and a process sums those
+and the shards of its live threads into a snapshot. With METRICS_DIR set,
+each process writes its snapshot to a file of that spool directory every
+few seconds, from a thread of its own, and when it exits, and /metrics
+sums the files of every worker. The counters and histograms of workers
+that exited are kept in an archive file, their gauges are dropped.
+"""
+
+import bisect
+import contextvars
+import fcntl
+import itertools
+import json
+import os
+import threading
+import time
+import weakref
+from pathlib import Path
+
+from django.conf import settings
+
+
+FLUSH_INTERVAL = 5
+ARCHIVE = "archive.json"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+QUERY_LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1,
+)
+
+METRICS = {
+    "http_requests_total": (
+        "counter", "Requests served, by route, action, method and status.",
+    ),
+    "http_request_duration_seconds": (
+        "histogram", "Time to the response of requests.", LATENCY_BUCKETS,
+    ),
+    "http_requests_in_flight": (
+        "gauge", "Requests being served.",
+    ),
+    "db_queries_per_request": (
+        "histogram", "SQL queries run by requests.", QUERY_COUNT_BUCKETS,
+    ),
+    "db_query_duration_seconds": (
+        "histogram", "Time of the SQL queries of requests.",
+        QUERY_LATENCY_BUCKETS,
+    ),
+    "auth_token_cache_lookups_total": (
+        "counter", "Token cache lookups, by result.",
+    ),
+    "auth_token_cache_hit_ratio": (
+        "gauge", "Share of the token cache lookups that were hits.",
+    ),
+}
+
+current = contextvars.ContextVar("metrics", default=None)
+
+_local = threading.local()
+_shards = []
+_shards_lock = threading.RLock()
+_flusher_pid = None
+_directory = None
+
+
+class Shard:
+    """The metrics recorded by one thread"""
+
+    def __init__(self):
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+
+
+class ShardOwner:
+    """Held by the thread-local of a thread, gone when the thread exits"""
+
+
+class RequestMetrics:
+    """What the metrics of a request are recorded under"""
+
+    def __init__(self, route, action, method):
+        self.route = route
+        self.action = action
+        self.method = method
+        self.start = time.perf_counter()
+        # next() of a count is atomic, async views query from many threads
+        self.queries = itertools.count()
+
+
+def reset():
+    """Drop the metrics recorded by this process"""
+    global _local, _shards_lock, _retired
+    # a new lock, as another thread may have held it when the process forked
+    _shards_lock = threading.RLock()
+    _local = threading.local()
+    _shards.clear()
+    _retired = empty()
+
+
+def shard():
+    """Return the shard of the current thread"""
+    try:
+        return _local.shard
+    except AttributeError:
+        _local.shard = Shard()
+        _local.owner = ShardOwner()
+        with _shards_lock:
+            _shards.append(_local.shard)
+        # threads come and go with connections and executors, so their
+        # shards must not pile up
+        weakref.finalize(_local.owner, retire, _local.shard)
+        start_flusher()
+        return _local.shard
+
+
+def retire(thread_shard):
+    """Fold the shard of an exited thread into the retired totals"""
+    # the lock is reentrant as a collection may finalize a thread-local
+    # while this thread holds it
+    with _shards_lock:
+        try:
+            _shards.remove(thread_shard)
+        except ValueError:
+            # recorded before the process was reset
+            return
+        merge(_retired, copy_shard(thread_shard))
+
+
+def escape(value):
+    """Return value as a label value of the text format"""
+    return (
+        str(value).replace("\\", "\\\\").replace('"', '\\"')
+        .replace("\n", "\\n")
+    )
+
+
+def labels(**values):
+    """Return the label set of values in the text format"""
+    return ",".join(
+        f'{name}="{escape(value)}"' for name, value in values.items()
+    )
+
+
+def inc(name, label_set="", value=1):
+    """Add value to a counter"""
+    counters = shard().counters.setdefault(name, {})
+    counters[label_set] = counters.get(label_set, 0) + value
+
+
+def add(name, label_set="", value=1):
+    """Add value to a gauge, which may be negative"""
+    gauges = shard().gauges.setdefault(name, {})
+    gauges[label_set] = gauges.get(label_set, 0) + value
+
+
+def observe(name, label_set, value):
+    """Count value in the buckets of a histogram"""
+    buckets = METRICS[name][2]
+    series = shard().histograms.setdefault(name, {})
+    counts = series.get(label_set)
+    if counts is None:
+        # a count per bucket, +Inf included, then the sum
+        counts = series[label_set] = [0] * (len(buckets) + 1) + [0]
+    counts[bisect.bisect_left(buckets, value)] += 1
+    counts[-1] += value
+
+
+def merge(target, source):
+    """Add the metrics of the snapshot source to target"""
+    for kind in ("counters", "gauges"):
+        for name, series in source.get(kind, {}).items():
+            totals = target[kind].setdefault(name, {})
+            for label_set, value in series.items():
+                totals[label_set] = totals.get(label_set, 0) + value
+    for name, series in source.get("histograms", {}).items():
+        totals = target["histograms"].setdefault(name, {})
+        for label_set, counts in series.items():
+            if label_set in totals:
+                totals[label_set] = [
+                    a + b for a, b in zip(totals[label_set], counts)
+                ]
+            else:
+                totals[label_set] = list(counts)
+    return target
+
+
+def empty():
+    """Return a snapshot without metrics"""
+    return {"counters": {}, "gauges": {}, "histograms": {}}
+
+
+_retired = empty()
+
+# workers forked off a preloaded app start from scratch
+os.register_at_fork(after_in_child=reset)
+
+
+def copy_shard(thread_shard):
+    """Return the metrics of a shard as a snapshot"""
+    # copying a dict holds the GIL, the thread may keep recording
+    return {
+        "counters": {
+            name: dict(series)
+            for name, series in list(thread_shard.counters.items())
+        },
+        "gauges": {
+            name: dict(series)
+            for name, series in list(thread_shard.gauges.items())
+        },
+        "histograms": {
+            name: {
+                label_set: list(counts)
+                for label_set, counts in dict(series).items()
+            }
+            for name, series in list(thread_shard.histograms.items())
+        },
+    }
+
+
+def snapshot():
+    """Return the metrics of this process"""
+    # imported here as the user app imports the core app
+    from user.authentication import token_cache
+
+    result = empty()
+    with _shards_lock:
+        shards = list(_shards)
+        merge(result, _retired)
+    for thread_shard in shards:
+        merge(result, copy_shard(thread_shard))
+
+    stats = token_cache.stats()
+    result["counters"]["auth_token_cache_lookups_total"] = {
+        labels(result=result_name): stats[key]
+        for result_name, key in (
+            ("hit", "hits"), ("shared_hit", "shared_hits"), ("miss", "misses"),
+        )
+    }
+    return result
+
+
+def spool_dir():
+    """Return the directory workers write their metrics to, or None"""
+    directory = _directory or settings.METRICS_DIR
+    return Path(directory) if directory else None
+
+
+def use_spool_dir(directory):
+    """Share the metrics of the processes through directory"""
+    global _directory
+    _directory = directory
+
+
+def write_json(path, data):
+    """Replace the file at path with data, atomically"""
+    tmp = path.with_name(
+        f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+    )
+    tmp.write_text(json.dumps(data))
+    os.replace(tmp, path)
+
+
+def flush():
+    """Write the metrics of this process to the spool directory"""
+    directory = spool_dir()
+    if directory is None:
+        return
+
+    directory.mkdir(parents=True, exist_ok=True)
+    write_json(directory / f"{os.getpid()}.json", snapshot())
+
+
+def flush_periodically():
+    """Flush the metrics every FLUSH_INTERVAL seconds, forever"""
+    while True:
+        time.sleep(FLUSH_INTERVAL)
+        try:
+            flush()
+        except OSError:
+            pass
+
+
+def start_flusher():
+    """Start flushing the metrics of this process, once per process"""
+    global _flusher_pid
+    if _flusher_pid == os.getpid() or spool_dir() is None:
+        return
+
+    _flusher_pid = os.getpid()
+    threading.Thread(
+        target=flush_periodically, name="metrics-flusher", daemon=True
+    ).start()
+
+
+def is_alive(pid):
+    """Return whether the process pid runs"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def read_json(path):
+    """Return the snapshot at path, None when unreadable"""
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def archive_exited(directory):
+    """Move the metrics of exited workers to the archive"""
+    with open(directory / ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        archive = read_json(directory / ARCHIVE) or empty()
+        exited = [
+            path for path in directory.glob("*.json")
+            if path.stem.isdigit() and not is_alive(int(path.stem))
+        ]
+        for path in exited:
+            data = read_json(path)
+            if data is not None:
+                data.pop("gauges", None)
+                merge(archive, data)
+        if exited:
+            write_json(directory / ARCHIVE, archive)
+            for path in exited:
+                path.unlink()
+
+
+def clear_spool():
+    """Drop the metrics of earlier runs from the spool directory"""
+    directory = spool_dir()
+    if directory is None or not directory.exists():
+        return
+    for path in directory.glob("*.json"):
+        path.unlink()
+
+
+def collect():
+    """Return the metrics of every worker"""
+    directory = spool_dir()
+    if directory is None:
+        return snapshot()
+
+    flush()
+    archive_exited(directory)
+    result = empty()
+    for path in sorted(directory.glob("*.json")):
+        data = read_json(path)
+        if data is not None:
+            merge(result, data)
+    return result
+
+
+def format_value(value):
+    """Return value in the text format"""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def series_name(name, label_set, extra=""):
+    """Return the name of a series with its labels"""
+    label_set = ",".join(part for part in (label_set, extra) if part)
+    return f"{name}{{{label_set}}}" if label_set else name
+
+
+def render(metrics):
+    """Return metrics in the Prometheus text format"""
+    lookups = metrics["counters"].get("auth_token_cache_lookups_total", {})
+    total = sum(lookups.values())
+    if total:
+        misses = lookups.get(labels(result="miss"), 0)
+        metrics["gauges"]["auth_token_cache_hit_ratio"] = {
+            "": (total - misses) / total,
+        }
+
+    lines = []
+    for name, (kind, description, *options) in METRICS.items():
+        series = metrics[f"{kind}s"].get(name)
+        if not series:
+            continue
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        for label_set, value in sorted(series.items()):
+            if kind != "histogram":
+                lines.append(
+                    f"{series_name(name, label_set)} {format_value(value)}"
+                )
+                continue
+
+            cumulative = 0
+            for bound, count in zip((*options[0], "+Inf"), value):
+                cumulative += count
+                bucket = series_name(
+                    f"{name}_bucket", label_set, labels(le=bound)
+                )
+                lines.append(f"{bucket} {cumulative}")
+            lines.append(
+                f"{series_name(f'{name}_sum', label_set)} "
+                f"{format_value(value[-1])}"
+            )
+            lines.append(
+                f"{series_name(f'{name}_count', label_set)} {cumulative}"
+            )
+    return "\n".join(lines) + "\n"
+
+
+def start_request(route, action, method):
+    """Start recording a request and return what it is recorded under"""
+    request_metrics = RequestMetrics(route, action, method)
+    add("http_requests_in_flight", labels(route=route))
+    return request_metrics
+
+
+def finish_request(request_metrics, status):
+    """Record a request that got a response with status"""
+    route = request_metrics.route
+    label_set = labels(
+        route=route,
+        action=request_metrics.action,
+        method=request_metrics.method,
+    )
+    inc(
+        "http_requests_total",
+        labels(
+            route=route,
+            action=request_metrics.action,
+            method=request_metrics.method,
+            status=status,
+        ),
+    )
+    observe(
+        "http_request_duration_seconds",
+        label_set,
+        time.perf_counter() - request_metrics.start,
+    )
+    observe("db_queries_per_request", label_set, next(request_metrics.queries))
+    add("http_requests_in_flight", labels(route=route), -1)
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper counting and timing the queries of requests"""
+    request = current.get()
+    if request is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        next(request.queries)
+        observe(
+            "db_query_duration_seconds",
+            labels(route=request.route),
+            time.perf_counter() - start,
+        )
+
+
+def attach(sender=None, connection=None, **kwargs):
+    """Count the queries of connection"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
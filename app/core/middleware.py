@@ -0,0 +1,101 @@
+"""
+Middleware of the app
+"""
+
+import time
+
+from django.conf import settings
+
+from core import metrics, timing
+
+
+class ServerTimingMiddleware:
+    """
+    Report the timings of a sample of the API requests.
+
+    Requests to views of SERVER_TIMING_NAMESPACES are sampled at
+    SERVER_TIMING_SAMPLE_RATE. A sampled response gets a Server-Timing
+    header with its SQL query count and the time spent in queries,
+    serializers and renderers, and the same is logged as a JSON line.
+    The body of a streaming response is not measured.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        timings = getattr(request, "_timings", None)
+        if timings is not None:
+            timing.current.set(None)
+            self.report(request, response, timings)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Start timing the request when it is sampled"""
+        request._timings = timing.sample(request.resolver_match.namespace)
+        if request._timings is not None:
+            timing.current.set(request._timings)
+        return None
+
+    def process_template_response(self, request, response):
+        """Time rendering the response, which follows"""
+        timings = getattr(request, "_timings", None)
+        if timings is not None:
+            start = time.perf_counter()
+            response.add_post_render_callback(
+                lambda response: timings.add(
+                    "render", time.perf_counter() - start
+                )
+            )
+        return response
+
+    def report(self, request, response, timings):
+        """Add the Server-Timing header and log the timings"""
+        response["Server-Timing"] = timing.report(
+            timings,
+            request.method,
+            request.path,
+            request.resolver_match.view_name,
+            response.status_code,
+        )
+
+
+class MetricsMiddleware:
+    """
+    Record the metrics of every request routed to a view.
+
+    Requests are counted by route, viewset action, method and status, and
+    their latency and number of SQL queries go into histograms by route,
+    action and method. The latency is the time to the response, without
+    the body of a streaming response.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        request_metrics = getattr(request, "_metrics", None)
+        if request_metrics is not None:
+            metrics.current.set(None)
+            metrics.finish_request(request_metrics, response.status_code)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Start recording the request"""
+        if not settings.METRICS_ENABLED:
+            return None
+
+        method = request.method.lower()
+        # view sets map methods to actions, other views handle methods
+        actions = getattr(view_func, "actions", None) or {}
+        request._metrics = metrics.start_request(
+            request.resolver_match.view_name,
+            actions.get(method, method),
+            request.method,
+        )
+        metrics.current.set(request._metrics)
+        return None
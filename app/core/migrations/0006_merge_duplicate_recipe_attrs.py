@@ -0,0 +1,46 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:13
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicates(apps, schema_editor):
+    """Merge tags and ingredients sharing a user and name into one row"""
+    Recipe = apps.get_model('core', 'Recipe')
+    relations = (('Tag', 'tags'), ('Ingredient', 'ingredients'))
+    for model_name, relation in relations:
+        model = apps.get_model('core', model_name)
+        through = getattr(Recipe, relation).through
+        column = f'{model_name.lower()}_id'
+        duplicates = (
+            model.objects.values('user', 'name')
+            .annotate(keep=Min('id'), copies=Count('id'))
+            .filter(copies__gt=1)
+        )
+        for duplicate in duplicates:
+            others = model.objects.filter(
+                user=duplicate['user'], name=duplicate['name'],
+            ).exclude(id=duplicate['keep'])
+            recipe_ids = set(
+                through.objects.filter(**{f'{column}__in': others})
+                .values_list('recipe_id', flat=True)
+            )
+            through.objects.bulk_create(
+                [
+                    through(recipe_id=recipe_id, **{column: duplicate['keep']})
+                    for recipe_id in recipe_ids
+                ],
+                ignore_conflicts=True,
+            )
+            others.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+    ]
@@ -3,6 +3,8 @@ Database models
 """
 
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.contrib.auth.models import (
     AbstractBaseUser,
@@ -49,6 +51,35 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = "email"
 
 
+class RecipeAttrManager(models.Manager):
+    """Manager for the named objects users attach to recipes"""
+
+    def get_or_create_by_names(self, user, names):
+        """Return a name to id mapping, creating the missing names"""
+        names = set(names)
+        if not names:
+            return {}
+
+        ids = dict(
+            self.filter(user=user, name__in=names).values_list("name", "id")
+        )
+        missing = names.difference(ids)
+        if missing:
+            # rows created concurrently are skipped by the unique constraint
+            # and picked up by the second lookup
+            self.bulk_create(
+                [self.model(user=user, name=name) for name in missing],
+                ignore_conflicts=True,
+            )
+            ids.update(
+                self.filter(user=user, name__in=missing).values_list(
+                    "name", "id"
+                )
+            )
+
+        return ids
+
+
 class Recipe(models.Model):
     """Recipe object"""
 
@@ -63,6 +94,16 @@ class Recipe(models.Model):
     link = models.CharField(max_length=255, blank=True)
     tags = models.ManyToManyField('Tag') # create a relationship with tag model calling entity name as model name suggests
     ingredients = models.ManyToManyField('Ingredient')
+    # weighted title and description lexemes, kept up to date by a database
+    # trigger (see migration 0009)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # seek index for the per user, newest first recipe list
+            models.Index(fields=["user", "-id"], name="recipe_user_id_idx"),
+            GinIndex(fields=["search_vector"], name="recipe_search_idx"),
+        ]
 
     def __str__(self):
         return self.title
@@ -76,6 +117,15 @@ class Tag(models.Model):
         on_delete=models.CASCADE,
     )
 
+    objects = RecipeAttrManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "name"], name="tag_user_name_unique"
+            ),
+        ]
+
     def __str__(self):
         return self.name # ref two
     
@@ -88,5 +138,14 @@ class Ingredient(models.Model):
         on_delete=models.CASCADE,
     )
 
+    objects = RecipeAttrManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "name"], name="ingredient_user_name_unique"
+            ),
+        ]
+
     def __str__(self):
         return self.name
\ No newline at end of file
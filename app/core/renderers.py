@@ -0,0 +1,80 @@
+"""
+Renderers shared by the APIs
+"""
+
+import msgpack
+import orjson
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Render JSON with orjson, matching the output of DRF's JSONRenderer.
+
+    Values orjson has no native encoding for, including Decimal and
+    datetimes, go through the encoder_class like DRF does. Indented, ASCII
+    only or non compact output, and data orjson cannot encode, such as
+    integers beyond 64 bits or non string keys, are rendered by DRF. Unlike
+    DRF, NaN and infinite floats are rendered as null and exponents carry
+    no sign for positive powers.
+    """
+
+    # non string keys are rarer than they are slow to allow, so such data
+    # falls back to DRF
+    options = orjson.OPT_PASSTHROUGH_DATETIME
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render data into JSON bytes"""
+        if data is None:
+            return b""
+
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        if indent is not None or self.ensure_ascii or not self.compact:
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+
+        try:
+            ret = orjson.dumps(
+                data, default=self.encoder_class().default,
+                option=self.options,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+
+        # escaped like DRF does, so the output is a strict javascript subset
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+                b"\xe2\x80\xa9", b"\\u2029"
+            )
+        return ret
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Render MessagePack.
+
+    Values MessagePack has no native type for, including Decimal and
+    datetimes, are converted by DRF's JSON encoder so they carry the same
+    values as in JSON. Integers beyond 64 bits cannot be rendered.
+    """
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+    encoder_class = JSONEncoder
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render data into MessagePack bytes"""
+        if data is None:
+            return b""
+
+        return msgpack.packb(
+            data, default=self.encoder_class().default, use_bin_type=True
+        )
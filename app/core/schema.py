@@ -0,0 +1,114 @@
+"""
+Pre-built OpenAPI schema.
+
+Generating the schema introspects every view and serializer of the API,
+which takes hundreds of milliseconds of CPU. The schema is built once
+instead, by the build_schema command or on first use, and served from
+memory as precompressed bytes with strong ETags. SCHEMA_ROOT keeps the
+built artifacts; its schema.yaml is checked against the live code by the
+tests.
+"""
+
+import gzip
+import hashlib
+import threading
+
+from django.conf import settings
+from django.utils.http import quote_etag
+
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+
+
+RENDERERS = {"yaml": OpenApiYamlRenderer, "json": OpenApiJsonRenderer}
+
+_artifacts = {}
+_lock = threading.Lock()
+
+
+class SchemaArtifact:
+    """The rendered schema in one format, plain and gzipped"""
+
+    def __init__(self, content, gzipped=None):
+        self.content = content
+        self.gzipped = gzipped or compress(content)
+        digest = hashlib.sha256(content).hexdigest()[:32]
+        self.etag = quote_etag(digest)
+        # strong ETags differ between the encodings of a representation
+        self.gzip_etag = quote_etag(f"{digest}-gzip")
+
+
+def compress(content):
+    """Return content gzipped reproducibly, with no timestamp"""
+    return gzip.compress(content, compresslevel=9, mtime=0)
+
+
+def artifact_path(fmt, gzipped=False):
+    """Return the path of the artifact of fmt"""
+    return settings.SCHEMA_ROOT / f"schema.{fmt}{'.gz' if gzipped else ''}"
+
+
+def generate_schema():
+    """Return the schema of the live code in every format"""
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    schema = generator.get_schema(request=None, public=True)
+    return {
+        fmt: renderer().render(schema, renderer_context={})
+        for fmt, renderer in RENDERERS.items()
+    }
+
+
+def build_schema():
+    """Write the artifacts of the live schema, return their paths"""
+    settings.SCHEMA_ROOT.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for fmt, content in generate_schema().items():
+        for path, data in (
+            (artifact_path(fmt), content),
+            (artifact_path(fmt, gzipped=True), compress(content)),
+        ):
+            path.write_bytes(data)
+            paths.append(path)
+
+    with _lock:
+        _artifacts.clear()
+    return paths
+
+
+def read_artifact(fmt):
+    """Return the built artifact of fmt, None when it was not built"""
+    try:
+        content = artifact_path(fmt).read_bytes()
+    except FileNotFoundError:
+        return None
+
+    try:
+        gzipped = artifact_path(fmt, gzipped=True).read_bytes()
+    except FileNotFoundError:
+        gzipped = None
+    # a stale compressed copy must not be served for fresher content
+    if gzipped is not None and gzip.decompress(gzipped) != content:
+        gzipped = None
+    return SchemaArtifact(content, gzipped)
+
+
+def get_artifact(fmt):
+    """Return the schema in fmt, built artifacts first"""
+    artifact = _artifacts.get(fmt)
+    if artifact is not None:
+        return artifact
+
+    with _lock:
+        if fmt not in _artifacts:
+            artifact = read_artifact(fmt)
+            if artifact is None:
+                artifact = SchemaArtifact(generate_schema()[fmt])
+            _artifacts[fmt] = artifact
+
+    return _artifacts[fmt]
+
+
+def load_artifacts():
+    """Load the schema in every format"""
+    for fmt in RENDERERS:
+        get_artifact(fmt)
@@ -0,0 +1,377 @@
+"""
+Synthetic data loaded with COPY.
+
+Rows are generated on the fly and streamed to Postgres with COPY, a table
+at a time. Primary keys are reserved up front, so rows can refer to the
+rows of other tables without reading them back. Every choice is made by a
+random generator seeded per user: a seed always loads the same data, and
+the relations of a recipe are generated again in a later pass rather than
+kept in memory.
+
+Recipes are spread over users with a Zipf distribution of exponent skew,
+and each recipe picks tags and ingredients of its user the same way, so a
+few users own most recipes and a few tags are on most of them.
+"""
+
+import heapq
+import itertools
+import math
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connections, transaction
+
+from core.models import Ingredient, Recipe, Tag
+
+
+ADJECTIVES = [
+    "Spicy", "Creamy", "Roasted", "Smoky", "Crispy", "Grilled", "Zesty",
+    "Hearty", "Braised", "Sweet", "Tangy", "Rustic", "Charred", "Herbed",
+    "Golden", "Garlicky", "Slow Cooked", "Quick", "Classic", "Fresh",
+]
+DISHES = [
+    "Chicken Curry", "Tomato Soup", "Beef Stew", "Pasta", "Risotto",
+    "Salad", "Tacos", "Pancakes", "Noodles", "Dal", "Pizza", "Omelette",
+    "Ramen", "Chili", "Burger", "Paella", "Lasagna", "Stir Fry",
+    "Banana Bread", "Fish Pie",
+]
+TAGS = [
+    "Dinner", "Lunch", "Breakfast", "Vegan", "Vegetarian", "Dessert",
+    "Quick", "Gluten Free", "Spicy", "Healthy", "Comfort", "Baking",
+    "Party", "Budget", "Kids", "Summer", "Winter", "Meal Prep", "Asian",
+    "Italian",
+]
+INGREDIENTS = [
+    "Salt", "Pepper", "Olive Oil", "Garlic", "Onion", "Butter", "Flour",
+    "Sugar", "Eggs", "Milk", "Tomato", "Rice", "Chicken", "Beef", "Lemon",
+    "Ginger", "Cumin", "Basil", "Cheese", "Potato", "Carrot", "Spinach",
+    "Chili", "Honey", "Yogurt", "Lentils", "Coconut Milk", "Soy Sauce",
+    "Mushroom", "Parsley",
+]
+WORDS = [
+    "simmer", "until", "golden", "serve", "with", "fresh", "herbs", "stir",
+    "the", "sauce", "gently", "and", "season", "to", "taste", "a", "family",
+    "favourite", "ready", "in", "no", "time", "perfect", "for", "weekends",
+]
+
+
+def cumulative_weights(count, skew):
+    """Return the cumulative Zipf weights of count ranks"""
+    return list(itertools.accumulate(
+        1 / (rank + 1) ** skew for rank in range(count)
+    ))
+
+
+def spread(total, buckets, skew, rng):
+    """Split total over buckets by Zipf weights, in a random order"""
+    if not buckets:
+        return []
+
+    cum = cumulative_weights(buckets, skew)
+    shares = [
+        total * (weight - previous) / cum[-1]
+        for previous, weight in zip([0] + cum, cum)
+    ]
+    counts = [int(share) for share in shares]
+    # largest remainders first, so the counts add up to total exactly
+    by_remainder = sorted(
+        range(buckets), key=lambda i: counts[i] - shares[i]
+    )
+    for i in by_remainder[:total - sum(counts)]:
+        counts[i] += 1
+    rng.shuffle(counts)
+    return counts
+
+
+def inverse_weights(count, skew):
+    """Return the inverse Zipf weights of count ranks"""
+    return [(rank + 1) ** skew for rank in range(count)]
+
+
+def pick(rng, inverse, mean):
+    """Return distinct ranks, mean of them on average, popular ones first"""
+    count = min(len(inverse), rng.randint(0, 2 * mean)) if inverse else 0
+    if not count:
+        return []
+
+    # a weighted sample without replacement (Efraimidis-Spirakis): the
+    # ranks with the largest keys u ** (1 / weight), compared as logarithms
+    # so the keys of rare ranks don't underflow at high skews
+    keys = [math.log(1 - rng.random()) * factor for factor in inverse]
+    return heapq.nlargest(count, range(len(keys)), key=keys.__getitem__)
+
+
+def names(vocabulary, count, shift):
+    """Return count distinct names, the vocabulary rotated by shift"""
+    size = len(vocabulary)
+    return [
+        vocabulary[(i + shift) % size]
+        + (f" {i // size + 1}" if i >= size else "")
+        for i in range(count)
+    ]
+
+
+def escape(value):
+    """Return value as a field of the COPY text format"""
+    if value is None:
+        return "\\N"
+
+    return (
+        str(value).replace("\\", "\\\\").replace("\t", "\\t")
+        .replace("\n", "\\n").replace("\r", "\\r")
+    )
+
+
+class CopyStream:
+    """File like object reading rows in the COPY text format"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.buffer = b""
+        self.count = 0
+
+    def read(self, size=-1):
+        """Return up to size bytes of rows"""
+        lines, length = [], len(self.buffer)
+        for row in self.rows:
+            line = "\t".join(map(escape, row)) + "\n"
+            lines.append(line)
+            length += len(line)
+            self.count += 1
+            if 0 <= size <= length:
+                break
+
+        data = self.buffer + "".join(lines).encode()
+        if size < 0:
+            size = len(data)
+        self.buffer = data[size:]
+        return data[:size]
+
+
+class SeedPlan:
+    """What to generate, and the ids reserved for it"""
+
+    def __init__(self, users, recipes, seed=0, skew=1.1, tags_per_user=20,
+                 ingredients_per_user=60, tags_per_recipe=3,
+                 ingredients_per_recipe=6, password="password"):
+        self.users = users
+        self.recipes = recipes
+        self.seed = seed
+        self.skew = skew
+        self.tags_per_user = tags_per_user
+        self.ingredients_per_user = ingredients_per_user
+        self.tags_per_recipe = tags_per_recipe
+        self.ingredients_per_recipe = ingredients_per_recipe
+        self.password = password
+        self.recipe_counts = spread(
+            recipes, users, skew, self.random("recipe_counts")
+        )
+        self.user_base = self.tag_base = self.ingredient_base = 1
+        self.recipe_base = 1
+
+    def random(self, *key):
+        """Return the random generator of key"""
+        # string seeds are hashed the same way in every process
+        return random.Random(":".join(map(str, (self.seed,) + key)))
+
+    def user_rows(self):
+        """Yield the rows of core_user"""
+        password = make_password(self.password)
+        for user in range(self.users):
+            user_id = self.user_base + user
+            yield (
+                user_id, password, None, False,
+                f"user{user_id}@seed.example.com", f"Seeded User {user}",
+                True, False,
+            )
+
+    def attr_rows(self, base, per_user, vocabulary):
+        """Yield the rows of the tags or ingredients of every user"""
+        for user in range(self.users):
+            for i, name in enumerate(names(vocabulary, per_user, user * 7)):
+                yield base + user * per_user + i, name, self.user_base + user
+
+    def recipe_rows(self):
+        """Yield the rows of core_recipe"""
+        recipe_id = self.recipe_base
+        for user, count in enumerate(self.recipe_counts):
+            rng = self.random("recipes", user)
+            for _ in range(count):
+                title = f"{rng.choice(ADJECTIVES)} {rng.choice(DISHES)}"
+                yield (
+                    recipe_id,
+                    self.user_base + user,
+                    title,
+                    " ".join(rng.choices(WORDS, k=rng.randint(5, 40))),
+                    max(1, min(600, int(rng.lognormvariate(3.3, 0.6)))),
+                    f"{min(999.99, rng.lognormvariate(2.3, 0.7)):.2f}",
+                    f"https://example.com/recipes/{recipe_id}"
+                    if rng.random() < 0.3 else "",
+                )
+                recipe_id += 1
+
+    def link_rows(self, kind, base, per_user, per_recipe):
+        """Yield the rows linking every recipe to its tags or ingredients"""
+        inverse = inverse_weights(per_user, self.skew)
+        recipe_id = self.recipe_base
+        for user, count in enumerate(self.recipe_counts):
+            rng = self.random(kind, user)
+            first = base + user * per_user
+            for _ in range(count):
+                for rank in pick(rng, inverse, per_recipe):
+                    yield recipe_id, first + rank
+                recipe_id += 1
+
+
+def reserve_ids(cursor, model, count):
+    """Return the first of count ids of model reserved for the caller"""
+    table = model._meta.db_table
+    # inserts wait for the transaction, so no one takes the ids meanwhile
+    cursor.execute(
+        f"LOCK TABLE {cursor.db.ops.quote_name(table)} "
+        "IN SHARE ROW EXCLUSIVE MODE"
+    )
+    cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [table])
+    sequence = cursor.fetchone()[0]
+    cursor.execute("SELECT nextval(%s)", [sequence])
+    first = cursor.fetchone()[0]
+    if count > 1:
+        cursor.execute("SELECT setval(%s, %s)", [sequence, first + count - 1])
+    return first
+
+
+def deferrable(cursor, tables):
+    """Return name, drop and create statements of what slows loads down"""
+    # every constraint and index of tables but their primary keys, foreign
+    # keys first, so they are added back once the indexes exist
+    quote_name = cursor.db.ops.quote_name
+    cursor.execute(
+        """
+        SELECT conrelid::regclass::text, conname, pg_get_constraintdef(oid)
+        FROM pg_constraint
+        WHERE conrelid = ANY(%s::regclass[]) AND contype IN ('f', 'u')
+        ORDER BY contype = 'u', 1, 2
+        """,
+        [tables],
+    )
+    statements = [
+        (
+            name,
+            f"ALTER TABLE {table} DROP CONSTRAINT {quote_name(name)}",
+            f"ALTER TABLE {table} ADD CONSTRAINT {quote_name(name)} "
+            f"{definition}",
+        )
+        for table, name, definition in cursor.fetchall()
+    ]
+    cursor.execute(
+        """
+        SELECT index.indexrelid::regclass::text,
+               pg_get_indexdef(index.indexrelid)
+        FROM pg_index index
+        WHERE index.indrelid = ANY(%s::regclass[])
+          AND NOT EXISTS (
+            SELECT 1 FROM pg_constraint
+            WHERE pg_constraint.conindid = index.indexrelid
+          )
+        ORDER BY 1
+        """,
+        [tables],
+    )
+    statements.extend(
+        (name, f"DROP INDEX {name}", definition)
+        for name, definition in cursor.fetchall()
+    )
+    return statements
+
+
+def copy(cursor, model, columns, rows):
+    """Stream rows into the table of model, return how many"""
+    quote_name = cursor.db.ops.quote_name
+    stream = CopyStream(rows)
+    cursor.copy_expert(
+        f"COPY {quote_name(model._meta.db_table)} "
+        f"({', '.join(map(quote_name, columns))}) FROM STDIN",
+        stream,
+        1 << 16,
+    )
+    return stream.count
+
+
+def load(plan, using="default", defer=True, report=None):
+    """Load the rows of plan in one transaction, return the rows per table"""
+    User = get_user_model()
+    tags, ingredients = Recipe.tags.through, Recipe.ingredients.through
+    tables = [
+        model._meta.db_table
+        for model in (User, Tag, Ingredient, Recipe, tags, ingredients)
+    ]
+    counts = {}
+
+    with transaction.atomic(using), connections[using].cursor() as cursor:
+        cursor.execute("SET LOCAL synchronous_commit = off")
+        # check foreign keys kept row by row rather than queue millions of
+        # checks until the commit, the referenced rows are loaded first
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        plan.user_base = reserve_ids(cursor, User, plan.users)
+        plan.tag_base = reserve_ids(
+            cursor, Tag, plan.users * plan.tags_per_user
+        )
+        plan.ingredient_base = reserve_ids(
+            cursor, Ingredient, plan.users * plan.ingredients_per_user
+        )
+        plan.recipe_base = reserve_ids(cursor, Recipe, plan.recipes)
+
+        # building an index or checking a foreign key once, after the
+        # load, is much cheaper than doing it for every row
+        deferred = deferrable(cursor, tables) if defer else []
+        for name, drop, create in deferred:
+            cursor.execute(drop)
+
+        steps = [
+            (User, [
+                "id", "password", "last_login", "is_superuser", "email",
+                "name", "is_active", "is_staff",
+            ], plan.user_rows()),
+            (Tag, ["id", "name", "user_id"], plan.attr_rows(
+                plan.tag_base, plan.tags_per_user, TAGS
+            )),
+            (Ingredient, ["id", "name", "user_id"], plan.attr_rows(
+                plan.ingredient_base, plan.ingredients_per_user, INGREDIENTS
+            )),
+            (Recipe, [
+                "id", "user_id", "title", "description", "time_minutes",
+                "price", "link",
+            ], plan.recipe_rows()),
+            (tags, ["recipe_id", "tag_id"], plan.link_rows(
+                "tags", plan.tag_base, plan.tags_per_user,
+                plan.tags_per_recipe,
+            )),
+            (ingredients, ["recipe_id", "ingredient_id"], plan.link_rows(
+                "ingredients", plan.ingredient_base,
+                plan.ingredients_per_user, plan.ingredients_per_recipe,
+            )),
+        ]
+        for model, columns, rows in steps:
+            start = time.perf_counter()
+            table = model._meta.db_table
+            counts[table] = copy(cursor, model, columns, rows)
+            if report:
+                report(table, counts[table], time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for name, drop, create in reversed(deferred):
+            cursor.execute(create)
+        if report and deferred:
+            report(
+                f"{len(deferred)} constraints and indexes", None,
+                time.perf_counter() - start,
+            )
+
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"ANALYZE {', '.join(map(cursor.db.ops.quote_name, tables))}"
+        )
+
+    return counts
@@ -0,0 +1,22 @@
+"""
+Test runner of the app.
+"""
+
+from django.db import connections
+from django.test.runner import DiscoverRunner
+
+
+# the replica the replica tests read from
+REPLICA = "replica_1"
+
+
+class TestRunner(DiscoverRunner):
+    """Run the tests with a replica, mirroring the primary if none is set"""
+
+    def setup_databases(self, **kwargs):
+        """Add a replica mirroring the test database, then set them up"""
+        connections.databases.setdefault(REPLICA, {
+            **connections.databases["default"],
+            "TEST": {"MIRROR": "default"},
+        })
+        return super().setup_databases(**kwargs)
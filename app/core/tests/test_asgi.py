@@ -0,0 +1,131 @@
+"""
+Tests for the ASGI handler
+"""
+
+import asyncio
+import json
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TransactionTestCase
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+
+from core.asgi import ASGIHandler, read_chunk
+from core.models import Recipe
+
+
+IMPORT_URL = reverse("recipe:recipe-import")
+EXPORT_URL = reverse("recipe:recipe-export")
+
+
+async def exchange(app, path, method="GET", body=b"", headers=()):
+    """Send a request through app and return its status and body"""
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": b"",
+        "headers": [(b"host", b"testserver"), *headers],
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": body}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    return messages[0]["status"], b"".join(
+        message.get("body", b"") for message in messages[1:]
+    )
+
+
+class ASGIHandlerTests(TransactionTestCase):
+    """Test streaming responses are served through ASGI"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            "user@example.com", "testpass123"
+        )
+        token = Token.objects.create(user=self.user)
+        self.auth = (b"authorization", f"Token {token.key}".encode())
+        self.app = ASGIHandler()
+
+    def test_import_recipes(self):
+        """Test an import runs its queries while the response streams"""
+        body = b"\n".join(
+            json.dumps({
+                "title": f"Recipe {i}", "time_minutes": i, "price": "1.00",
+            }).encode()
+            for i in range(3)
+        )
+
+        status, content = asyncio.run(exchange(
+            self.app,
+            IMPORT_URL,
+            method="POST",
+            body=body,
+            headers=[
+                self.auth,
+                (b"content-type", b"application/x-ndjson"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        ))
+
+        self.assertEqual(status, 200)
+        results = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([result["line"] for result in results], [1, 2, 3])
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 3)
+
+    def test_import_chunked(self):
+        """Test an import without a Content-Length reads the whole body"""
+        body = json.dumps(
+            {"title": "Stew", "time_minutes": 5, "price": "1.00"}
+        ).encode()
+
+        status, content = asyncio.run(exchange(
+            self.app,
+            IMPORT_URL,
+            method="POST",
+            body=body,
+            headers=[self.auth, (b"content-type", b"application/x-ndjson")],
+        ))
+
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(content)["line"], 1)
+        self.assertTrue(Recipe.objects.filter(title="Stew").exists())
+
+    def test_export_recipes(self):
+        """Test an export runs its queries while the response streams"""
+        for i in range(3):
+            Recipe.objects.create(
+                user=self.user,
+                title=f"Recipe {i}",
+                time_minutes=i,
+                price=Decimal("1.00"),
+            )
+
+        status, content = asyncio.run(exchange(
+            self.app,
+            EXPORT_URL,
+            headers=[self.auth, (b"accept", b"application/x-ndjson")],
+        ))
+
+        self.assertEqual(status, 200)
+        self.assertEqual(
+            [json.loads(line)["title"] for line in content.splitlines()],
+            ["Recipe 2", "Recipe 1", "Recipe 0"],
+        )
+
+    def test_read_chunk(self):
+        """Test parts are joined into chunks of about the size"""
+        parts = iter([b"ab", b"cd", b"ef"])
+
+        self.assertEqual(read_chunk(parts, 3), b"abcd")
+        self.assertEqual(read_chunk(parts, 3), b"ef")
+        self.assertEqual(read_chunk(parts, 3), b"")
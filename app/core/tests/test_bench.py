@@ -0,0 +1,124 @@
+"""
+Tests for the end to end benchmark
+"""
+
+import json
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from core import bench
+
+
+def result(rps=100.0, p95=10.0, queries=3, size=500):
+    """Return the result of a route"""
+    return {
+        "requests": 10,
+        "requests_per_second": rps,
+        "latency_ms": {"p50": p95 / 2, "p95": p95, "p99": p95},
+        "queries": queries,
+        "bytes": size,
+    }
+
+
+class ScenarioTests(SimpleTestCase):
+    """Test the scenarios of the benchmark"""
+
+    def test_every_route_covered(self):
+        """Test a scenario drives every route of the APIs"""
+        self.assertEqual(bench.uncovered_routes(), [])
+
+    def test_uncovered_route_reported(self):
+        """Test a route without scenario is reported"""
+        scenarios = [
+            scenario for scenario in bench.SCENARIOS
+            if scenario.route != "user:me"
+        ]
+
+        self.assertEqual(bench.uncovered_routes(scenarios), ["user:me"])
+
+    def test_compare(self):
+        """Test regressions beyond the threshold are flagged"""
+        baseline = {
+            "GET a": {"http": result()},
+            "GET b": {"http": result()},
+            "GET c": {"http": result()},
+        }
+        current = {
+            "GET a": {"http": result(rps=95.0, p95=10.5)},
+            "GET b": {"http": result(rps=50.0)},
+            "GET c": {"http": result(queries=4)},
+            "GET d": {"http": result()},
+        }
+
+        lines = list(bench.compare(baseline, current, threshold=10))
+
+        self.assertEqual(
+            [regressed for line, regressed in lines],
+            [False, True, True, False],
+        )
+        self.assertIn("queries 3->4", lines[2][0])
+        self.assertIn("(new)", lines[3][0])
+
+
+@override_settings(DEBUG=False, ALLOWED_HOSTS=[bench.BENCH_HOST])
+class BenchmarkTests(TransactionTestCase):
+    """Test running the benchmark against the test database"""
+
+    def test_run(self):
+        """Test every scenario is measured over every transport"""
+        dataset = bench.seed(5, tags=3, ingredients=3)
+
+        results = bench.run(
+            dataset, ["http", "inprocess"], requests=2, warmup=0
+        )
+
+        self.assertEqual(
+            set(results), {scenario.name for scenario in bench.SCENARIOS}
+        )
+        for transports in results.values():
+            self.assertEqual(set(transports), {"http", "inprocess"})
+        listed = results["GET recipe:recipe-list"]
+        self.assertEqual(
+            listed["http"]["queries"], listed["inprocess"]["queries"]
+        )
+        self.assertGreater(listed["http"]["queries"], 0)
+        self.assertGreater(listed["http"]["bytes"], 0)
+
+    def test_unexpected_status(self):
+        """Test a request answered with an unexpected status fails the run"""
+        dataset = bench.seed(1, tags=1, ingredients=1)
+        scenario = bench.Scenario("GET", "recipe:recipe-list", 200,
+                                  auth=False)
+
+        with self.assertRaises(bench.BenchmarkError):
+            bench.run(dataset, ["inprocess"], 1, 0, scenarios=[scenario])
+
+    @patch("core.management.commands.bench.teardown_databases")
+    @patch("core.management.commands.bench.setup_databases")
+    def test_command(self, patched_setup, patched_teardown):
+        """Test the command reports every route as JSON"""
+        out = StringIO()
+
+        call_command(
+            "bench", "--recipes=3", "--requests=1", "--warmup=0",
+            "--transport=inprocess", stdout=out,
+        )
+
+        report = json.loads(out.getvalue())
+        self.assertEqual(report["meta"]["dataset"]["recipes"], 3)
+        self.assertEqual(len(report["results"]), len(bench.SCENARIOS))
+        patched_teardown.assert_called_once()
+
+    def test_compare_needs_output(self):
+        """Test comparing needs the report written to a file"""
+        with self.assertRaises(CommandError):
+            call_command("bench", "--compare=baseline.json")
+
+    def test_dataset_needs_recipes(self):
+        """Test the routes of a recipe need at least one to drive them"""
+        with self.assertRaises(CommandError):
+            call_command("bench", "--recipes=0")
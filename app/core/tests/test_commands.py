@@ -2,11 +2,26 @@
 Test the custom management commands.
 """
 
+from io import StringIO
 from unittest.mock import patch
 from psycopg2 import OperationalError as Psycopg2Error
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, override_settings
+
+
+SHARED_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.memcached.PyMemcacheCache",
+        "LOCATION": "cache:11211",
+    },
+}
+LOCAL_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+}
 
 
 @patch("core.management.commands.wait_for_db.Command.check")
@@ -28,3 +43,96 @@ class CommandTest(SimpleTestCase):
         call_command("wait_for_db")
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=["default"])
+
+    @patch("random.uniform", side_effect=lambda low, high: high)
+    @patch("time.sleep")
+    def test_wait_for_db_backoff(self, patched_sleep, patched_uniform,
+                                 patched_check):
+        """Test the pause between attempts doubles up to the maximum"""
+        patched_check.side_effect = [OperationalError] * 7 + [True]
+
+        call_command("wait_for_db", "--timeout=0", stdout=StringIO())
+
+        self.assertEqual(
+            [call.args[0] for call in patched_sleep.call_args_list],
+            [0.1, 0.2, 0.4, 0.8, 1.6, 3.2, 5],
+        )
+
+    @patch("random.uniform", side_effect=lambda low, high: high)
+    @patch("time.monotonic")
+    @patch("time.sleep")
+    def test_wait_for_db_deadline(self, patched_sleep, patched_monotonic,
+                                  patched_uniform, patched_check):
+        """Test waiting stops when the next pause would pass the deadline"""
+        patched_check.side_effect = OperationalError
+        clock = [0]
+        patched_monotonic.side_effect = lambda: clock[0]
+        patched_sleep.side_effect = lambda seconds: clock.append(
+            clock.pop() + seconds
+        )
+
+        with self.assertRaises(CommandError):
+            call_command("wait_for_db", "--timeout=1", stdout=StringIO())
+        # 0.1 + 0.2 + 0.4 seconds, the next pause of 0.8 would pass 1
+        self.assertEqual(patched_sleep.call_count, 3)
+
+    @patch("core.management.commands.wait_for_db.pending_migrations")
+    @patch("time.sleep")
+    def test_wait_for_db_migrations(self, patched_sleep, patched_pending,
+                                    patched_check):
+        """Test waiting for pending migrations to be applied"""
+        patched_check.return_value = True
+        patched_pending.side_effect = [["core.0001_initial"], []]
+        out = StringIO()
+
+        call_command("wait_for_db", "--migrations", stdout=out)
+
+        self.assertEqual(patched_sleep.call_count, 1)
+        self.assertIn("Migrations applied!", out.getvalue())
+
+
+class ServeCommandTests(SimpleTestCase):
+    """Test the serve command"""
+
+    def test_check_reports_startup(self):
+        """Test the check loads the app and reports each step"""
+        out = StringIO()
+
+        # the startup time of the test process includes the tests run
+        call_command("serve", "--check", "--startup-budget=3600", stdout=out)
+
+        self.assertIn("App loaded in", out.getvalue())
+        for step in ("urls", "models", "schema"):
+            self.assertIn(step, out.getvalue())
+
+    def test_check_over_budget(self):
+        """Test the check fails when loading takes longer than the budget"""
+        with self.assertRaises(CommandError):
+            call_command(
+                "serve", "--check", "--startup-budget=0", stdout=StringIO()
+            )
+
+    @override_settings(CACHES=SHARED_CACHES)
+    @patch("core.management.commands.serve.Server.run", autospec=True)
+    def test_serve_preloaded(self, patched_run):
+        """Test workers are forked off a preloaded app and recycled"""
+        call_command(
+            "serve", "--workers=3", "--threads=2", "--max-requests=50"
+        )
+
+        cfg = patched_run.call_args[0][0].cfg
+        self.assertTrue(cfg.preload_app)
+        self.assertEqual(cfg.workers, 3)
+        self.assertEqual(cfg.worker_class_str, "gthread")
+        self.assertEqual(cfg.max_requests, 50)
+
+    @override_settings(CACHES=LOCAL_CACHES)
+    @patch("core.management.commands.serve.Server.run", autospec=True)
+    def test_serve_workers_need_shared_cache(self, patched_run):
+        """Test several workers are refused with a per process cache"""
+        with self.assertRaises(CommandError):
+            call_command("serve", "--workers=3")
+        patched_run.assert_not_called()
+
+        call_command("serve", "--workers=1")
+        patched_run.assert_called_once()
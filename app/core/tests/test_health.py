@@ -0,0 +1,78 @@
+"""
+Tests for the health check endpoints
+"""
+
+from unittest.mock import patch
+
+from django.db import OperationalError, connection
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import health
+
+
+HEALTHZ_URL = reverse("healthz")
+READYZ_URL = reverse("readyz")
+
+
+class HealthApiTests(TestCase):
+    """Test the liveness and readiness endpoints"""
+
+    def setUp(self):
+        self.client = APIClient()
+        health._migrated.clear()
+
+    def test_liveness(self):
+        """Test liveness does not use the database"""
+        with self.assertNumQueries(0):
+            res = self.client.get(HEALTHZ_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_ready(self):
+        """Test readiness reports the database latency"""
+        res = self.client.get(READYZ_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.data["database"]["ok"])
+        self.assertGreater(res.data["database"]["latency_ms"], 0)
+        self.assertEqual(res.data["pending_migrations"], 0)
+
+    def test_migrations_checked_until_applied(self):
+        """Test the migration graph is not loaded again once migrated"""
+        self.client.get(READYZ_URL)
+
+        with self.assertNumQueries(1):
+            self.client.get(READYZ_URL)
+
+    @patch("core.health.pending_migrations")
+    def test_pending_migrations(self, patched_pending):
+        """Test pending migrations make the app unready"""
+        patched_pending.return_value = ["core.0099_next"]
+
+        with self.assertLogs("core.health", "WARNING") as logs:
+            res = self.client.get(READYZ_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(res.data["pending_migrations"], 1)
+        self.assertNotIn("0099_next", res.content.decode())
+        self.assertIn("core.0099_next", logs.output[0])
+
+    def test_database_unavailable(self):
+        """Test an unreachable database makes the app unready"""
+        with patch.object(
+            connection, "cursor",
+            side_effect=OperationalError('host "db-1" role "app" down'),
+        ), self.assertLogs("core.health", "ERROR") as logs:
+            res = self.client.get(READYZ_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(
+            res.data["database"],
+            {"ok": False, "error": "database_unavailable"},
+        )
+        self.assertNotIn("db-1", res.content.decode())
+        self.assertIn("db-1", logs.output[0])
@@ -0,0 +1,179 @@
+"""
+Tests for the Prometheus metrics
+"""
+
+import json
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import metrics
+from user.authentication import token_cache
+
+
+METRICS_URL = reverse("metrics")
+RECIPES_URL = reverse("recipe:recipe-list")
+ME_URL = reverse("user:me")
+EXITED_PID = 99999999
+
+
+def reset_metrics(test):
+    """Start test without metrics, and leave none behind"""
+    metrics.reset()
+    token_cache.clear()
+    test.addCleanup(metrics.reset)
+    test.addCleanup(token_cache.clear)
+
+
+class MetricsTests(SimpleTestCase):
+    """Test recording and collecting metrics"""
+
+    def setUp(self):
+        reset_metrics(self)
+
+    def test_render_histogram(self):
+        """Test histograms are rendered with cumulative buckets"""
+        label_set = metrics.labels(route="recipe:recipe-list")
+        for value in (0.02, 0.02, 3):
+            metrics.observe("http_request_duration_seconds", label_set, value)
+
+        text = metrics.render(metrics.snapshot())
+
+        self.assertIn(
+            "# TYPE http_request_duration_seconds histogram", text
+        )
+        self.assertIn(
+            'http_request_duration_seconds_bucket{route="recipe:recipe-list"'
+            ',le="0.025"} 2', text
+        )
+        self.assertIn(
+            'http_request_duration_seconds_bucket{route="recipe:recipe-list"'
+            ',le="+Inf"} 3', text
+        )
+        self.assertIn(
+            'http_request_duration_seconds_count{route="recipe:recipe-list"}'
+            ' 3', text
+        )
+
+    def test_threads_record_without_locks(self):
+        """Test every thread records into its own shard"""
+        def record():
+            for _ in range(1000):
+                metrics.inc("http_requests_total", 'route="r"')
+
+        threads = [threading.Thread(target=record) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(
+            metrics.snapshot()["counters"]["http_requests_total"],
+            {'route="r"': 4000},
+        )
+
+    def test_exited_threads_retire_their_shards(self):
+        """Test the shards of exited threads are folded, not kept"""
+        metrics.inc("http_requests_total", 'route="r"')
+        for _ in range(200):
+            thread = threading.Thread(
+                target=metrics.inc, args=("http_requests_total", 'route="r"')
+            )
+            thread.start()
+            thread.join()
+
+        self.assertEqual(len(metrics._shards), 1)
+        self.assertEqual(
+            metrics.snapshot()["counters"]["http_requests_total"],
+            {'route="r"': 201},
+        )
+
+    def test_spool_dir(self):
+        """Test the metrics of every worker are summed, exited ones too"""
+        directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, directory)
+        metrics.use_spool_dir(directory)
+        self.addCleanup(metrics.use_spool_dir, None)
+        (directory / f"{EXITED_PID}.json").write_text(json.dumps({
+            "counters": {"http_requests_total": {'route="r"': 2}},
+            "gauges": {"http_requests_in_flight": {'route="r"': 1}},
+            "histograms": {},
+        }))
+        metrics.inc("http_requests_total", 'route="r"')
+
+        for _ in range(2):
+            collected = metrics.collect()
+
+            self.assertEqual(
+                collected["counters"]["http_requests_total"],
+                {'route="r"': 3},
+            )
+            self.assertNotIn("http_requests_in_flight", collected["gauges"])
+        self.assertFalse((directory / f"{EXITED_PID}.json").exists())
+        self.assertTrue((directory / metrics.ARCHIVE).exists())
+
+        metrics.clear_spool()
+        self.assertEqual(list(directory.glob("*.json")), [])
+
+
+class MetricsApiTests(TestCase):
+    """Test the metrics of API requests"""
+
+    def setUp(self):
+        reset_metrics(self)
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="testpass123"
+        )
+        token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+    def test_metrics(self):
+        """Test requests are scraped by route and action"""
+        for _ in range(2):
+            self.client.get(RECIPES_URL)
+        self.client.patch(ME_URL, {"name": "New name"})
+
+        res = APIClient().get(METRICS_URL)
+
+        self.assertEqual(res["Content-Type"], metrics.CONTENT_TYPE)
+        text = res.content.decode()
+        route = 'route="recipe:recipe-list",action="list",method="GET"'
+        for line in (
+            f'http_requests_total{{{route},status="200"}} 2',
+            f"http_request_duration_seconds_count{{{route}}} 2",
+            f"db_queries_per_request_count{{{route}}} 2",
+            'http_requests_in_flight{route="recipe:recipe-list"} 0',
+            'http_requests_total{route="user:me",action="patch",'
+            'method="PATCH",status="200"} 1',
+            'auth_token_cache_lookups_total{result="hit"} 2',
+            'auth_token_cache_lookups_total{result="miss"} 1',
+        ):
+            self.assertIn(line, text.splitlines())
+        self.assertIn("db_query_duration_seconds_bucket", text)
+        self.assertIn("auth_token_cache_hit_ratio 0.666", text)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled(self):
+        """Test requests are not recorded when metrics are off"""
+        self.client.get(RECIPES_URL)
+
+        res = APIClient().get(METRICS_URL)
+
+        self.assertNotIn("recipe:recipe-list", res.content.decode())
+
+    def test_scrapers_allowed_by_address(self):
+        """Test only clients of METRICS_ALLOWED_IPS may scrape"""
+        client = APIClient(REMOTE_ADDR="203.0.113.5")
+
+        self.assertEqual(client.get(METRICS_URL).status_code, 403)
+        with override_settings(METRICS_ALLOWED_IPS=["203.0.113.0/24"]):
+            self.assertEqual(client.get(METRICS_URL).status_code, 200)
@@ -4,6 +4,7 @@ Test for models
 
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError
 
 from core import models
 
@@ -75,4 +76,28 @@ class ModelTests(TestCase):
         user = create_user()
         ingredient = models.Ingredient.objects.create(user=user, name="Ingredient1")
 
-        self.assertEqual(str(ingredient), ingredient.name)
\ No newline at end of file
+        self.assertEqual(str(ingredient), ingredient.name)
+
+    def test_tag_name_unique_per_user(self):
+        """Test a user cannot have two tags with the same name"""
+        user = create_user()
+        models.Tag.objects.create(user=user, name="Tag1")
+
+        with self.assertRaises(IntegrityError):
+            models.Tag.objects.create(user=user, name="Tag1")
+
+    def test_get_or_create_by_names(self):
+        """Test resolving names reuses existing rows and creates the rest"""
+        user = create_user()
+        other = create_user(email="other@example.com")
+        salt = models.Ingredient.objects.create(user=user, name="Salt")
+        models.Ingredient.objects.create(user=other, name="Pepper")
+
+        ids = models.Ingredient.objects.get_or_create_by_names(
+            user, ["Salt", "Pepper", "Salt"]
+        )
+
+        self.assertEqual(set(ids), {"Salt", "Pepper"})
+        self.assertEqual(ids["Salt"], salt.id)
+        pepper = models.Ingredient.objects.get(id=ids["Pepper"])
+        self.assertEqual(pepper.user, user)
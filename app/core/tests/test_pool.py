@@ -0,0 +1,213 @@
+"""
+Tests for the database connection pool
+"""
+
+import threading
+from io import StringIO
+from unittest.mock import Mock, patch
+
+from psycopg2.extensions import (
+    TRANSACTION_STATUS_IDLE,
+    TRANSACTION_STATUS_INTRANS,
+)
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.db.aio import release_connections
+from core.db.pool import ConnectionPool, PoolTimeout, collect_stats
+
+
+DB_POOL_URL = reverse("db-pool")
+
+
+class FakeConnection:
+    """Stand in for a psycopg2 connection"""
+
+    def __init__(self, alive=True):
+        self.alive = alive
+        self.closed = False
+        self.autocommit = True
+        self.info = self
+        self.transaction_status = TRANSACTION_STATUS_IDLE
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, sql):
+        if not self.alive:
+            raise Exception("server closed the connection")
+
+    def rollback(self):
+        self.transaction_status = TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = True
+
+
+def create_pool(**kwargs):
+    """Create a pool of fake connections"""
+    return ConnectionPool(FakeConnection, **{"max_size": 2, **kwargs})
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """Test checking connections in and out"""
+
+    def test_reuses_connections(self):
+        """Test released connections are handed out again"""
+        pool = create_pool()
+        conn = pool.acquire()
+        pool.release(conn)
+
+        self.assertIs(pool.acquire(), conn)
+        self.assertEqual(pool.stats()["created"], 1)
+
+    def test_timeout_when_exhausted(self):
+        """Test checkouts fail after the timeout when all are in use"""
+        pool = create_pool(max_size=1, timeout=0.01)
+        pool.acquire()
+
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+        self.assertEqual(pool.stats()["timeouts"], 1)
+
+    def test_waits_for_release(self):
+        """Test a waiting checkout gets the next released connection"""
+        pool = create_pool(max_size=1)
+        conn = pool.acquire()
+        timer = threading.Timer(0.05, pool.release, [conn])
+        timer.start()
+
+        self.assertIs(pool.acquire(), conn)
+        timer.join()
+        self.assertGreater(pool.stats()["max_wait_seconds"], 0.01)
+
+    def test_recycles_old_connections(self):
+        """Test connections past their lifetime are replaced"""
+        pool = create_pool(max_lifetime=0)
+        conn = pool.acquire()
+        pool.release(conn)
+
+        self.assertTrue(conn.closed)
+        self.assertIsNot(pool.acquire(), conn)
+        self.assertEqual(pool.stats()["recycled"], 1)
+
+    def test_checks_idle_connections(self):
+        """Test dead idle connections are replaced on checkout"""
+        pool = create_pool(check_after=0)
+        conn = pool.acquire()
+        pool.release(conn)
+        conn.alive = False
+
+        self.assertIsNot(pool.acquire(), conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.stats()["failed_checks"], 1)
+
+    def test_rolls_back_released_transactions(self):
+        """Test open transactions are rolled back on release"""
+        pool = create_pool()
+        conn = pool.acquire()
+        conn.transaction_status = TRANSACTION_STATUS_INTRANS
+        pool.release(conn)
+
+        self.assertEqual(conn.transaction_status, TRANSACTION_STATUS_IDLE)
+        self.assertEqual(pool.stats()["idle"], 1)
+
+    def test_forgets_connections_after_fork(self):
+        """Test a forked process does not share its parent's connections"""
+        pool = create_pool()
+        conn = pool.acquire()
+        pool.release(conn)
+
+        with patch("core.db.pool.os.getpid", return_value=-1):
+            self.assertIsNot(pool.acquire(), conn)
+        self.assertFalse(conn.closed)
+
+    def test_publishes_stats(self):
+        """Test the statistics of every pool are collected from the cache"""
+        cache.clear()
+        pools = [create_pool(name=name) for name in ("a", "b")]
+        for pool in pools:
+            pool.release(pool.acquire())
+            pool.publish(force=True)
+
+        stats = collect_stats()
+
+        self.assertEqual(
+            sorted(worker["name"] for worker in stats["workers"]), ["a", "b"]
+        )
+        self.assertEqual(stats["totals"]["idle"], 2)
+
+
+class ReleaseConnectionsTests(SimpleTestCase):
+    """Test the connections of async calls are released like requests"""
+
+    @patch("core.db.aio.connections")
+    def test_release(self, patched_connections):
+        """Test pooled connections are returned, persistent ones kept"""
+        pooled, persistent = Mock(pool=object()), Mock(pool=None)
+        patched_connections.all.return_value = [pooled, persistent]
+
+        release_connections()
+
+        pooled.close.assert_called_once()
+        persistent.close.assert_not_called()
+        persistent.close_if_unusable_or_obsolete.assert_called_once()
+
+
+class DatabasePoolApiTests(TestCase):
+    """Test the pool statistics endpoint and command"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_backend_uses_pool(self):
+        """Test the default database checks connections out of a pool"""
+        connection.ensure_connection()
+
+        self.assertIsNotNone(connection.pool)
+
+    def test_admin_required(self):
+        """Test only admins can see the pool statistics"""
+        user = get_user_model().objects.create_user("u@example.com", "pw")
+        self.client.force_authenticate(user)
+
+        res = self.client.get(DB_POOL_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_stats(self):
+        """Test admins see the pool of the serving worker"""
+        admin = get_user_model().objects.create_superuser(
+            "admin@example.com", "pw"
+        )
+        self.client.force_authenticate(admin)
+
+        res = self.client.get(DB_POOL_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertGreaterEqual(res.data["totals"]["checkouts"], 1)
+
+    def test_command(self):
+        """Test the command prints a line per worker and the totals"""
+        connection.pool.publish(force=True)
+        out = StringIO()
+
+        call_command("db_pool_stats", stdout=out)
+
+        self.assertIn("in_use", out.getvalue())
+        self.assertIn("total", out.getvalue())
@@ -0,0 +1,213 @@
+"""
+Tests for the orjson renderer and parser
+"""
+
+import datetime
+import io
+import json
+import uuid
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Recipe, Tag, Ingredient
+from core.parsers import MessagePackParser, ORJSONParser
+from core.renderers import MessagePackRenderer, ORJSONRenderer
+from recipe import serializers as recipe_serializers
+from user import serializers as user_serializers
+
+
+PAYLOADS = [
+    {"price": Decimal("5.25"), "total": Decimal("1234567.89")},
+    {"created": datetime.datetime(2021, 5, 4, 3, 2, 1, 123456)},
+    {"created": datetime.datetime(2021, 5, 4, tzinfo=timezone.utc)},
+    {"day": datetime.date(2021, 5, 4), "at": datetime.time(3, 2, 1, 500)},
+    {"id": uuid.UUID("12345678-1234-5678-1234-567812345678")},
+    {"title": "Crème brûlée 🍮", "lazy": gettext_lazy("Lazy")},
+    {"separators": "line\u2028paragraph\u2029"},
+    OrderedDict([("b", [1, 2.5, True, None]), ("a", {"nested": ()})]),
+    {1: "integer key"},
+    {"big": 2 ** 70},
+    [],
+    "plain",
+]
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    """Test the orjson renderer renders like DRF's JSONRenderer"""
+
+    def test_equivalent_output(self):
+        """Test payloads render to the same bytes"""
+        for payload in PAYLOADS:
+            with self.subTest(payload=payload):
+                self.assertEqual(
+                    ORJSONRenderer().render(payload),
+                    JSONRenderer().render(payload),
+                )
+
+    def test_indent_falls_back(self):
+        """Test indented output is rendered by DRF"""
+        payload = {"a": [1, {"b": Decimal("2")}]}
+
+        for kwargs in (
+            {"accepted_media_type": "application/json; indent=4"},
+            {"renderer_context": {"indent": 2}},
+        ):
+            self.assertEqual(
+                ORJSONRenderer().render(payload, **kwargs),
+                JSONRenderer().render(payload, **kwargs),
+            )
+
+    def test_none_renders_empty(self):
+        """Test no data renders an empty body"""
+        self.assertEqual(ORJSONRenderer().render(None), b"")
+
+
+class ORJSONParserTests(SimpleTestCase):
+    """Test the orjson parser parses like DRF's JSONParser"""
+
+    def parse(self, parser, body, **parser_context):
+        """Parse body with parser"""
+        return parser.parse(io.BytesIO(body), parser_context=parser_context)
+
+    def test_equivalent_output(self):
+        """Test documents parse to the same data"""
+        body = '{"title": "Crème", "price": 5.25, "tags": [{"id": 1}]}'
+
+        self.assertEqual(
+            self.parse(ORJSONParser(), body.encode()),
+            self.parse(JSONParser(), body.encode()),
+        )
+
+    def test_other_encodings(self):
+        """Test non UTF-8 bodies are decoded like DRF does"""
+        body = '{"title": "Crème"}'.encode("latin-1")
+
+        data = self.parse(ORJSONParser(), body, encoding="latin-1")
+
+        self.assertEqual(data, {"title": "Crème"})
+
+    def test_malformed(self):
+        """Test malformed and non strict documents are rejected"""
+        for body in (b"{", b"", b'{"a": NaN}'):
+            with self.assertRaises(ParseError):
+                self.parse(ORJSONParser(), body)
+
+
+class MessagePackTests(SimpleTestCase):
+    """Test MessagePack carries the same values as JSON"""
+
+    def round_trip(self, payload):
+        """Render and parse payload as MessagePack"""
+        body = MessagePackRenderer().render(payload)
+        return MessagePackParser().parse(io.BytesIO(body))
+
+    def test_same_values_as_json(self):
+        """Test payloads parse back to what their JSON parses to"""
+        # MessagePack keeps integer keys and has no integers beyond 64 bits
+        payloads = [
+            payload for payload in PAYLOADS
+            if payload not in ({1: "integer key"}, {"big": 2 ** 70})
+        ]
+        for payload in payloads:
+            with self.subTest(payload=payload):
+                self.assertEqual(
+                    self.round_trip(payload),
+                    JSONParser().parse(
+                        io.BytesIO(JSONRenderer().render(payload))
+                    ),
+                )
+
+    def test_malformed(self):
+        """Test malformed documents are rejected"""
+        for body in (b"", b"\xc1", b"\x92\x01", b"\x01\x02"):
+            with self.assertRaises(ParseError):
+                MessagePackParser().parse(io.BytesIO(body))
+
+
+class SerializerRoundTripTests(TestCase):
+    """Test every API serializer round-trips through MessagePack"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "user@example.com", "testpass123", name="Crème"
+        )
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title="Soup",
+            time_minutes=10,
+            price=Decimal("5.25"),
+            description="Hot",
+        )
+        self.recipe.tags.add(Tag.objects.create(user=self.user, name="Tag"))
+        self.recipe.ingredients.add(
+            Ingredient.objects.create(user=self.user, name="Kale")
+        )
+
+    def assertRoundTrips(self, serializer_class, instance=None, data=None):
+        """Check JSON and MessagePack validate to the same data"""
+        if data is None:
+            data = serializer_class(instance).data
+
+        validated = []
+        for renderer, parser in (
+            (JSONRenderer(), JSONParser()),
+            (MessagePackRenderer(), MessagePackParser()),
+        ):
+            parsed = parser.parse(io.BytesIO(renderer.render(data)))
+            serializer = serializer_class(instance, data=parsed)
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+            validated.append(serializer.validated_data)
+
+        self.assertEqual(validated[0], validated[1])
+
+    def test_recipe_serializers(self):
+        """Test the recipe serializers round-trip"""
+        for serializer_class in (
+            recipe_serializers.RecipeSerializer,
+            recipe_serializers.RecipeDetailSerializer,
+        ):
+            self.assertRoundTrips(serializer_class, self.recipe)
+        self.assertRoundTrips(
+            recipe_serializers.TagSerializer, self.recipe.tags.get()
+        )
+        self.assertRoundTrips(
+            recipe_serializers.IngredientSerializer,
+            self.recipe.ingredients.get(),
+        )
+
+    def test_tag_detail_serializer(self):
+        """Test the tag detail serializer renders the same values"""
+        data = recipe_serializers.TagDetailSerializer(
+            self.recipe.tags.get()
+        ).data
+        body = MessagePackRenderer().render(data)
+
+        self.assertEqual(
+            MessagePackParser().parse(io.BytesIO(body)),
+            json.loads(JSONRenderer().render(data)),
+        )
+
+    def test_user_serializers(self):
+        """Test the user serializers round-trip"""
+        self.assertRoundTrips(
+            user_serializers.UserSerializer,
+            self.user,
+            {
+                "email": "user@example.com",
+                "password": "newpass123",
+                "name": "Crème",
+            },
+        )
+        self.assertRoundTrips(
+            user_serializers.AuthTokenSerializer,
+            data={"email": "user@example.com", "password": "testpass123"},
+        )
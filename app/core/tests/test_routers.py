@@ -0,0 +1,62 @@
+"""
+Tests for the replica database router
+"""
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from rest_framework.authtoken.models import Token
+
+from core.db.routers import (
+    ReplicaRouter,
+    is_pinned,
+    pin_to_primary,
+    use_replica,
+)
+from core.models import Recipe, Tag
+
+
+@override_settings(REPLICA_DATABASES=["replica_1", "replica_2"])
+class ReplicaRouterTests(SimpleTestCase):
+    """Test routing reads and writes"""
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_use_primary_by_default(self):
+        """Test reads go to the primary unless flagged"""
+        self.assertIsNone(self.router.db_for_read(Recipe))
+
+    def test_flagged_reads_use_replica(self):
+        """Test flagged reads of core models go to a replica"""
+        with use_replica():
+            self.assertIn(
+                self.router.db_for_read(Recipe), ["replica_1", "replica_2"]
+            )
+            self.assertIn(
+                self.router.db_for_read(Recipe.tags.through),
+                ["replica_1", "replica_2"],
+            )
+            self.assertIsNone(self.router.db_for_read(Token))
+
+        self.assertIsNone(self.router.db_for_read(Tag))
+
+    @override_settings(REPLICA_DATABASES=[])
+    def test_no_replicas(self):
+        """Test flagged reads use the primary when there is no replica"""
+        with use_replica():
+            self.assertIsNone(self.router.db_for_read(Recipe))
+
+    def test_writes_use_primary(self):
+        """Test writes always go to the primary"""
+        with use_replica():
+            self.assertEqual(self.router.db_for_write(Recipe), "default")
+
+    def test_pin_to_primary(self):
+        """Test users are pinned to the primary after writing"""
+        cache.clear()
+
+        self.assertFalse(is_pinned(1))
+        pin_to_primary(1)
+        self.assertTrue(is_pinned(1))
+        self.assertFalse(is_pinned(2))
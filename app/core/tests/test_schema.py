@@ -0,0 +1,118 @@
+"""
+Tests for the pre-built OpenAPI schema
+"""
+
+import gzip
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import schema
+
+
+SCHEMA_URL = reverse("api-schema")
+
+
+class SchemaSnapshotTests(SimpleTestCase):
+    """Test the built schema matches the code"""
+
+    def test_snapshot_up_to_date(self):
+        """Test the committed schema.yaml is the schema of the live code"""
+        self.assertEqual(
+            schema.artifact_path("yaml").read_text(),
+            schema.generate_schema()["yaml"].decode(),
+            "The API changed, run 'manage.py build_schema' and commit "
+            "openapi/schema.yaml.",
+        )
+
+
+class SchemaApiTests(SimpleTestCase):
+    """Test serving the schema from its artifacts"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.root.cleanup)
+        settings = override_settings(SCHEMA_ROOT=Path(self.root.name))
+        settings.enable()
+        self.addCleanup(settings.disable)
+        schema._artifacts.clear()
+        self.addCleanup(schema._artifacts.clear)
+
+    def test_served_from_artifact(self):
+        """Test the schema is not generated when an artifact exists"""
+        schema.artifact_path("yaml").write_bytes(b"openapi: 3.0.3\n")
+
+        with patch("core.schema.generate_schema") as patched_generate:
+            res = self.client.get(SCHEMA_URL)
+
+        patched_generate.assert_not_called()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.content, b"openapi: 3.0.3\n")
+        self.assertEqual(res["ETag"], schema.get_artifact("yaml").etag)
+
+    def test_generated_once_without_artifact(self):
+        """Test a missing artifact is generated on first use only"""
+        with patch(
+            "core.schema.generate_schema", wraps=schema.generate_schema
+        ) as patched_generate:
+            for _ in range(3):
+                res = self.client.get(SCHEMA_URL, {"format": "json"})
+
+        self.assertEqual(patched_generate.call_count, 1)
+        self.assertIn("paths", json.loads(res.content))
+
+    def test_not_modified(self):
+        """Test a current ETag is answered with 304"""
+        res = self.client.get(SCHEMA_URL)
+        res = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=res["ETag"])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_gzip(self):
+        """Test clients accepting gzip get the precompressed schema"""
+        plain = self.client.get(SCHEMA_URL)
+        res = self.client.get(SCHEMA_URL, HTTP_ACCEPT_ENCODING="gzip, br")
+
+        self.assertEqual(res["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(res.content), plain.content)
+        self.assertNotEqual(res["ETag"], plain["ETag"])
+        self.assertIn("Accept-Encoding", res["Vary"])
+
+    def test_gzip_refused(self):
+        """Test gzip is only sent to clients accepting it"""
+        for header in ("gzip;q=0", "x-gzip-unsupported", "br, *;q=0", ""):
+            res = self.client.get(SCHEMA_URL, HTTP_ACCEPT_ENCODING=header)
+
+            self.assertNotIn("Content-Encoding", res)
+            self.assertIn("Accept-Encoding", res["Vary"])
+        for header in ("GZIP;q=0.5", "br, *", "x-gzip"):
+            res = self.client.get(SCHEMA_URL, HTTP_ACCEPT_ENCODING=header)
+
+            self.assertEqual(res["Content-Encoding"], "gzip")
+
+    def test_build_command(self):
+        """Test the command builds every artifact and checks them"""
+        call_command("build_schema", stdout=StringIO())
+        for fmt in schema.RENDERERS:
+            self.assertEqual(
+                gzip.decompress(
+                    schema.artifact_path(fmt, gzipped=True).read_bytes()
+                ),
+                schema.artifact_path(fmt).read_bytes(),
+            )
+        call_command("build_schema", "--check", stdout=StringIO())
+
+        schema.artifact_path("json").write_bytes(b"{}")
+        with self.assertRaises(CommandError):
+            call_command("build_schema", "--check", stdout=StringIO())
@@ -0,0 +1,157 @@
+"""
+Tests for the synthetic data loaded with COPY
+"""
+
+import random
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.models import Count, F
+from django.test import SimpleTestCase, TestCase
+
+from core import seed
+from core.models import Ingredient, Recipe, Tag
+
+
+def schema(tables):
+    """Return the constraints and indexes of tables"""
+    with connection.cursor() as cursor:
+        return sorted(seed.deferrable(cursor, tables))
+
+
+class SeedPlanTests(SimpleTestCase):
+    """Test generating the rows"""
+
+    def test_spread(self):
+        """Test totals are spread exactly, skewed towards a few buckets"""
+        counts = seed.spread(1000, 50, 1.1, random.Random(0))
+
+        self.assertEqual(sum(counts), 1000)
+        self.assertGreater(max(counts), 10 * min(counts))
+
+    def test_spread_evenly(self):
+        """Test a skew of 0 spreads totals evenly"""
+        counts = seed.spread(1000, 50, 0, random.Random(0))
+
+        self.assertEqual(set(counts), {20})
+
+    def test_pick_skewed(self):
+        """Test picks are distinct and favour popular ranks at any skew"""
+        rng = random.Random(0)
+        inverse = seed.inverse_weights(60, 4)
+
+        picks = [seed.pick(rng, inverse, 30) for _ in range(200)]
+
+        for ranks in picks:
+            self.assertEqual(len(ranks), len(set(ranks)))
+            self.assertLessEqual(len(ranks), 60)
+        picked = [ranks for ranks in picks if ranks]
+        self.assertGreater(
+            sum(ranks[0] == 0 for ranks in picked), 0.9 * len(picked)
+        )
+
+    def test_deterministic(self):
+        """Test a seed always generates the same rows"""
+        def rows(seed_value):
+            plan = seed.SeedPlan(10, 100, seed=seed_value)
+            return (
+                list(plan.recipe_rows()),
+                list(plan.link_rows("tags", 1, 20, 3)),
+            )
+
+        self.assertEqual(rows(1), rows(1))
+        self.assertNotEqual(rows(1), rows(2))
+
+    def test_copy_stream(self):
+        """Test rows are read in the COPY text format, in chunks"""
+        stream = seed.CopyStream(iter([
+            (1, "tab\there", None),
+            (2, "line\nbreak \\", True),
+        ]))
+
+        data = b""
+        while True:
+            chunk = stream.read(7)
+            if not chunk:
+                break
+            self.assertLessEqual(len(chunk), 7)
+            data += chunk
+
+        self.assertEqual(
+            data, b"1\ttab\\there\t\\N\n2\tline\\nbreak \\\\\tTrue\n"
+        )
+        self.assertEqual(stream.count, 2)
+
+
+class SeedLoadTests(TestCase):
+    """Test loading the rows with COPY"""
+
+    def test_load(self):
+        """Test the rows are loaded with consistent relations"""
+        existing = get_user_model().objects.create_user(
+            email="existing@example.com", password="testpass123"
+        )
+        tables = [
+            model._meta.db_table for model in (
+                get_user_model(), Tag, Ingredient, Recipe,
+                Recipe.tags.through, Recipe.ingredients.through,
+            )
+        ]
+        before = schema(tables)
+        plan = seed.SeedPlan(5, 40, tags_per_user=4, ingredients_per_user=8,
+                             password="seeded")
+
+        counts = seed.load(plan)
+
+        users = get_user_model().objects.exclude(pk=existing.pk)
+        self.assertEqual(users.count(), 5)
+        self.assertEqual(Recipe.objects.count(), 40)
+        self.assertEqual(Tag.objects.count(), 20)
+        self.assertEqual(
+            counts[Recipe.tags.through._meta.db_table],
+            Recipe.tags.through.objects.count(),
+        )
+        self.assertTrue(users.first().check_password("seeded"))
+        self.assertFalse(
+            Recipe.objects.filter(search_vector__isnull=True).exists()
+        )
+        # recipes only use the tags and ingredients of their user
+        self.assertFalse(
+            Recipe.objects.exclude(tags__isnull=True)
+            .exclude(tags__user=F("user")).exists()
+        )
+        self.assertFalse(
+            Recipe.objects.exclude(ingredients__isnull=True)
+            .exclude(ingredients__user=F("user")).exists()
+        )
+        self.assertFalse(
+            Tag.objects.values("user", "name").annotate(n=Count("id"))
+            .filter(n__gt=1).exists()
+        )
+        self.assertEqual(schema(tables), before)
+        # the ids used were reserved
+        recipe = Recipe.objects.create(
+            user=existing, title="Later", time_minutes=1, price="1.00"
+        )
+        self.assertGreater(recipe.id, Recipe.objects.exclude(
+            pk=recipe.pk).order_by("-id").first().id)
+
+    def test_command(self):
+        """Test the command loads the rows and reports them"""
+        out = StringIO()
+
+        call_command(
+            "seed", "--users=3", "--recipes=10", "--keep-constraints",
+            stdout=out,
+        )
+
+        self.assertEqual(Recipe.objects.count(), 10)
+        self.assertIn("Copied 10 rows to core_recipe", out.getvalue())
+
+    def test_command_needs_users(self):
+        """Test recipes can't be loaded without users"""
+        with self.assertRaises(CommandError):
+            call_command("seed", "--users=0", stdout=StringIO())
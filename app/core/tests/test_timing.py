@@ -0,0 +1,140 @@
+"""
+Tests for the per request timings
+"""
+
+import json
+import time
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import timing
+from core.models import Recipe, Tag
+from user.serializers import UserSerializer
+
+
+RECIPES_URL = reverse("recipe:recipe-list")
+ME_URL = reverse("user:me")
+
+
+def parse_server_timing(header):
+    """Return the metrics of a Server-Timing header by name"""
+    metrics = {}
+    for metric in header.split(", "):
+        name, *params = metric.split(";")
+        metrics[name] = dict(param.split("=", 1) for param in params)
+    return metrics
+
+
+class TimedTests(SimpleTestCase):
+    """Test measuring blocks of code"""
+
+    def setUp(self):
+        self.timings = timing.RequestTimings()
+        token = timing.current.set(self.timings)
+        self.addCleanup(timing.current.reset, token)
+
+    def test_nested_blocks_counted_once(self):
+        """Test a block inside a block of the same name is not added"""
+        with timing.timed("serialize"):
+            with timing.timed("serialize"):
+                time.sleep(0.01)
+
+        self.assertGreaterEqual(self.timings.durations["serialize"], 0.01)
+        self.assertLess(self.timings.durations["serialize"], 0.02)
+
+    def test_queries_excluded(self):
+        """Test the queries of a block are not counted as its time"""
+        with timing.timed("serialize"):
+            self.timings.add_query(10)
+
+        self.assertLess(self.timings.durations["serialize"], 1)
+        self.assertEqual(self.timings.queries, 1)
+
+    def test_not_sampled(self):
+        """Test blocks are not measured outside a sampled request"""
+        timing.current.set(None)
+
+        with timing.timed("serialize"):
+            pass
+
+        self.assertEqual(self.timings.durations, {})
+
+
+@override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+class ServerTimingApiTests(TestCase):
+    """Test the timings of API requests"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="testpass123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        recipe = Recipe.objects.create(
+            user=self.user, title="Soup", time_minutes=5, price="4.50"
+        )
+        recipe.tags.add(Tag.objects.create(user=self.user, name="Dinner"))
+
+    def test_header_and_log(self):
+        """Test sampled responses report their timings"""
+        with self.assertLogs("core.timing", "INFO") as logs, \
+                CaptureQueriesContext(connection) as queries:
+            res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        metrics = parse_server_timing(res["Server-Timing"])
+        self.assertEqual(
+            list(metrics), ["db", "serialize", "render", "total"]
+        )
+        self.assertEqual(
+            metrics["db"]["desc"], f'"{len(queries.captured_queries)} queries"'
+        )
+        self.assertGreater(float(metrics["render"]["dur"]), 0)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["view"], "recipe:recipe-list")
+        self.assertEqual(record["status"], 200)
+        self.assertEqual(record["queries"], len(queries.captured_queries))
+        self.assertGreater(record["serialize_ms"], 0)
+        self.assertIsNone(timing.current.get())
+
+    def test_serializer_time(self):
+        """Test validating and saving writes count as serializer time"""
+        def validate(serializer, attrs):
+            time.sleep(0.02)
+            return attrs
+
+        update = UserSerializer.update
+
+        def slow_update(serializer, instance, validated_data):
+            time.sleep(0.02)
+            return update(serializer, instance, validated_data)
+
+        with self.assertLogs("core.timing", "INFO"), \
+                patch.object(UserSerializer, "validate", validate), \
+                patch.object(UserSerializer, "update", slow_update):
+            res = self.client.patch(ME_URL, {"name": "New name"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        metrics = parse_server_timing(res["Server-Timing"])
+        self.assertGreaterEqual(float(metrics["serialize"]["dur"]), 40)
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0)
+    def test_not_sampled(self):
+        """Test requests are not measured when sampling is off"""
+        res = self.client.get(RECIPES_URL)
+
+        self.assertNotIn("Server-Timing", res)
+
+    def test_other_views_not_measured(self):
+        """Test only the views of the API namespaces are measured"""
+        res = self.client.get(reverse("healthz"))
+
+        self.assertNotIn("Server-Timing", res)
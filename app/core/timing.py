@@ -0,0 +1,159 @@
+"""
+Per request timings of the SQL queries, serializers and renderers.
+
+The timings of a sampled request live in a context variable for as long as
+the request is served. Code measures itself with timed(), and the queries
+of every connection are counted by an execute wrapper. Outside a sampled
+request a measurement is a single context variable lookup.
+"""
+
+import contextlib
+import contextvars
+import json
+import logging
+import random
+import threading
+import time
+
+from django.conf import settings
+from rest_framework.fields import empty
+
+
+logger = logging.getLogger(__name__)
+
+current = contextvars.ContextVar("timings", default=None)
+
+
+class RequestTimings:
+    """The durations measured while serving a request, in seconds"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.durations = {}
+        self.queries = 0
+        self.active = set()
+        self.lock = threading.Lock()
+
+    def add(self, name, duration):
+        """Add duration to the total of name"""
+        # async views run queries of a request in several threads at once
+        with self.lock:
+            self.durations[name] = self.durations.get(name, 0) + duration
+
+    def add_query(self, duration):
+        """Count a query that took duration"""
+        with self.lock:
+            self.durations["db"] = self.durations.get("db", 0) + duration
+            self.queries += 1
+
+    def elapsed(self):
+        """Return the seconds since the request started"""
+        return time.perf_counter() - self.start
+
+    def metrics(self):
+        """Return the durations in milliseconds, total last"""
+        metrics = {
+            name: round(self.durations.get(name, 0) * 1000, 3)
+            for name in ("db", "serialize", "render")
+        }
+        metrics["total"] = round(self.elapsed() * 1000, 3)
+        return metrics
+
+
+def sample(namespace):
+    """Return the timings of a new request to namespace if it is sampled"""
+    rate = settings.SERVER_TIMING_SAMPLE_RATE
+    if not rate or (rate < 1 and random.random() >= rate):
+        return None
+    if namespace not in settings.SERVER_TIMING_NAMESPACES:
+        return None
+
+    return RequestTimings()
+
+
+def report(timings, method, path, view, status):
+    """Log the timings of a request and return its Server-Timing header"""
+    metrics = timings.metrics()
+    logger.info(json.dumps({
+        "method": method,
+        "path": path,
+        "view": view,
+        "status": status,
+        "queries": timings.queries,
+        **{f"{name}_ms": duration for name, duration in metrics.items()},
+    }, sort_keys=True))
+    return ", ".join(
+        f'{name};dur={duration}'
+        + (f';desc="{timings.queries} queries"' if name == "db" else "")
+        for name, duration in metrics.items()
+    )
+
+
+@contextlib.contextmanager
+def timed(name):
+    """Add the time spent in the block to name, less its queries"""
+    timings = current.get()
+    # nested serializers are part of the outermost one
+    if timings is None or name in timings.active:
+        yield
+        return
+
+    timings.active.add(name)
+    db = timings.durations.get("db", 0)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        timings.active.discard(name)
+        timings.add(name, elapsed - (timings.durations.get("db", 0) - db))
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper timing the queries of sampled requests"""
+    timings = current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.add_query(time.perf_counter() - start)
+
+
+def attach(sender=None, connection=None, **kwargs):
+    """Time the queries of connection"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class TimedSerializerMixin:
+    """
+    Count the validation, saving and representation of the serializer as
+    serializer time
+    """
+
+    def run_validation(self, data=empty):
+        """Return the validated data"""
+        # like the representation, called for every item of a list
+        if current.get() is None:
+            return super().run_validation(data)
+
+        with timed("serialize"):
+            return super().run_validation(data)
+
+    def save(self, **kwargs):
+        """Create or update the instance, less its queries"""
+        with timed("serialize"):
+            return super().save(**kwargs)
+
+    def to_representation(self, instance):
+        """Return the representation of instance"""
+        # called for every item of a list, so unsampled requests skip the
+        # context manager
+        if current.get() is None:
+            return super().to_representation(instance)
+
+        with timed("serialize"):
+            return super().to_representation(instance)
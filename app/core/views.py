@@ -0,0 +1,158 @@
+"""
+Views for the internal APIs
+"""
+
+import ipaddress
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.views import SpectacularAPIView
+
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core import metrics
+from core.db.pool import all_pools, collect_stats
+from core.health import readiness
+from core.schema import get_artifact
+
+
+def accepts_gzip(header):
+    """Return whether an Accept-Encoding header accepts gzip"""
+    qualities = {}
+    for coding in header.split(","):
+        name, *params = coding.split(";")
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.strip().lower()] = quality
+
+    # x-gzip is an alias of gzip, * stands for codings not listed
+    for name in ("gzip", "x-gzip", "*"):
+        if name in qualities:
+            return qualities[name] > 0
+    return False
+
+
+class DatabasePoolView(APIView):
+    """Statistics of the database connection pools of every worker"""
+
+    permission_classes = [permissions.IsAdminUser]
+
+    @extend_schema(responses=OpenApiTypes.OBJECT)
+    def get(self, request):
+        """Return the published pool statistics"""
+        for pool in all_pools():
+            pool.publish(force=True)
+
+        return Response(collect_stats())
+
+
+class LivenessView(APIView):
+    """Report the process serves requests, without using the database"""
+
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+    throttle_classes = []
+
+    @extend_schema(exclude=True)
+    def get(self, request):
+        """Return that the process is alive"""
+        return Response({"status": "ok"})
+
+
+class ReadinessView(APIView):
+    """Report whether the database answers and is fully migrated"""
+
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+    throttle_classes = []
+
+    @extend_schema(exclude=True)
+    def get(self, request):
+        """Return the database checks, 503 when not ready"""
+        ready, checks = readiness()
+
+        return Response(
+            {"status": "ok" if ready else "unavailable", **checks},
+            status=(
+                status.HTTP_200_OK if ready
+                else status.HTTP_503_SERVICE_UNAVAILABLE
+            ),
+        )
+
+
+class MetricsScraper(permissions.BasePermission):
+    """Allow the addresses of METRICS_ALLOWED_IPS"""
+
+    def has_permission(self, request, view):
+        """Return whether the client address is allowed"""
+        try:
+            address = ipaddress.ip_address(request.META.get("REMOTE_ADDR"))
+        except ValueError:
+            return False
+
+        return any(
+            address in ipaddress.ip_network(network, strict=False)
+            for network in settings.METRICS_ALLOWED_IPS
+        )
+
+
+class MetricsView(APIView):
+    """Metrics of every worker in the Prometheus text format"""
+
+    authentication_classes = []
+    permission_classes = [MetricsScraper]
+    throttle_classes = []
+
+    @extend_schema(exclude=True)
+    def get(self, request):
+        """Return the metrics collected from every worker"""
+        return HttpResponse(
+            metrics.render(metrics.collect()),
+            content_type=metrics.CONTENT_TYPE,
+        )
+
+
+class SchemaView(SpectacularAPIView):
+    """OpenAPI schema served from its pre-built artifacts"""
+
+    def _get_schema_response(self, request):
+        """Return the built schema in the negotiated format"""
+        # translated schemas are generated for each request
+        if request.GET.get("lang"):
+            return super()._get_schema_response(request)
+
+        renderer = request.accepted_renderer
+        artifact = get_artifact(renderer.format)
+        gzipped = accepts_gzip(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        etag = artifact.gzip_etag if gzipped else artifact.etag
+        if etag in parse_etags(request.META.get("HTTP_IF_NONE_MATCH", "")):
+            response = HttpResponseNotModified()
+        else:
+            content_type = renderer.media_type
+            if renderer.charset:
+                content_type = f"{content_type}; charset={renderer.charset}"
+            response = HttpResponse(
+                artifact.gzipped if gzipped else artifact.content,
+                content_type=content_type,
+            )
+            if gzipped:
+                response["Content-Encoding"] = "gzip"
+
+        response["ETag"] = etag
+        # clients revalidate, which the ETag makes cheap
+        response["Cache-Control"] = "no-cache"
+        patch_vary_headers(response, ["Accept", "Accept-Encoding"])
+        return response
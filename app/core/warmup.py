@@ -0,0 +1,72 @@
+"""
+Warm up the application before serving requests.
+
+Servers forking their workers warm up in the parent process, so every
+worker starts with the modules imported, the URL resolver populated, the
+model metadata cached and the OpenAPI schema loaded, sharing that memory
+copy-on-write instead of paying for it on its first requests. Serializers
+are not built: DRF builds the fields of every serializer instance again.
+"""
+
+import time
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.db import connections
+from django.urls import URLResolver, get_resolver
+
+from core.db.pool import close_pools
+from core.schema import load_artifacts
+
+
+@contextmanager
+def timed(timings, name):
+    """Record the seconds the block takes in timings under name"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = time.perf_counter() - start
+
+
+def iter_views(patterns):
+    """Yield the view of every URL pattern, included ones too"""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_views(pattern.url_patterns)
+        else:
+            yield pattern.callback
+
+
+def warm_models(view_classes):
+    """Cache the model metadata serializers and representations read"""
+    for model in apps.get_models():
+        # the relation tree behind related_objects spans every model
+        model._meta.get_fields()
+        model._meta.related_objects
+    for cls in view_classes:
+        for representation in getattr(cls, "representation", {}).values():
+            representation.field_names
+            representation.scalar_fields
+
+
+def warm_up():
+    """Warm up the application, return the seconds each step took"""
+    timings = {}
+    try:
+        with timed(timings, "urls"):
+            resolver = get_resolver()
+            resolver.reverse_dict
+            views = list(iter_views(resolver.url_patterns))
+        with timed(timings, "models"):
+            warm_models(
+                {view.cls for view in views if hasattr(view, "cls")}
+            )
+        with timed(timings, "schema"):
+            load_artifacts()
+    finally:
+        # forked workers must not share the connections of their parent
+        connections.close_all()
+        close_pools()
+
+    return timings
@@ -0,0 +1,149 @@
+"""
+Bulk import and export of recipes
+"""
+
+import json
+from itertools import islice
+
+from django.db import transaction
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import as_serializer_error
+
+from core.db.routers import pin_to_primary
+from core.models import Recipe, Tag, Ingredient
+from recipe.etags import bump_recipes
+from recipe.readers import RecipeRepresentation
+from recipe.serializers import RecipeDetailSerializer
+
+
+class RecipeImporter:
+    """
+    Import recipes from NDJSON lines in fixed size batches.
+
+    Every line is validated with RecipeDetailSerializer and the valid ones
+    are written a batch at a time: one bulk insert of recipes, one lookup
+    and insert of the tag and ingredient names of the whole batch and one
+    bulk insert per through table. Only a single batch is held in memory.
+    """
+
+    batch_size = 500
+
+    def __init__(self, user, context, batch_size=None):
+        self.user = user
+        # a single serializer validates every line so its fields are only
+        # built once
+        self.serializer = RecipeDetailSerializer(context=context)
+        if batch_size is not None:
+            self.batch_size = batch_size
+
+    def run(self, lines):
+        """Import lines and yield one result per non blank line"""
+        batch = []
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+
+            batch.append((number, *self.validate(line)))
+            if len(batch) >= self.batch_size:
+                yield from self.flush(batch)
+                batch = []
+
+        if batch:
+            yield from self.flush(batch)
+
+    def validate(self, line):
+        """Return the validated data of a line and its errors"""
+        try:
+            data = json.loads(line)
+        except ValueError:
+            return None, {"non_field_errors": ["Invalid JSON."]}
+
+        try:
+            return self.serializer.run_validation(data), None
+        except ValidationError as exc:
+            return None, as_serializer_error(exc)
+
+    def flush(self, batch):
+        """Insert the valid entries of batch and yield their results"""
+        recipe_ids = iter(self.insert([
+            data for _, data, errors in batch if errors is None
+        ]))
+
+        for number, _, errors in batch:
+            if errors is None:
+                yield {"line": number, "id": next(recipe_ids)}
+            else:
+                yield {"line": number, "errors": errors}
+
+    @transaction.atomic
+    def insert(self, rows):
+        """Insert validated recipes with their links, return their ids"""
+        if not rows:
+            return []
+
+        recipes = Recipe.objects.bulk_create([
+            Recipe(
+                user=self.user,
+                **{
+                    field: value for field, value in row.items()
+                    if field not in ("tags", "ingredients")
+                },
+            )
+            for row in rows
+        ])
+        self.link(recipes, rows, "tags", Tag)
+        self.link(recipes, rows, "ingredients", Ingredient)
+        # bulk inserts send no signals
+        bump_recipes(self.user.pk)
+        # the response streams past the view, so each batch renews the pin
+        pin_to_primary(self.user.pk)
+
+        return [recipe.id for recipe in recipes]
+
+    def link(self, recipes, rows, relation, model):
+        """Attach the named objects of relation to the inserted recipes"""
+        names = [
+            {item["name"] for item in row.get(relation, [])} for row in rows
+        ]
+        ids = model.objects.get_or_create_by_names(
+            self.user, set().union(*names)
+        )
+        through = getattr(Recipe, relation).through
+        column = f"{model._meta.model_name}_id"
+        through.objects.bulk_create([
+            through(recipe_id=recipe.id, **{column: ids[name]})
+            for recipe, recipe_names in zip(recipes, names)
+            for name in recipe_names
+        ])
+
+
+class RecipeExporter:
+    """
+    Stream every recipe of a user.
+
+    Recipes are read through a server side cursor and the tags and
+    ingredients are fetched a chunk of recipes at a time, so memory stays
+    flat however many recipes the user has. Items are represented like
+    RecipeDetailSerializer does, limited to fields when given.
+    """
+
+    chunk_size = 2000
+
+    def __init__(self, user, fields=None):
+        self.user = user
+        self.fields = fields
+        self.representation = RecipeRepresentation(RecipeDetailSerializer)
+
+    def __iter__(self):
+        """Yield the representation of every recipe, newest first"""
+        recipes = self.representation.values(
+            Recipe.objects.filter(user=self.user).order_by("-id"),
+            self.fields,
+        ).iterator(chunk_size=self.chunk_size)
+        while True:
+            chunk = list(islice(recipes, self.chunk_size))
+            if not chunk:
+                return
+
+            yield from self.representation.represent(chunk, self.fields)
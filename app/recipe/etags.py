@@ -0,0 +1,131 @@
+"""
+Conditional GET support for recipe APIs.
+
+Every user has a collection version covering their recipes, tags and
+ingredients, and every recipe has an object version. A version is a random
+token kept in the cache; changing the data deletes it so the next read
+mints a new one. Strong ETags are derived from these tokens, so a request
+carrying a current ETag is answered with 304 before any query runs.
+
+An ETag is only as consistent as the cache: a process that can't see the
+deletion made by another keeps answering 304 with its stale version, so
+every process must share the cache (see core.checks).
+"""
+
+import hashlib
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import parse_etags, quote_etag
+
+from rest_framework import status
+from rest_framework.response import Response
+
+from core.db.aio import database_sync_to_async
+
+
+def collection_key(user_id):
+    """Return the cache key of the collection version of a user"""
+    return f"recipe:etag:user:{user_id}"
+
+
+def object_key(user_id, model_name, pk):
+    """Return the cache key of the version of an object"""
+    return f"recipe:etag:user:{user_id}:{model_name}:{pk}"
+
+
+def get_version(key):
+    """Return the current version token stored under key"""
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid4().hex, timeout=None)
+        version = cache.get(key)
+
+    return version
+
+
+def bump(*keys):
+    """Invalidate the versions under keys once the transaction commits"""
+    # bumping before the commit would let a reader mint a new version
+    # while still seeing the old rows
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def bump_recipes(user_id, recipe_ids=()):
+    """Invalidate the collection of a user and the versions of recipes"""
+    bump(
+        collection_key(user_id),
+        *(object_key(user_id, "recipe", pk) for pk in recipe_ids),
+    )
+
+
+class ConditionalGetMixin:
+    """Add ETags to GET responses and answer If-None-Match with 304"""
+
+    def get_etag(self, request):
+        """Return the ETag of the current version of the response"""
+        user_id = request.user.pk
+        if self.action == "retrieve":
+            key = object_key(
+                user_id,
+                self.queryset.model._meta.model_name,
+                self.kwargs[self.lookup_url_kwarg or self.lookup_field],
+            )
+        else:
+            key = collection_key(user_id)
+
+        # the representation also depends on the query string and format
+        variant = hashlib.md5(
+            f"{request.get_full_path()}|{request.accepted_media_type}".encode()
+        ).hexdigest()[:16]
+        return quote_etag(f"{get_version(key)}-{variant}")
+
+    def conditional(self, handler, request, *args, **kwargs):
+        """Run handler unless the client already has the current version"""
+        if not settings.RECIPE_CONDITIONAL_GET:
+            return handler(request, *args, **kwargs)
+
+        etag = self.get_etag(request)
+        if etag in parse_etags(request.META.get("HTTP_IF_NONE_MATCH", "")):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+            )
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response["ETag"] = etag
+        return response
+
+    async def aconditional(self, handler, request, *args, **kwargs):
+        """Await handler unless the client already has the current version"""
+        if not settings.RECIPE_CONDITIONAL_GET:
+            return await handler(request, *args, **kwargs)
+
+        etag = await database_sync_to_async(self.get_etag)(request)
+        if etag in parse_etags(request.META.get("HTTP_IF_NONE_MATCH", "")):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+            )
+
+        response = await handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response["ETag"] = etag
+        return response
+
+
+class ConditionalListMixin(ConditionalGetMixin):
+    """Conditional GET for the list action"""
+
+    def list(self, request, *args, **kwargs):
+        """List objects, or 304 when the collection did not change"""
+        return self.conditional(super().list, request, *args, **kwargs)
+
+
+class ConditionalRetrieveMixin(ConditionalGetMixin):
+    """Conditional GET for the retrieve action"""
+
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve an object, or 304 when it did not change"""
+        return self.conditional(super().retrieve, request, *args, **kwargs)
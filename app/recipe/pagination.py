@@ -0,0 +1,161 @@
+"""
+Pagination for recipe APIs
+"""
+
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as Base64Error
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Opaque cursor pagination that seeks on the ordering of the queryset.
+
+    The cursor holds the ordering values of the first or last row of a page
+    and the next page is fetched with a WHERE clause on those values, so
+    every page costs the same index range scan: no OFFSET and no COUNT(*).
+    A primary key tie breaker is appended when the ordering is not unique.
+
+    Pagination is opt in: clients that don't send ``page_size`` keep getting
+    the plain, unpaginated list.
+    """
+
+    page_size = None
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Return a single page of results, or None when not paginated"""
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        position, self.reverse = self.decode_cursor(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            position = self.to_python(queryset, position)
+            queryset = queryset.filter(self.seek(position, self.reverse))
+        if self.reverse:
+            queryset = queryset.reverse()
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if self.reverse:
+            self.page.reverse()
+
+        self.has_next = has_more if not self.reverse else True
+        self.has_previous = position is not None and (
+            has_more if self.reverse else True
+        )
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        """Return the queryset ordering with a unique tie breaker"""
+        ordering = list(queryset.query.order_by) or ["-pk"]
+        fields = [field.lstrip("-") for field in ordering]
+        if "pk" not in fields and "id" not in fields:
+            descending = ordering[-1].startswith("-")
+            ordering.append("-pk" if descending else "pk")
+
+        return tuple(ordering)
+
+    def seek(self, position, reverse):
+        """Build the filter selecting rows after position in the ordering"""
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            name = field.lstrip("-")
+            descending = field.startswith("-") != reverse
+            lookup = f"{name}__lt" if descending else f"{name}__gt"
+            equal = {
+                ordered.lstrip("-"): value
+                for ordered, value in zip(self.ordering[:index], position)
+            }
+            condition |= Q(**equal, **{lookup: position[index]})
+
+        return condition
+
+    def decode_cursor(self, request):
+        """Return the (position, reverse) pair carried by the request"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            position, reverse = cursor["p"], bool(cursor["r"])
+        except (Base64Error, KeyError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or (
+            len(position) != len(self.ordering)
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+        return position, reverse
+
+    def to_python(self, queryset, position):
+        """Convert the cursor position to the types of the ordered fields"""
+        values = []
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip("-")
+            if name in queryset.query.annotations:
+                model_field = queryset.query.annotations[name].output_field
+            elif name == "pk":
+                model_field = queryset.model._meta.pk
+            else:
+                model_field = queryset.model._meta.get_field(name)
+
+            # cursors only hold scalars, and no ordered column is null
+            if value is None or isinstance(value, (dict, list)):
+                raise NotFound(self.invalid_cursor_message)
+            try:
+                values.append(model_field.to_python(value))
+            except ValidationError:
+                raise NotFound(self.invalid_cursor_message)
+
+        return values
+
+    def encode_cursor(self, position, reverse):
+        """Return the page url for a cursor at position"""
+        cursor = json.dumps(
+            {"p": position, "r": int(reverse)},
+            cls=DjangoJSONEncoder,
+            separators=(",", ":"),
+        )
+        encoded = urlsafe_b64encode(cursor.encode("ascii")).decode("ascii")
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded
+        )
+
+    def get_position(self, item):
+        """Return the ordering values of a result item or values() row"""
+        names = [field.lstrip("-") for field in self.ordering]
+        if isinstance(item, dict):
+            return [item["id" if name == "pk" else name] for name in names]
+
+        return [getattr(item, name) for name in names]
+
+    def get_next_link(self):
+        """Return the url of the page after this one"""
+        if not self.has_next or not self.page:
+            return None
+
+        return self.encode_cursor(self.get_position(self.page[-1]), False)
+
+    def get_previous_link(self):
+        """Return the url of the page before this one"""
+        if not self.has_previous or not self.page:
+            return None
+
+        return self.encode_cursor(self.get_position(self.page[0]), True)
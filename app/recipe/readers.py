@@ -0,0 +1,192 @@
+"""
+Read only representation of recipes from values() rows.
+
+Building the representation of a recipe through a serializer creates a
+model instance, its prefetched related objects and a nested serializer
+output per row. For reads the same output is built here from plain
+values() rows and tag and ingredient rows grouped by recipe, which is
+several times faster for long lists.
+"""
+
+import asyncio
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from django.utils.functional import cached_property
+
+from rest_framework.response import Response
+
+from core.db.aio import database_sync_to_async
+from core.models import Recipe
+from core.timing import timed
+
+
+RELATIONS = ("tags", "ingredients")
+
+
+def group_related(recipe_ids, relation):
+    """Return the {id, name} items of relation grouped by recipe id"""
+    descriptor = getattr(Recipe, relation)
+    target = descriptor.field.m2m_reverse_field_name()
+    rows = (
+        descriptor.through.objects.filter(recipe_id__in=recipe_ids)
+        .order_by(f"{target}_id")
+        .values_list("recipe_id", f"{target}_id", f"{target}__name")
+    )
+    grouped = defaultdict(list)
+    for recipe_id, item_id, name in rows:
+        grouped[recipe_id].append({"id": item_id, "name": name})
+
+    return grouped
+
+
+class RecipeRepresentation:
+    """
+    Represent recipes like serializer_class does, from values() rows.
+
+    Tags and ingredients are listed by id, the order the views prefetch
+    them in.
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+
+    @cached_property
+    def field_names(self):
+        """Return the names of the output fields, in output order"""
+        return list(self.serializer_class().fields)
+
+    @cached_property
+    def scalar_fields(self):
+        """Return the serializer fields read from recipe columns"""
+        fields = self.serializer_class().fields
+        return {
+            name: field for name, field in fields.items()
+            if name not in RELATIONS
+        }
+
+    def values(self, queryset, fields=None):
+        """Return queryset as values() rows of the selected scalar fields"""
+        names = [
+            name for name in self.scalar_fields
+            if fields is None or name in fields
+        ]
+        # the id groups related items and, like annotations such as a
+        # search rank, stays available to paginators
+        return queryset.values(
+            *dict.fromkeys(["id", *names, *queryset.query.annotations])
+        )
+
+    def represent(self, rows, fields=None):
+        """Return the representation of the selected fields of every row"""
+        rows = list(rows)
+        if not rows:
+            return []
+
+        names = self.selected_names(fields)
+        ids = [row["id"] for row in rows]
+        related = {
+            relation: group_related(ids, relation)
+            for relation in RELATIONS if relation in names
+        }
+        return self.build(rows, names, related)
+
+    async def arepresent(self, rows, fields=None):
+        """Like represent, loading the related items concurrently"""
+        rows = await database_sync_to_async(list)(rows)
+        if not rows:
+            return []
+
+        names = self.selected_names(fields)
+        ids = [row["id"] for row in rows]
+        relations = [relation for relation in RELATIONS if relation in names]
+        grouped = await asyncio.gather(*(
+            database_sync_to_async(group_related)(ids, relation)
+            for relation in relations
+        ))
+        return self.build(rows, names, dict(zip(relations, grouped)))
+
+    def selected_names(self, fields):
+        """Return the selected output fields, in output order"""
+        return [
+            name for name in self.field_names
+            if fields is None or name in fields
+        ]
+
+    def build(self, rows, names, related):
+        """Return the representation of rows from their related items"""
+        with timed("serialize"):
+            return self.build_items(rows, names, related)
+
+    def build_items(self, rows, names, related):
+        """Return the item of every row"""
+        fields = [
+            (name, related.get(name), self.scalar_fields.get(name))
+            for name in names
+        ]
+
+        return [
+            {
+                name: (
+                    items.get(row["id"], []) if items is not None
+                    else None if row[name] is None
+                    else field.to_representation(row[name])
+                )
+                for name, items, field in fields
+            }
+            for row in rows
+        ]
+
+
+class RepresentationReadMixin:
+    """
+    Serve list and retrieve from the representation of the view set.
+
+    View sets set ``representation`` to a RecipeRepresentation per action.
+    Object permissions are not checked, so the view set must not rely on
+    them for reads.
+    """
+
+    representation = {}
+
+    def get_requested_fields(self):
+        """Return the selected field names, or None for every field"""
+        return None
+
+    def list(self, request, *args, **kwargs):
+        """List objects from values() rows"""
+        representation = self.representation["list"]
+        fields = self.get_requested_fields()
+        rows = representation.values(
+            self.filter_queryset(self.get_queryset()), fields
+        )
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(
+                representation.represent(page, fields)
+            )
+
+        return Response(representation.represent(rows, fields))
+
+    def get_lookup_queryset(self):
+        """Return the queryset of the object looked up by the URL"""
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            return self.filter_queryset(self.get_queryset()).filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        except (TypeError, ValueError, ValidationError):
+            raise Http404
+
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve an object from its values() row"""
+        representation = self.representation["retrieve"]
+        fields = self.get_requested_fields()
+        items = representation.represent(
+            representation.values(self.get_lookup_queryset(), fields), fields
+        )
+        if not items:
+            raise Http404
+
+        return Response(items[0])
@@ -0,0 +1,96 @@
+"""
+Renderers for recipe APIs
+"""
+
+import csv
+import json
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Render a list as newline delimited JSON, one item per line"""
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render data as one JSON document per line"""
+        if data is None:
+            return b""
+
+        items = data if isinstance(data, list) else [data]
+        return b"".join(self.render_line(item) for item in items)
+
+    def render_stream(self, items):
+        """Yield items one encoded line at a time"""
+        for item in items:
+            yield self.render_line(item)
+
+    @staticmethod
+    def render_line(item):
+        """Render a single item as a JSON line"""
+        line = json.dumps(
+            item, cls=JSONEncoder, ensure_ascii=False, separators=(",", ":")
+        )
+        return line.encode("utf-8") + b"\n"
+
+
+class Echo:
+    """File-like object that returns what is written to it"""
+
+    def write(self, value):
+        """Return value instead of buffering it"""
+        return value
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    Render a list of flat objects as CSV with a header row.
+
+    List values, such as nested tags, are written as their names joined
+    by semicolons.
+    """
+
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render data as CSV"""
+        if data is None:
+            return b""
+
+        items = data if isinstance(data, list) else [data]
+        return "".join(self.render_rows(items)).encode(self.charset)
+
+    def render_stream(self, items):
+        """Yield the encoded CSV lines of items"""
+        for line in self.render_rows(items):
+            yield line.encode(self.charset)
+
+    @classmethod
+    def render_rows(cls, items):
+        """Yield the CSV lines of items, starting with the header"""
+        writer = csv.writer(Echo())
+        header = None
+        for item in items:
+            if header is None:
+                header = list(item)
+                yield writer.writerow(header)
+            yield writer.writerow(
+                [cls.render_value(item.get(name)) for name in header]
+            )
+
+    @staticmethod
+    def render_value(value):
+        """Flatten a value to a CSV cell"""
+        if isinstance(value, list):
+            return ";".join(
+                str(item["name"] if isinstance(item, dict) else item)
+                for item in value
+            )
+
+        return value
@@ -0,0 +1,46 @@
+"""
+Replica reads for recipe APIs
+"""
+
+from rest_framework.permissions import SAFE_METHODS
+
+from core.db.routers import is_pinned, pin_to_primary, replica_reads
+
+
+class ReplicaReadMixin:
+    """
+    Serve the replica actions of a view set from a replica.
+
+    A successful write pins its user to the primary for a while, so their
+    next reads see what they just wrote.
+    """
+
+    replica_actions = ("list", "retrieve")
+
+    def initial(self, request, *args, **kwargs):
+        """Flag reads of the request for a replica once authenticated"""
+        super().initial(request, *args, **kwargs)
+        if self.action in self.replica_actions and not is_pinned(
+            request.user.pk
+        ):
+            self._replica_token = replica_reads.set(True)
+
+    def dispatch(self, request, *args, **kwargs):
+        """Clear the replica flag however the request ends"""
+        self._replica_token = None
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self._replica_token is not None:
+                replica_reads.reset(self._replica_token)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """Pin users who wrote to the primary"""
+        if (
+            request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and request.user.is_authenticated
+        ):
+            pin_to_primary(request.user.pk)
+
+        return super().finalize_response(request, response, *args, **kwargs)
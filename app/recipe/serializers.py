@@ -2,11 +2,34 @@
 Serializers for recipe APIs
 """
 
+from django.db import transaction
+
 from rest_framework import serializers
 
 from core.models import Recipe, Tag, Ingredient
+from core.timing import TimedSerializerMixin
+
+
+class UniqueNameMixin:
+    """Reject renaming an object to a name its user already has"""
+
+    def validate_name(self, value):
+        """Check no other object of the user has the name"""
+        if self.instance is not None:
+            others = type(self.instance).objects.filter(
+                user=self.instance.user_id, name=value
+            ).exclude(pk=self.instance.pk)
+            if others.exists():
+                raise serializers.ValidationError(
+                    "An object with this name already exists."
+                )
 
-class IngredientSerializer(serializers.ModelSerializer):
+        return value
+
+
+class IngredientSerializer(TimedSerializerMixin,
+                           UniqueNameMixin,
+                           serializers.ModelSerializer):
     """Serializer for ingredients"""
 
     class Meta: 
@@ -14,7 +37,9 @@ class IngredientSerializer(serializers.ModelSerializer):
         fields = ['id', 'name']
         read_only_fields = ['id']
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(TimedSerializerMixin,
+                    UniqueNameMixin,
+                    serializers.ModelSerializer):
     """Serializer for tags"""
 
     class Meta:
@@ -28,7 +53,7 @@ class TagDetailSerializer(TagSerializer):
     class Meta(TagSerializer.Meta):
         fields = TagSerializer.Meta.fields + ['user']
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for recipes"""
 
     tags = TagSerializer(many=True, required=False)
@@ -39,26 +64,23 @@ class RecipeSerializer(serializers.ModelSerializer):
         fields = ["id", "title", "time_minutes", "price", "link", 'tags', 'ingredients']
         read_only_fields = ["id"]
 
-    def _get_or_create_tags(self, tags, recipe):
-        """Handle getting or creating tags as needed"""
+    def _get_or_create_tags(self, tags):
+        """Handle getting or creating tags as needed, return their ids"""
         auth_user = self.context['request'].user
-        for tag in tags:
-            tag_obj, created = Tag.objects.get_or_create(
-                user=auth_user,
-                **tag
-            )
-            recipe.tags.add(tag_obj)
+        tag_ids = Tag.objects.get_or_create_by_names(
+            auth_user, [tag['name'] for tag in tags]
+        )
+        return tag_ids.values()
 
-    def _get_or_create_ingredients(self, ingredients, recipe):
-        """Handle getting or creating ingredients as needed"""
+    def _get_or_create_ingredients(self, ingredients):
+        """Handle getting or creating ingredients, return their ids"""
         auth_user = self.context['request'].user
-        for ingredients in ingredients:
-            ing_obj, created = Ingredient.objects.get_or_create(
-                user=auth_user,
-                **ingredients
-            )
-            recipe.ingredients.add(ing_obj)
-        
+        ingredient_ids = Ingredient.objects.get_or_create_by_names(
+            auth_user, [ingredient['name'] for ingredient in ingredients]
+        )
+        return ingredient_ids.values()
+
+    @transaction.atomic
     def create(self, validated_data):
         """Create a recipe"""
         # take tags object from validated data and assign to variable tags
@@ -67,30 +89,39 @@ class RecipeSerializer(serializers.ModelSerializer):
         ingredients = validated_data.pop('ingredients', [])
         # create a new recipe object with the validated data
         recipe = Recipe.objects.create(**validated_data)
-        self._get_or_create_tags(tags, recipe)
-        self._get_or_create_ingredients(ingredients, recipe)
+        recipe.tags.add(*self._get_or_create_tags(tags))
+        recipe.ingredients.add(*self._get_or_create_ingredients(ingredients))
 
         return recipe
-    
+
     # update method is required when we want to update a nested serializer
+    @transaction.atomic
     def update(self, instance, validated_data):
-        """Update a recipe"""
+        """Update a recipe, writing only what changed"""
         tags = validated_data.pop('tags', None)
         ingredients = validated_data.pop('ingredients', None)
-        if(tags is not None):
-            instance.tags.clear()
-            self._get_or_create_tags(tags, instance)
-        
-        if(ingredients is not None):
-            instance.ingredients.clear()
-            self._get_or_create_ingredients(ingredients, instance)
-
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        
-        instance.save()
+        # set() diffs against the current links and only inserts the added
+        # and deletes the removed rows of the through table
+        if tags is not None:
+            instance.tags.set(self._get_or_create_tags(tags))
+
+        if ingredients is not None:
+            instance.ingredients.set(
+                self._get_or_create_ingredients(ingredients)
+            )
+
+        changed = [
+            attr for attr, value in validated_data.items()
+            if getattr(instance, attr) != value
+        ]
+        for attr in changed:
+            setattr(instance, attr, validated_data[attr])
+
+        if changed:
+            instance.save(update_fields=changed)
         return instance
 
+
 class RecipeDetailSerializer(RecipeSerializer):
     """Serializer for recipe detail view"""
 
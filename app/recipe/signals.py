@@ -0,0 +1,46 @@
+"""
+Signal handlers invalidating the ETag versions of recipe APIs
+"""
+
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+
+from core.models import Recipe, Tag, Ingredient
+from recipe.etags import bump_recipes
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def recipe_changed(sender, instance, **kwargs):
+    """Invalidate a saved or deleted recipe and its collection"""
+    bump_recipes(instance.user_id, [instance.pk])
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def recipe_attr_changed(sender, instance, **kwargs):
+    """Invalidate the recipes showing a changed tag or ingredient"""
+    # handled before a delete so the links to the recipes still exist
+    recipe_ids = []
+    if not kwargs.get("created"):
+        recipe_ids = instance.recipe_set.values_list("pk", flat=True)
+    bump_recipes(instance.user_id, recipe_ids)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def recipe_links_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Invalidate recipes whose tags or ingredients were changed"""
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+
+    if not reverse:
+        recipe_ids = [instance.pk]
+    elif action == "pre_clear":
+        recipe_ids = instance.recipe_set.values_list("pk", flat=True)
+    else:
+        recipe_ids = pk_set
+    bump_recipes(instance.user_id, recipe_ids)
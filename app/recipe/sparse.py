@@ -0,0 +1,89 @@
+"""
+Sparse fieldsets for recipe APIs.
+
+Reads accept ``?fields=id,title`` to select the fields of each item. The
+serializer only keeps the selected fields, the queryset only loads their
+columns and relations that were not selected are not fetched at all.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+
+from rest_framework.exceptions import ValidationError
+
+
+class SparseFieldsMixin:
+    """Let reads select the fields of their response with ?fields="""
+
+    fields_query_param = "fields"
+    sparse_actions = ("list", "retrieve")
+
+    def get_available_fields(self):
+        """Return the names of every field of the response, in order"""
+        serializer_class = self.get_serializer_class()
+        return list(
+            serializer_class(context=self.get_serializer_context()).fields
+        )
+
+    def get_requested_fields(self):
+        """Return the selected field names, or None for every field"""
+        if not hasattr(self, "_requested_fields"):
+            self._requested_fields = self.parse_requested_fields()
+
+        return self._requested_fields
+
+    def parse_requested_fields(self):
+        """Parse and check the fields query parameter"""
+        param = self.request.query_params.get(self.fields_query_param)
+        if self.action not in self.sparse_actions or not param:
+            return None
+
+        names = {name.strip() for name in param.split(",") if name.strip()}
+        available = self.get_available_fields()
+        unknown = sorted(names.difference(available))
+        if unknown:
+            raise ValidationError({
+                self.fields_query_param:
+                    f"Unknown fields: {', '.join(unknown)}.",
+            })
+
+        # items keep the field order of the full representation
+        return [name for name in available if name in names]
+
+    def get_serializer(self, *args, **kwargs):
+        """Return a serializer pruned to the selected fields"""
+        serializer = super().get_serializer(*args, **kwargs)
+        fields = self.get_requested_fields()
+        if fields is not None:
+            target = getattr(serializer, "child", serializer)
+            for name in set(target.fields).difference(fields):
+                target.fields.pop(name)
+
+        return serializer
+
+    def only_fields(self, queryset):
+        """Limit queryset to the columns the selected fields need"""
+        fields = self.get_requested_fields()
+        if fields is None:
+            return queryset
+
+        serializer = self.get_serializer_class()(
+            context=self.get_serializer_context()
+        )
+        opts = queryset.model._meta
+        names = [serializer.fields[name].source.split(".")[0]
+                 for name in fields]
+        # ordering columns are read by paginators building their cursors
+        names += [
+            field.lstrip("-") for field in queryset.query.order_by
+            if isinstance(field, str)
+        ]
+        columns = {opts.pk.attname}
+        for name in names:
+            try:
+                field = opts.get_field(name)
+            except FieldDoesNotExist:
+                continue
+            if field.concrete and not field.many_to_many:
+                columns.add(field.attname)
+
+        return queryset.only(*columns)
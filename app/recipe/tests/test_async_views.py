@@ -0,0 +1,162 @@
+"""
+Tests for the async recipe view sets
+"""
+
+import asyncio
+import threading
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TransactionTestCase, override_settings
+
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.models import Recipe, Tag, Ingredient
+from recipe import async_views, readers, views
+
+
+def call(viewset, actions, user, path="/", method="get", data=None,
+         headers=None, **kwargs):
+    """Serve a request through viewset and return the rendered response"""
+    request = getattr(APIRequestFactory(), method)(
+        path, data, format="json", **(headers or {})
+    )
+    force_authenticate(request, user)
+    response = viewset.as_view(actions)(request, **kwargs)
+    if asyncio.iscoroutine(response):
+        response = asyncio.run(response)
+
+    return response.render()
+
+
+class AsyncViewSetTests(TransactionTestCase):
+    """Test the async view sets answer like the synchronous ones"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            "user@example.com", "testpass123"
+        )
+        tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ("Vegan", "Dinner")
+        ]
+        ingredient = Ingredient.objects.create(user=self.user, name="Kale")
+        for i in range(3):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=f"Recipe {i}",
+                time_minutes=i,
+                price=Decimal("5.25"),
+            )
+            recipe.tags.add(*tags[i:])
+            recipe.ingredients.add(ingredient)
+        self.recipe = recipe
+
+    def assertSameResponse(self, actions, path="/", **kwargs):
+        """Check both view sets render the same response"""
+        expected = call(
+            views.RecipeViewSet, actions, self.user, path, **kwargs
+        )
+        cache.clear()
+        actual = call(
+            async_views.RecipeViewSet, actions, self.user, path, **kwargs
+        )
+
+        self.assertEqual(actual.status_code, expected.status_code)
+        self.assertEqual(actual.content, expected.content)
+        self.assertEqual(
+            actual.get(views.SEARCH_TRUNCATED_HEADER),
+            expected.get(views.SEARCH_TRUNCATED_HEADER),
+        )
+
+    def test_views_are_coroutine_functions(self):
+        """Test Django awaits the async views instead of wrapping them"""
+        view = async_views.RecipeViewSet.as_view({"get": "list"})
+
+        self.assertTrue(asyncio.iscoroutinefunction(view))
+        self.assertTrue(view.csrf_exempt)
+
+    def test_list(self):
+        """Test recipes list like the synchronous view set lists them"""
+        self.assertSameResponse({"get": "list"})
+        self.assertSameResponse({"get": "list"}, "/?page_size=2")
+        self.assertSameResponse({"get": "list"}, "/?fields=id,tags")
+
+    @override_settings(RECIPE_SEARCH_CANDIDATES=2)
+    def test_search(self):
+        """Test searches are flagged like the synchronous view set does"""
+        self.assertSameResponse({"get": "list"}, "/?q=recipe")
+        self.assertSameResponse({"get": "list"}, "/?q=recipe&page_size=1")
+        self.assertSameResponse({"get": "list"}, "/?q=missing")
+
+    def test_retrieve(self):
+        """Test recipes are retrieved like the synchronous view set does"""
+        self.assertSameResponse({"get": "retrieve"}, pk=self.recipe.id)
+        self.assertSameResponse({"get": "retrieve"}, pk=0)
+
+    def test_not_modified(self):
+        """Test a current ETag is answered with 304"""
+        res = call(async_views.RecipeViewSet, {"get": "list"}, self.user)
+        res = call(
+            async_views.RecipeViewSet,
+            {"get": "list"},
+            self.user,
+            headers={"HTTP_IF_NONE_MATCH": res["ETag"]},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_related_items_loaded_concurrently(self):
+        """Test tags and ingredients load at the same time"""
+        # each load waits for the other, so loading one after the other
+        # breaks the barrier
+        barrier = threading.Barrier(2, timeout=5)
+        group_related = readers.group_related
+
+        def wait_for_other(*args):
+            barrier.wait()
+            return group_related(*args)
+
+        with patch("recipe.readers.group_related", wait_for_other):
+            res = call(async_views.RecipeViewSet, {"get": "list"}, self.user)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data[0]["ingredients"]), 1)
+
+    def test_writes(self):
+        """Test other actions run the synchronous handlers"""
+        res = call(
+            async_views.RecipeViewSet,
+            {"post": "create"},
+            self.user,
+            method="post",
+            data={"title": "New", "time_minutes": 5, "price": "1.00"},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Recipe.objects.filter(title="New").exists())
+
+    def test_attribute_lists(self):
+        """Test tags and ingredients list like the synchronous view sets"""
+        for name in ("TagViewSet", "IngredientViewSet"):
+            for path in ("/", "/?page_size=1"):
+                expected = call(
+                    getattr(views, name), {"get": "list"}, self.user, path
+                )
+                cache.clear()
+                actual = call(
+                    getattr(async_views, name), {"get": "list"}, self.user,
+                    path,
+                )
+
+                self.assertEqual(actual.content, expected.content)
+
+    def test_unauthenticated(self):
+        """Test authentication is required"""
+        res = call(async_views.TagViewSet, {"get": "list"}, None)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,185 @@
+"""
+Tests for conditional GET on the recipe APIs
+"""
+
+import json
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.checks import Error
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.checks import check_conditional_get_cache
+from core.models import Recipe, Tag
+
+
+RECIPES_URL = reverse("recipe:recipe-list")
+TAGS_URL = reverse("recipe:tag-list")
+IMPORT_URL = reverse("recipe:recipe-import")
+
+
+def detail_url(recipe_id):
+    """Create and return a recipe detail url"""
+    return reverse("recipe:recipe-detail", args=[recipe_id])
+
+
+class ConditionalGetTests(TestCase):
+    """Test ETags and If-None-Match on the recipe APIs"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            "user@example.com", "testpass123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title="Soup",
+            time_minutes=10,
+            price=Decimal("5.25"),
+        )
+
+    def write(self, method, url, payload=None, **kwargs):
+        """Send a write request and run its on commit callbacks"""
+        with self.captureOnCommitCallbacks(execute=True):
+            res = getattr(self.client, method)(
+                url, payload, format="json", **kwargs
+            )
+        self.assertLess(res.status_code, 300)
+
+        return res
+
+    def assertNotModified(self, url, etag):
+        """Check url answers 304 for etag without querying the database"""
+        with self.assertNumQueries(0):
+            res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+
+    def assertModified(self, url, etag):
+        """Check url answers 200 with a new ETag for etag"""
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
+    def test_list_not_modified(self):
+        """Test a current list ETag is answered with 304"""
+        etag = self.client.get(RECIPES_URL)["ETag"]
+
+        self.assertNotModified(RECIPES_URL, etag)
+
+    def test_detail_not_modified(self):
+        """Test a current detail ETag is answered with 304"""
+        url = detail_url(self.recipe.id)
+        etag = self.client.get(url)["ETag"]
+
+        self.assertNotModified(url, etag)
+
+    def test_etag_depends_on_query(self):
+        """Test different query strings get different ETags"""
+        etag = self.client.get(RECIPES_URL)["ETag"]
+
+        res = self.client.get(
+            RECIPES_URL, {"page_size": 1}, HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_create_changes_list(self):
+        """Test creating a recipe changes the list ETag"""
+        etag = self.client.get(RECIPES_URL)["ETag"]
+
+        self.write("post", RECIPES_URL, {
+            "title": "Stew", "time_minutes": 5, "price": "1.00",
+        })
+
+        self.assertModified(RECIPES_URL, etag)
+
+    def test_update_changes_detail_only_for_that_recipe(self):
+        """Test updating a recipe changes its ETag, not other recipes'"""
+        other = Recipe.objects.create(
+            user=self.user, title="Pie", time_minutes=5, price=Decimal("1")
+        )
+        url = detail_url(self.recipe.id)
+        etag = self.client.get(url)["ETag"]
+        other_etag = self.client.get(detail_url(other.id))["ETag"]
+
+        self.write("patch", url, {"tags": [{"name": "Lunch"}]})
+
+        self.assertModified(url, etag)
+        self.assertNotModified(detail_url(other.id), other_etag)
+
+    def test_tag_rename_changes_recipes(self):
+        """Test renaming a tag changes the recipes showing it"""
+        tag = Tag.objects.create(user=self.user, name="Lunch")
+        self.recipe.tags.add(tag)
+        url = detail_url(self.recipe.id)
+        etag = self.client.get(url)["ETag"]
+        tags_etag = self.client.get(TAGS_URL)["ETag"]
+
+        self.write(
+            "patch",
+            reverse("recipe:tag-detail", args=[tag.id]),
+            {"name": "Brunch"},
+        )
+
+        self.assertModified(url, etag)
+        self.assertModified(TAGS_URL, tags_etag)
+
+    def test_import_changes_list(self):
+        """Test importing recipes changes the list ETag"""
+        etag = self.client.get(RECIPES_URL)["ETag"]
+        body = json.dumps({
+            "title": "Stew", "time_minutes": 5, "price": "1.00",
+        })
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(
+                IMPORT_URL, body, content_type="application/x-ndjson"
+            )
+            b"".join(res.streaming_content)
+
+        self.assertModified(RECIPES_URL, etag)
+
+    def test_etags_are_per_user(self):
+        """Test another user's ETag does not match"""
+        etag = self.client.get(RECIPES_URL)["ETag"]
+        other = get_user_model().objects.create_user("o@example.com", "pw")
+        self.client.force_authenticate(other)
+
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(RECIPE_CONDITIONAL_GET=False)
+    def test_disabled(self):
+        """Test no ETag is sent and If-None-Match is ignored when disabled"""
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH="*")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn("ETag", res)
+
+    @override_settings(CACHES={"default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }})
+    def test_check_needs_shared_cache(self):
+        """Test the deploy check fails on a cache local to a process"""
+        errors = check_conditional_get_cache(None)
+
+        self.assertEqual([error.id for error in errors], ["core.E001"])
+        self.assertIsInstance(errors[0], Error)
+        with override_settings(CACHES={"default": {
+            "BACKEND": "django.core.cache.backends.memcached."
+                       "PyMemcacheCache",
+        }}):
+            self.assertEqual(check_conditional_get_cache(None), [])
+        with override_settings(RECIPE_CONDITIONAL_GET=False):
+            self.assertEqual(check_conditional_get_cache(None), [])
@@ -0,0 +1,80 @@
+"""
+Tests for MessagePack content negotiation on the recipe API
+"""
+
+from decimal import Decimal
+
+import msgpack
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+
+
+RECIPES_URL = reverse("recipe:recipe-list")
+MSGPACK = "application/msgpack"
+
+
+class MessagePackApiTests(TestCase):
+    """Test the recipe API speaks MessagePack when asked to"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "user@example.com", "testpass123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_as_msgpack(self):
+        """Test Accept selects MessagePack with the same values as JSON"""
+        recipe = Recipe.objects.create(
+            user=self.user, title="Soup", time_minutes=5, price=Decimal("2")
+        )
+        recipe.tags.add(Tag.objects.create(user=self.user, name="Lunch"))
+
+        res = self.client.get(RECIPES_URL, HTTP_ACCEPT=MSGPACK)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], MSGPACK)
+        self.assertEqual(
+            msgpack.unpackb(res.content), self.client.get(RECIPES_URL).json()
+        )
+
+    def test_json_stays_default(self):
+        """Test clients that accept anything still get JSON"""
+        res = self.client.get(RECIPES_URL, HTTP_ACCEPT="*/*")
+
+        self.assertEqual(res["Content-Type"], "application/json")
+
+    def test_create_from_msgpack(self):
+        """Test a MessagePack body creates a recipe with nested tags"""
+        payload = {
+            "title": "Stew",
+            "time_minutes": 30,
+            "price": "4.50",
+            "tags": [{"name": "Dinner"}],
+        }
+
+        res = self.client.post(
+            RECIPES_URL,
+            msgpack.packb(payload),
+            content_type=MSGPACK,
+            HTTP_ACCEPT=MSGPACK,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        data = msgpack.unpackb(res.content)
+        recipe = Recipe.objects.get(id=data["id"])
+        self.assertEqual(recipe.price, Decimal("4.50"))
+        self.assertEqual(data["tags"][0]["name"], "Dinner")
+
+    def test_malformed_body(self):
+        """Test a malformed MessagePack body is rejected"""
+        res = self.client.post(RECIPES_URL, b"\xc1", content_type=MSGPACK)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,138 @@
+"""
+Tests for keyset pagination of the recipe APIs
+"""
+
+import json
+from base64 import urlsafe_b64encode
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+
+
+RECIPES_URL = reverse("recipe:recipe-list")
+TAGS_URL = reverse("recipe:tag-list")
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe"""
+    defaults = {
+        "title": "Sample Recipe",
+        "time_minutes": 10,
+        "price": Decimal("5.25"),
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class KeysetPaginationTests(TestCase):
+    """Test paginating the recipe APIs with cursors"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "user@example.com", "testpass123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def walk(self, url, link="next"):
+        """Follow the pages from url and return the ids of every page"""
+        pages = []
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            pages.append([item["id"] for item in res.data["results"]])
+            url = res.data[link]
+
+        return pages
+
+    def test_unpaginated_by_default(self):
+        """Test the list is a plain list when no page size is requested"""
+        create_recipe(self.user)
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(res.data, list)
+
+    def test_recipe_pages(self):
+        """Test walking forward through recipes returns every recipe once"""
+        recipes = [create_recipe(self.user) for _ in range(5)]
+        create_recipe(
+            get_user_model().objects.create_user("other@example.com", "pass")
+        )
+
+        pages = self.walk(f"{RECIPES_URL}?page_size=2")
+
+        expected = sorted((r.id for r in recipes), reverse=True)
+        self.assertEqual(pages, [expected[:2], expected[2:4], expected[4:]])
+
+    def test_recipe_previous_pages(self):
+        """Test walking back from the last page returns the same pages"""
+        for _ in range(5):
+            create_recipe(self.user)
+        forward = self.walk(f"{RECIPES_URL}?page_size=2")
+        res = self.client.get(f"{RECIPES_URL}?page_size=2")
+        while res.data["next"]:
+            res = self.client.get(res.data["next"])
+
+        backward = self.walk(res.data["previous"], link="previous")
+
+        self.assertEqual(backward, forward[-2::-1])
+
+    def test_tag_pages(self):
+        """Test walking through tags follows the name ordering"""
+        tags = [Tag.objects.create(user=self.user, name=n) for n in "bdcea"]
+
+        pages = self.walk(f"{TAGS_URL}?page_size=2")
+
+        expected = [t.id for t in sorted(tags, key=lambda t: t.name)][::-1]
+        self.assertEqual(pages, [expected[:2], expected[2:4], expected[4:]])
+
+    def test_page_query_does_not_offset_or_count(self):
+        """Test a deep page is fetched with a seek, not OFFSET or COUNT"""
+        for _ in range(5):
+            create_recipe(self.user)
+        res = self.client.get(f"{RECIPES_URL}?page_size=2")
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(res.data["next"])
+
+        sql = " ".join(q["sql"] for q in ctx.captured_queries).upper()
+        self.assertNotIn("OFFSET", sql)
+        self.assertNotIn("COUNT(", sql)
+
+    def test_invalid_cursor(self):
+        """Test a tampered cursor returns not found"""
+        res = self.client.get(f"{RECIPES_URL}?page_size=2&cursor=bogus")
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_tampered_cursor_positions(self):
+        """Test cursors with values of the wrong type return not found"""
+        for url, params, position in (
+            (RECIPES_URL, {}, [{"x": 1}]),
+            (RECIPES_URL, {}, [None]),
+            (RECIPES_URL, {}, ["one"]),
+            (TAGS_URL, {}, [["Vegan"], 1]),
+            (RECIPES_URL, {"q": "soup"}, [{"x": 1}, 1]),
+            (RECIPES_URL, {"q": "soup"}, ["high", 1]),
+        ):
+            cursor = urlsafe_b64encode(
+                json.dumps({"p": position, "r": 0}).encode()
+            ).decode()
+
+            res = self.client.get(
+                url, {**params, "page_size": 2, "cursor": cursor}
+            )
+
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,113 @@
+"""
+Tests for the SQL query budget of the recipe APIs
+"""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+from recipe import views
+
+
+RECIPES_URL = reverse("recipe:recipe-list")
+TAGS_URL = reverse("recipe:tag-list")
+INGREDIENTS_URL = reverse("recipe:ingredient-list")
+
+
+def create_recipes(user, count, attrs_per_recipe=3):
+    """Create recipes that each have their own tags and ingredients"""
+    recipes = []
+    for i in range(count):
+        recipe = Recipe.objects.create(
+            user=user,
+            title=f"Recipe {i}",
+            time_minutes=10,
+            price=Decimal("5.25"),
+        )
+        for j in range(attrs_per_recipe):
+            name = f"{recipe.id}-{j}"
+            recipe.tags.add(Tag.objects.create(user=user, name=name))
+            recipe.ingredients.add(
+                Ingredient.objects.create(user=user, name=name)
+            )
+        recipes.append(recipe)
+
+    return recipes
+
+
+class QueryBudgetTests(TestCase):
+    """Test read actions stay within their query budget"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "user@example.com", "testpass123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def count_queries(self, url):
+        """Request url and return the number of queries it issued"""
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return len(ctx.captured_queries)
+
+    def assertWithinBudget(self, url, budget, grow):
+        """Check the query count is within budget and independent of rows"""
+        grow(1)
+        small = self.count_queries(url)
+        grow(25)
+        large = self.count_queries(url)
+
+        self.assertLessEqual(small, budget)
+        self.assertEqual(small, large)
+
+    def test_recipe_list_budget(self):
+        """Test listing recipes uses a fixed number of queries"""
+        budget = views.RecipeViewSet.query_budget["list"]
+
+        self.assertWithinBudget(
+            RECIPES_URL, budget, lambda n: create_recipes(self.user, n)
+        )
+
+    def test_recipe_detail_budget(self):
+        """Test retrieving a recipe uses a fixed number of queries"""
+        budget = views.RecipeViewSet.query_budget["retrieve"]
+        recipe = create_recipes(self.user, 1, attrs_per_recipe=1)[0]
+        url = reverse("recipe:recipe-detail", args=[recipe.id])
+        small = self.count_queries(url)
+
+        for i in range(25):
+            recipe.tags.add(Tag.objects.create(user=self.user, name=f"X{i}"))
+            recipe.ingredients.add(
+                Ingredient.objects.create(user=self.user, name=f"X{i}")
+            )
+        large = self.count_queries(url)
+
+        self.assertLessEqual(small, budget)
+        self.assertEqual(small, large)
+
+    def test_tag_list_budget(self):
+        """Test listing tags uses a fixed number of queries"""
+        budget = views.TagViewSet.query_budget["list"]
+
+        self.assertWithinBudget(
+            TAGS_URL, budget, lambda n: create_recipes(self.user, n)
+        )
+
+    def test_ingredient_list_budget(self):
+        """Test listing ingredients uses a fixed number of queries"""
+        budget = views.IngredientViewSet.query_budget["list"]
+
+        self.assertWithinBudget(
+            INGREDIENTS_URL, budget, lambda n: create_recipes(self.user, n)
+        )
@@ -0,0 +1,114 @@
+"""
+Tests for the read only recipe representation
+"""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
+
+
+RECIPES_URL = reverse("recipe:recipe-list")
+
+
+def detail_url(recipe_id):
+    """Create and return a recipe detail url"""
+    return reverse("recipe:recipe-detail", args=[recipe_id])
+
+
+def serialized(serializer_class, queryset, **kwargs):
+    """Render queryset through serializer_class, related objects by id"""
+    queryset = queryset.prefetch_related(
+        Prefetch("tags", Tag.objects.order_by("id")),
+        Prefetch("ingredients", Ingredient.objects.order_by("id")),
+    )
+    return JSONRenderer().render(serializer_class(queryset, **kwargs).data)
+
+
+class RecipeRepresentationTests(TestCase):
+    """Test reads render exactly like the recipe serializers"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "user@example.com", "testpass123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ("Vegan", "Dinner", "Ünïcode")
+        ]
+        ingredient = Ingredient.objects.create(user=self.user, name="Kale")
+        for i, price in enumerate(("5.25", "0.10", "12.00")):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=f"Recipe {i}",
+                time_minutes=i,
+                price=Decimal(price),
+                link="https://example.com" if i else "",
+                description=f"Description {i}",
+            )
+            recipe.tags.add(*tags[i:][::-1])
+            if i:
+                recipe.ingredients.add(ingredient)
+
+    def test_list_identical(self):
+        """Test the list renders the bytes RecipeSerializer renders"""
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.content,
+            serialized(
+                RecipeSerializer, Recipe.objects.order_by("-id"), many=True
+            ),
+        )
+
+    def test_detail_identical(self):
+        """Test the detail renders the bytes RecipeDetailSerializer renders"""
+        for recipe in Recipe.objects.all():
+            res = self.client.get(detail_url(recipe.id))
+
+            self.assertEqual(
+                res.content,
+                serialized(
+                    RecipeDetailSerializer,
+                    Recipe.objects.filter(id=recipe.id),
+                    many=True,
+                )[1:-1],
+            )
+
+    def test_detail_not_found(self):
+        """Test other users' and unknown recipes are not found"""
+        other = get_user_model().objects.create_user("o@example.com", "pw")
+        recipe = Recipe.objects.create(
+            user=other, title="Other", time_minutes=1, price=Decimal("1")
+        )
+
+        for recipe_id in (recipe.id, 0, "x"):
+            res = self.client.get(detail_url(recipe_id))
+
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_paginated_search(self):
+        """Test search results page through rows seeking on their rank"""
+        res = self.client.get(RECIPES_URL, {"q": "recipe", "page_size": 2})
+        seen = [item["id"] for item in res.data["results"]]
+        res = self.client.get(res.data["next"])
+        seen += [item["id"] for item in res.data["results"]]
+
+        self.assertEqual(
+            sorted(seen),
+            sorted(Recipe.objects.values_list("id", flat=True)),
+        )
+        self.assertNotIn("rank", res.data["results"][0])
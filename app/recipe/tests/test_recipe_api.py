@@ -3,7 +3,9 @@
 from decimal import Decimal
 from django.contrib.auth import get_user_model
 from django.urls import reverse
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.forms.models import model_to_dict
 
 from rest_framework import status
@@ -12,6 +14,7 @@ from rest_framework.test import APIClient
 from core.models import Recipe, Tag, Ingredient
 
 from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
+from recipe.views import SEARCH_TRUNCATED_HEADER
 
 
 RECIPES_URL = reverse("recipe:recipe-list")
@@ -401,4 +404,210 @@ class PrivateRecipeAPITests(TestCase):
         res = self.client.patch(url, payload, format='json')
 
         self.assertTrue(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(recipe.ingredients.count(), 0)
\ No newline at end of file
+        self.assertEqual(recipe.ingredients.count(), 0)
+
+    def test_create_recipe_nested_queries_constant(self):
+        """Test nested tags and ingredients are written in bulk"""
+        Ingredient.objects.create(user=self.user, name="Ingredient 0")
+
+        def post(count):
+            payload = {
+                'title': 'Stew',
+                'time_minutes': 60,
+                'price': Decimal('4.50'),
+                'tags': [{'name': f'Tag {i}'} for i in range(count)],
+                'ingredients': [
+                    {'name': f'Ingredient {i}'} for i in range(count)
+                ],
+            }
+            with CaptureQueriesContext(connection) as ctx:
+                res = self.client.post(RECIPES_URL, payload, format='json')
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(post(2), post(30))
+        recipe = Recipe.objects.filter(user=self.user).latest('id')
+        self.assertEqual(recipe.ingredients.count(), 30)
+        self.assertEqual(
+            Ingredient.objects.filter(user=self.user).count(), 30
+        )
+
+    def test_noop_patch_issues_no_writes(self):
+        """Test a patch that changes nothing does not write"""
+        recipe = create_recipe(user=self.user, title="Soup")
+        recipe.tags.add(Tag.objects.create(user=self.user, name="Lunch"))
+        recipe.ingredients.add(
+            Ingredient.objects.create(user=self.user, name="Salt")
+        )
+        payload = {
+            'title': 'Soup',
+            'tags': [{'name': 'Lunch'}],
+            'ingredients': [{'name': 'Salt'}],
+        }
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.patch(
+                detail_url(recipe.id), payload, format='json'
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        writes = [
+            q['sql'] for q in ctx.captured_queries
+            if q['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))
+        ]
+        self.assertEqual(writes, [])
+
+    def test_patch_writes_only_the_difference(self):
+        """Test a patch only updates changed fields and links"""
+        recipe = create_recipe(user=self.user, title="Soup")
+        lunch = Tag.objects.create(user=self.user, name="Lunch")
+        dinner = Tag.objects.create(user=self.user, name="Dinner")
+        recipe.tags.add(lunch, dinner)
+        payload = {
+            'title': 'Broth',
+            'tags': [{'name': 'Lunch'}, {'name': 'Vegan'}],
+        }
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.patch(
+                detail_url(recipe.id), payload, format='json'
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        writes = [
+            q['sql'] for q in ctx.captured_queries
+            if q['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))
+        ]
+        # new tag, its link, the removed link and the title
+        self.assertEqual(len(writes), 4)
+        self.assertTrue(writes[-1].startswith('UPDATE "core_recipe"'))
+        self.assertNotIn('"link"', writes[-1])
+        self.assertEqual(
+            set(recipe.tags.values_list('name', flat=True)),
+            {'Lunch', 'Vegan'},
+        )
+
+    def test_filter_by_tags(self):
+        """Test filtering recipes by any of the given tags"""
+        r1 = create_recipe(user=self.user, title='Thai Curry')
+        r2 = create_recipe(user=self.user, title='Tahini')
+        r3 = create_recipe(user=self.user, title='Fish and chips')
+        vegan = Tag.objects.create(user=self.user, name='Vegan')
+        vegetarian = Tag.objects.create(user=self.user, name='Vegetarian')
+        r1.tags.add(vegan)
+        r2.tags.add(vegan, vegetarian)
+
+        res = self.client.get(
+            RECIPES_URL, {'tags': f'{vegan.id},{vegetarian.id}'}
+        )
+
+        ids = [recipe['id'] for recipe in res.data]
+        self.assertEqual(ids, [r2.id, r1.id])
+        self.assertNotIn(r3.id, ids)
+
+    def test_filter_by_all_tags(self):
+        """Test filtering recipes that have all of the given tags"""
+        r1 = create_recipe(user=self.user, title='Thai Curry')
+        r2 = create_recipe(user=self.user, title='Tahini')
+        vegan = Tag.objects.create(user=self.user, name='Vegan')
+        vegetarian = Tag.objects.create(user=self.user, name='Vegetarian')
+        r1.tags.add(vegan)
+        r2.tags.add(vegan, vegetarian)
+
+        res = self.client.get(
+            RECIPES_URL,
+            {'tags': f'{vegan.id},{vegetarian.id}', 'match': 'all'},
+        )
+
+        self.assertEqual([recipe['id'] for recipe in res.data], [r2.id])
+
+    def test_filter_by_tags_and_ingredients(self):
+        """Test tag and ingredient filters apply together"""
+        r1 = create_recipe(user=self.user, title='Posh Beans on Toast')
+        r2 = create_recipe(user=self.user, title='Chicken Cacciatore')
+        beans = Ingredient.objects.create(user=self.user, name='Beans')
+        dinner = Tag.objects.create(user=self.user, name='Dinner')
+        r1.ingredients.add(beans)
+        r1.tags.add(dinner)
+        r2.ingredients.add(beans)
+
+        res = self.client.get(
+            RECIPES_URL, {'tags': dinner.id, 'ingredients': beans.id}
+        )
+
+        self.assertEqual([recipe['id'] for recipe in res.data], [r1.id])
+
+    def test_filter_invalid_ids(self):
+        """Test filtering with ids that are not integers is rejected"""
+        res = self.client.get(RECIPES_URL, {'tags': '1,abc'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_recipes(self):
+        """Test searching ranks title matches above description matches"""
+        in_description = create_recipe(
+            user=self.user, title='Stew', description='Slow cooked lentils'
+        )
+        in_title = create_recipe(
+            user=self.user, title='Lentil soup', description='Quick'
+        )
+        create_recipe(user=self.user, title='Pancakes', description='Sweet')
+
+        res = self.client.get(RECIPES_URL, {'q': 'lentil'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [recipe['id'] for recipe in res.data],
+            [in_title.id, in_description.id],
+        )
+        self.assertNotIn(SEARCH_TRUNCATED_HEADER, res)
+
+    @override_settings(RECIPE_SEARCH_CANDIDATES=2)
+    def test_search_ranks_recent_matches(self):
+        """Test only the most recent matches are ranked"""
+        create_recipe(user=self.user, title='Lentil soup')
+        recipes = [
+            create_recipe(user=self.user, description='Lentils')
+            for _ in range(2)
+        ]
+
+        res = self.client.get(RECIPES_URL, {'q': 'lentil'})
+
+        self.assertEqual(
+            [recipe['id'] for recipe in res.data],
+            [recipe.id for recipe in reversed(recipes)],
+        )
+        self.assertEqual(res[SEARCH_TRUNCATED_HEADER], 'true')
+        res = self.client.get(RECIPES_URL, {'q': 'lentil', 'page_size': 1})
+        self.assertEqual(res[SEARCH_TRUNCATED_HEADER], 'true')
+
+    def test_search_tracks_updates(self):
+        """Test search reflects recipe title changes"""
+        recipe = create_recipe(user=self.user, title='Pancakes')
+        self.client.patch(detail_url(recipe.id), {'title': 'Waffles'})
+
+        res = self.client.get(RECIPES_URL, {'q': 'waffle'})
+
+        self.assertEqual([r['id'] for r in res.data], [recipe.id])
+
+    def test_search_pages(self):
+        """Test ranked search results can be walked with cursors"""
+        recipes = [
+            create_recipe(
+                user=self.user,
+                title='Curry' if i % 2 else 'Dal',
+                description='Curry' if i % 3 else '',
+            )
+            for i in range(7)
+        ]
+        expected = self.client.get(RECIPES_URL, {'q': 'curry'}).data
+
+        ids = []
+        url = f'{RECIPES_URL}?q=curry&page_size=2'
+        while url:
+            res = self.client.get(url)
+            ids += [recipe['id'] for recipe in res.data['results']]
+            url = res.data['next']
+
+        self.assertEqual(ids, [recipe['id'] for recipe in expected])
+        self.assertLess(len(ids), len(recipes))
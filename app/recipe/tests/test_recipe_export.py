@@ -0,0 +1,112 @@
+"""
+Tests for the recipe export API
+"""
+
+import csv
+import io
+import json
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+from recipe.serializers import RecipeDetailSerializer
+
+
+EXPORT_URL = reverse("recipe:recipe-export")
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe with a tag and an ingredient"""
+    defaults = {
+        "title": "Sample Recipe",
+        "time_minutes": 10,
+        "price": Decimal("5.25"),
+        "description": "Sample description",
+    }
+    defaults.update(params)
+    recipe = Recipe.objects.create(user=user, **defaults)
+    recipe.tags.add(
+        Tag.objects.get_or_create(user=user, name="Dinner")[0]
+    )
+    recipe.ingredients.add(
+        Ingredient.objects.create(user=user, name=f"Ingredient {recipe.id}")
+    )
+
+    return recipe
+
+
+class RecipeExportApiTests(TestCase):
+    """Test exporting recipes"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "user@example.com", "testpass123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def export(self, url):
+        """Request an export and return its decoded content"""
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return res, b"".join(res.streaming_content).decode()
+
+    def test_auth_required(self):
+        """Test authentication is required to export"""
+        res = APIClient().get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_export_ndjson(self):
+        """Test recipes export like the detail serializer renders them"""
+        recipes = [create_recipe(self.user) for _ in range(3)]
+        other = get_user_model().objects.create_user("o@example.com", "pass")
+        create_recipe(other)
+
+        res, content = self.export(EXPORT_URL)
+
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        exported = [json.loads(line) for line in content.splitlines()]
+        expected = RecipeDetailSerializer(recipes[::-1], many=True).data
+        self.assertEqual(exported, json.loads(json.dumps(expected)))
+
+    def test_export_csv(self):
+        """Test recipes export as CSV when requested"""
+        recipe = create_recipe(self.user, title="Stew, slow cooked")
+
+        res, content = self.export(f"{EXPORT_URL}?format=csv")
+
+        self.assertTrue(res["Content-Type"].startswith("text/csv"))
+        self.assertIn("recipes.csv", res["Content-Disposition"])
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["id"], str(recipe.id))
+        self.assertEqual(rows[0]["title"], "Stew, slow cooked")
+        self.assertEqual(rows[0]["price"], "5.25")
+        self.assertEqual(rows[0]["tags"], "Dinner")
+
+    @patch("recipe.bulk.RecipeExporter.chunk_size", 2)
+    def test_related_objects_fetched_per_chunk(self):
+        """Test tags and ingredients are loaded a chunk at a time"""
+        for _ in range(5):
+            create_recipe(self.user)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.export(EXPORT_URL)
+
+        related = [
+            q for q in ctx.captured_queries
+            if "core_recipe_tags" in q["sql"]
+        ]
+        self.assertEqual(len(related), 3)
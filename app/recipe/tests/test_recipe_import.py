@@ -0,0 +1,151 @@
+"""
+Tests for the bulk recipe import API
+"""
+
+import json
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import (
+    APIClient,
+    APIRequestFactory,
+    force_authenticate,
+)
+
+from core.models import Recipe, Tag, Ingredient
+from recipe.views import RecipeViewSet
+
+
+IMPORT_URL = reverse("recipe:recipe-import")
+
+
+def ndjson(*items):
+    """Return items as an NDJSON body"""
+    return "".join(json.dumps(item) + "\n" for item in items)
+
+
+def sample(i, **params):
+    """Return a sample recipe payload"""
+    payload = {
+        "title": f"Recipe {i}",
+        "time_minutes": 10,
+        "price": "5.25",
+        "tags": [{"name": "Dinner"}],
+        "ingredients": [{"name": f"Ingredient {i}"}, {"name": "Salt"}],
+    }
+    payload.update(params)
+
+    return payload
+
+
+class RecipeImportApiTests(TestCase):
+    """Test importing recipes from NDJSON"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "user@example.com", "testpass123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post(self, body):
+        """Post body to the import endpoint and return the results"""
+        res = self.client.post(
+            IMPORT_URL, body, content_type="application/x-ndjson"
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        content = b"".join(res.streaming_content).decode()
+
+        return [json.loads(line) for line in content.splitlines()]
+
+    def test_auth_required(self):
+        """Test authentication is required to import"""
+        res = APIClient().post(
+            IMPORT_URL, ndjson(sample(0)), content_type="application/x-ndjson"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_import_recipes(self):
+        """Test valid lines create recipes with their tags and ingredients"""
+        salt = Ingredient.objects.create(user=self.user, name="Salt")
+
+        results = self.post(ndjson(sample(0), sample(1)))
+
+        self.assertEqual([r["line"] for r in results], [1, 2])
+        recipes = Recipe.objects.filter(user=self.user).order_by("id")
+        self.assertEqual([r["id"] for r in results], [r.id for r in recipes])
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+        for recipe in recipes:
+            self.assertEqual(recipe.tags.get().name, "Dinner")
+            self.assertIn(salt, recipe.ingredients.all())
+            self.assertEqual(recipe.ingredients.count(), 2)
+
+    def test_invalid_lines_reported(self):
+        """Test invalid lines are reported without stopping the import"""
+        body = "\n".join([
+            json.dumps(sample(0)),
+            "{not json",
+            "",
+            json.dumps(sample(3, time_minutes="soon")),
+            json.dumps(sample(4)),
+        ])
+
+        results = self.post(body)
+
+        self.assertEqual([r["line"] for r in results], [1, 2, 4, 5])
+        self.assertIn("id", results[0])
+        self.assertIn("non_field_errors", results[1]["errors"])
+        self.assertIn("time_minutes", results[2]["errors"])
+        self.assertIn("id", results[3])
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 2)
+
+    def test_empty_import_rejected(self):
+        """Test an empty body is rejected instead of importing nothing"""
+        res = self.client.post(
+            IMPORT_URL,
+            "",
+            content_type="application/x-ndjson",
+            CONTENT_LENGTH="0",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unknown_length_rejected(self):
+        """Test a body without a Content-Length is refused under WSGI"""
+        environ = APIRequestFactory().post(
+            IMPORT_URL,
+            ndjson(sample(0)),
+            content_type="application/x-ndjson",
+        ).environ
+        # like a chunked request under a WSGI server
+        del environ["CONTENT_LENGTH"]
+        request = WSGIRequest(environ)
+        force_authenticate(request, self.user)
+
+        res = RecipeViewSet.as_view({"post": "import_recipes"})(request)
+
+        self.assertEqual(res.status_code, status.HTTP_411_LENGTH_REQUIRED)
+        self.assertFalse(Recipe.objects.exists())
+
+    @patch("recipe.bulk.RecipeImporter.batch_size", 10)
+    def test_queries_grow_with_batches_not_lines(self):
+        """Test lines are written a batch at a time"""
+        body = ndjson(*[sample(i) for i in range(30)])
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.post(body)
+
+        inserts = [
+            q for q in ctx.captured_queries if q["sql"].startswith("INSERT")
+        ]
+        # recipes, tags, ingredients and both through tables per batch
+        self.assertLessEqual(len(inserts), 3 * 5)
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 30)
@@ -0,0 +1,101 @@
+"""
+Tests for replica reads of the recipe APIs.
+
+The replica alias mirrors the test database through a connection of its
+own. Each test runs in a transaction of the primary connection that is
+never committed, so like a lagging replica it doesn't see the rows the
+test writes.
+"""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+from core.tests.runner import REPLICA
+
+
+RECIPES_URL = reverse("recipe:recipe-list")
+
+
+def detail_url(recipe_id):
+    """Create and return a recipe detail url"""
+    return reverse("recipe:recipe-detail", args=[recipe_id])
+
+
+@override_settings(REPLICA_DATABASES=[REPLICA])
+class ReplicaReadTests(TestCase):
+    """Test reads use the replica except right after a write"""
+
+    databases = {"default", REPLICA}
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            "user@example.com", "testpass123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, url):
+        """Return the response to a GET of url and the replica queries"""
+        with CaptureQueriesContext(connections[REPLICA]) as queries:
+            res = self.client.get(url)
+
+        return res, len(queries)
+
+    def create_recipe(self):
+        """Create a recipe through the API and return its id"""
+        res = self.client.post(
+            RECIPES_URL,
+            {"title": "New", "time_minutes": 1, "price": "1.00"},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        return res.data["id"]
+
+    def test_reads_use_replica(self):
+        """Test lists and details are read from the replica"""
+        recipe = Recipe.objects.create(
+            user=self.user, title="Primary", time_minutes=1, price=Decimal(1)
+        )
+
+        res, queries = self.get(RECIPES_URL)
+        self.assertGreater(queries, 0)
+        self.assertEqual(res.data, [])
+        res, queries = self.get(detail_url(recipe.id))
+        self.assertGreater(queries, 0)
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_reads_after_write_use_primary(self):
+        """Test users read their own writes right after writing"""
+        recipe_id = self.create_recipe()
+
+        res, queries = self.get(detail_url(recipe_id))
+
+        self.assertEqual(queries, 0)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["title"], "New")
+
+    def test_other_users_stay_on_replica(self):
+        """Test a write only pins the user who wrote"""
+        self.create_recipe()
+        other = get_user_model().objects.create_user("o@example.com", "pw")
+        Recipe.objects.create(
+            user=other, title="Primary", time_minutes=1, price=Decimal(1)
+        )
+        self.client.force_authenticate(other)
+
+        res, queries = self.get(RECIPES_URL)
+
+        self.assertGreater(queries, 0)
+        self.assertEqual(res.data, [])
@@ -0,0 +1,133 @@
+"""
+Tests for sparse fieldsets on the recipe APIs
+"""
+
+import json
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+
+RECIPES_URL = reverse("recipe:recipe-list")
+EXPORT_URL = reverse("recipe:recipe-export")
+TAGS_URL = reverse("recipe:tag-list")
+
+
+def detail_url(recipe_id):
+    """Create and return a recipe detail url"""
+    return reverse("recipe:recipe-detail", args=[recipe_id])
+
+
+class SparseFieldsTests(TestCase):
+    """Test selecting response fields with ?fields="""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "user@example.com", "testpass123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for i in range(3):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=f"Recipe {i}",
+                time_minutes=i,
+                price=Decimal("5.25"),
+                description="Description",
+            )
+            recipe.tags.add(Tag.objects.create(user=self.user, name=f"T{i}"))
+            recipe.ingredients.add(
+                Ingredient.objects.create(user=self.user, name=f"I{i}")
+            )
+
+    def get(self, url, params):
+        """Request url and return the response and its queries"""
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(url, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res, [query["sql"] for query in ctx.captured_queries]
+
+    def test_list_fields(self):
+        """Test the list only reads and returns the selected fields"""
+        res, queries = self.get(RECIPES_URL, {"fields": "title,id"})
+
+        self.assertEqual(
+            res.data,
+            [
+                {"id": recipe.id, "title": recipe.title}
+                for recipe in Recipe.objects.order_by("-id")
+            ],
+        )
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("price", queries[0])
+
+    def test_detail_fields(self):
+        """Test the detail only fetches the selected relations"""
+        recipe = Recipe.objects.first()
+
+        res, queries = self.get(
+            detail_url(recipe.id), {"fields": "description,tags"}
+        )
+
+        self.assertEqual(list(res.data), ["tags", "description"])
+        self.assertEqual(len(queries), 2)
+        self.assertFalse(
+            any("core_recipe_ingredients" in sql for sql in queries)
+        )
+
+    def test_paginated_fields(self):
+        """Test pages seek on the id even when it is not selected"""
+        res, _ = self.get(RECIPES_URL, {"fields": "title", "page_size": 2})
+        titles = [item["title"] for item in res.data["results"]]
+        res = self.client.get(res.data["next"])
+        titles += [item["title"] for item in res.data["results"]]
+
+        self.assertEqual(titles, ["Recipe 2", "Recipe 1", "Recipe 0"])
+
+    def test_unknown_fields(self):
+        """Test selecting unknown fields is rejected"""
+        res = self.client.get(RECIPES_URL, {"fields": "title,secret"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("secret", str(res.data["fields"]))
+
+    def test_tag_fields(self):
+        """Test tags prune their serializer and columns"""
+        res, queries = self.get(TAGS_URL, {"fields": "id"})
+
+        self.assertEqual(
+            res.data,
+            [{"id": tag.id} for tag in Tag.objects.order_by("-name")],
+        )
+        self.assertEqual(len(queries), 1)
+
+    def test_export_fields(self):
+        """Test exports can select fields"""
+        res = self.client.get(EXPORT_URL, {"fields": "title"})
+        lines = b"".join(res.streaming_content).decode().splitlines()
+
+        self.assertEqual(
+            [json.loads(line) for line in lines],
+            [{"title": f"Recipe {i}"} for i in (2, 1, 0)],
+        )
+
+    def test_writes_ignore_fields(self):
+        """Test writes keep validating and returning every field"""
+        res = self.client.post(
+            f"{RECIPES_URL}?fields=title",
+            {"title": "New", "time_minutes": 1, "price": "1.00"},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertIn("price", res.data)
@@ -99,4 +99,15 @@ class PrivateTagsApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
         tags = Tag.objects.filter(user=self.user)
         # check that the tag does not exist
-        self.assertFalse(tags.exists())
\ No newline at end of file
+        self.assertFalse(tags.exists())
+
+    def test_rename_tag_to_existing_name(self):
+        """Test renaming a tag to a name already in use is rejected"""
+        Tag.objects.create(user=self.user, name="Breakfast")
+        tag = Tag.objects.create(user=self.user, name="Lunch")
+
+        res = self.client.patch(detail_url(tag.id), {"name": "Breakfast"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        tag.refresh_from_db()
+        self.assertEqual(tag.name, "Lunch")
@@ -2,21 +2,24 @@
 URL mappings for recipe app
 """
 
+from django.conf import settings
 from django.urls import path, include
 
 from rest_framework.routers import DefaultRouter
 
-from recipe import views
+from recipe import async_views, views
 
 # from drf_spectacular.views import (
 #     SpectacularAPIView,
 #     SpectacularSwaggerView,
 # )
 
+recipe_views = async_views if settings.RECIPE_ASYNC_VIEWS else views
+
 router = DefaultRouter()
-router.register("recipes", views.RecipeViewSet)
-router.register("tags", views.TagViewSet)
-router.register("ingredients", views.IngredientViewSet)
+router.register("recipes", recipe_views.RecipeViewSet)
+router.register("tags", recipe_views.TagViewSet)
+router.register("ingredients", recipe_views.IngredientViewSet)
 
 app_name = "recipe"
 
@@ -2,27 +2,180 @@
 Views for the recipe APIs.
 """
 
+from itertools import chain
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import Exists, F, FloatField, OuterRef
+from django.db.models.functions import Cast
+from django.http import StreamingHttpResponse
+
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import (
+    OpenApiParameter,
+    extend_schema,
+    extend_schema_view,
+)
 from rest_framework import viewsets, mixins
-from rest_framework.authentication import TokenAuthentication
+from rest_framework.decorators import action
+from rest_framework.exceptions import APIException, ParseError, ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 
 from core.models import Recipe, Tag, Ingredient
 from recipe import serializers
+from recipe.bulk import RecipeExporter, RecipeImporter
+from recipe.etags import ConditionalListMixin, ConditionalRetrieveMixin
+from recipe.pagination import KeysetPagination
+from recipe.readers import RecipeRepresentation, RepresentationReadMixin
+from recipe.renderers import CSVRenderer, NDJSONRenderer
+from recipe.replicas import ReplicaReadMixin
+from recipe.sparse import SparseFieldsMixin
+from user.authentication import CachedTokenAuthentication
+
+
+class LengthRequired(APIException):
+    """A body sent without a Content-Length that can't be read"""
+
+    status_code = 411
+    default_detail = "A Content-Length header is required."
+    default_code = "length_required"
+
 
+# sent with the recipes of a search that matched more than it ranked
+SEARCH_TRUNCATED_HEADER = "X-Search-Truncated"
 
-class RecipeViewSet(viewsets.ModelViewSet):
+
+@extend_schema_view(list=extend_schema(parameters=[
+    OpenApiParameter(
+        "q",
+        OpenApiTypes.STR,
+        description=(
+            "Search terms, in web search syntax. Only the "
+            "RECIPE_SEARCH_CANDIDATES (by default 1000) most recent "
+            "matches are ranked and listed, best match first; when more "
+            f"recipes match, the response has an {SEARCH_TRUNCATED_HEADER}: "
+            "true header and narrower terms find the older ones."
+        ),
+    ),
+]))
+class RecipeViewSet(ReplicaReadMixin,
+                    ConditionalListMixin,
+                    ConditionalRetrieveMixin,
+                    SparseFieldsMixin,
+                    RepresentationReadMixin,
+                    viewsets.ModelViewSet):
     """
     View for managing recipe APIs
     """
 
     serializer_class = serializers.RecipeDetailSerializer
     queryset = Recipe.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    # maximum number of SQL queries each read action may issue, regardless
+    # of how many rows it returns (checked by test_query_budget)
+    query_budget = {"list": 3, "retrieve": 3}
+    sparse_actions = ("list", "retrieve", "export_recipes")
+    # reads skip the serializers and build the same output from values()
+    representation = {
+        "list": RecipeRepresentation(serializers.RecipeSerializer),
+        "retrieve": RecipeRepresentation(serializers.RecipeDetailSerializer),
+    }
+    # the recipes matching ?q=, of which only the most recent are ranked
+    search_matches = None
+
+    def _params_to_ints(self, name):
+        """Convert a comma separated query parameter to integers"""
+        param = self.request.query_params[name]
+        try:
+            return [int(str_id) for str_id in param.split(",")]
+        except ValueError:
+            raise ValidationError({name: "Expected comma separated ids."})
+
+    def _filter_related(self, queryset, relation, ids, match_all):
+        """Filter recipes linked to any or all of the ids of relation"""
+        field = Recipe._meta.get_field(relation)
+        column = f"{field.m2m_reverse_field_name()}_id"
+        # EXISTS on the through table avoids the duplicate rows of a join,
+        # so the query needs no DISTINCT
+        links = field.remote_field.through.objects.filter(
+            recipe_id=OuterRef("pk")
+        )
+        if not match_all:
+            return queryset.filter(
+                Exists(links.filter(**{f"{column}__in": ids}))
+            )
+
+        for pk in set(ids):
+            queryset = queryset.filter(Exists(links.filter(**{column: pk})))
+        return queryset
+
+    def _search(self, queryset, terms):
+        """Filter recipes matching the search terms, best match first"""
+        query = SearchQuery(terms, config="english", search_type="websearch")
+        # ranking reads the whole vector of every row, so only the most
+        # recent matches are ranked; the index finds them without ranking
+        self.search_matches = queryset.filter(search_vector=query)
+        candidates = (
+            self.search_matches
+            .order_by("-id")
+            .values("id")[:settings.RECIPE_SEARCH_CANDIDATES]
+        )
+        # ts_rank returns a real, cast to double so the rank survives the
+        # round trip through a cursor exactly; the id tie breaker keeps the
+        # ordering unique for keyset pagination
+        # an F() ranks the stored, weighted vector; a field name would be
+        # parsed again from its text
+        rank = Cast(SearchRank(F("search_vector"), query), FloatField())
+        return (
+            queryset.filter(id__in=candidates)
+            .annotate(rank=rank)
+            .order_by("-rank", "-id")
+        )
+
+    def search_truncated(self):
+        """Return whether the search matched more recipes than it ranked"""
+        if self.search_matches is None:
+            return False
+
+        limit = settings.RECIPE_SEARCH_CANDIDATES
+        return self.search_matches[limit:limit + 1].exists()
+
+    def flag_truncated_search(self, response):
+        """Tell the client a listed search left out older matches"""
+        if response.status_code == 200 and self.search_truncated():
+            response[SEARCH_TRUNCATED_HEADER] = "true"
+
+        return response
+
+    def list(self, request, *args, **kwargs):
+        """List objects, or 304 when the collection did not change"""
+        return self.flag_truncated_search(
+            super().list(request, *args, **kwargs)
+        )
 
     def get_queryset(self):
         """Retrieve the recipes for authenticated user"""
-        return self.queryset.filter(user=self.request.user).order_by("-id")
+        queryset = self.queryset.filter(user=self.request.user).order_by(
+            "-id"
+        )
+        if self.action == "list":
+            params = self.request.query_params
+            match_all = params.get("match") == "all"
+            for relation in ("tags", "ingredients"):
+                if params.get(relation):
+                    queryset = self._filter_related(
+                        queryset,
+                        relation,
+                        self._params_to_ints(relation),
+                        match_all,
+                    )
+            if params.get("q"):
+                queryset = self._search(queryset, params["q"])
+
+        return queryset
 
     def get_serializer_class(self):
         """Return the serializer for the request"""
@@ -35,17 +188,76 @@ class RecipeViewSet(viewsets.ModelViewSet):
         """Create a new recipe"""
         serializer.save(user=self.request.user)
 
-class BaseRecipeAttrViewSet(mixins.DestroyModelMixin,
-                 mixins.UpdateModelMixin,
-                 mixins.ListModelMixin,
-                 viewsets.GenericViewSet):
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        url_name="import",
+        renderer_classes=[JSONRenderer, NDJSONRenderer],
+    )
+    def import_recipes(self, request):
+        """Import recipes from an NDJSON body, one recipe per line"""
+        # DRF has no stream without a Content-Length, yet a chunked body is
+        # still read from the request under ASGI, which buffers it; under
+        # WSGI Django reads nothing of it
+        body = request.stream or request._request
+        first = body.readline()
+        if not first:
+            if "CONTENT_LENGTH" not in request.META:
+                raise LengthRequired()
+            raise ParseError("The import is empty.")
+
+        importer = RecipeImporter(request.user, self.get_serializer_context())
+        results = importer.run(chain([first], body))
+
+        return StreamingHttpResponse(
+            NDJSONRenderer().render_stream(results),
+            content_type=NDJSONRenderer.media_type,
+        )
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="export",
+        url_name="export",
+        renderer_classes=[NDJSONRenderer, CSVRenderer],
+    )
+    def export_recipes(self, request):
+        """Stream every recipe of the user as NDJSON or CSV"""
+        renderer = request.accepted_renderer
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f"{content_type}; charset={renderer.charset}"
+
+        response = StreamingHttpResponse(
+            renderer.render_stream(
+                RecipeExporter(request.user, self.get_requested_fields())
+            ),
+            content_type=content_type,
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="recipes.{renderer.format}"'
+        )
+        return response
+
+class BaseRecipeAttrViewSet(ReplicaReadMixin,
+                            ConditionalListMixin,
+                            SparseFieldsMixin,
+                            mixins.DestroyModelMixin,
+                            mixins.UpdateModelMixin,
+                            mixins.ListModelMixin,
+                            viewsets.GenericViewSet):
     """Base view set for recipe attributes"""
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    query_budget = {"list": 1}
 
     def get_queryset(self):
         """Retrieve the ingredients for current authenticated user"""
-        return self.queryset.filter(user=self.request.user).order_by("-name")
+        return self.only_fields(
+            self.queryset.filter(user=self.request.user).order_by("-name")
+        )
 
 # mixins allow for default CRUD operations for our model
 class TagViewSet(BaseRecipeAttrViewSet):
@@ -0,0 +1,179 @@
+"""
+ASGI endpoint issuing auth tokens off the event loop.
+
+Checking a password runs PBKDF2, which holds a worker for hundreds of
+milliseconds. Under ASGI Django runs every sync view on one shared thread,
+so the token endpoint gets its own bounded thread pool instead. Requests
+beyond the pool and its queue are shed with a 503 so login bursts cannot
+starve the rest of the API.
+
+The endpoint answers before Django, so no middleware runs: it records its
+own metrics and Server-Timing and sends the headers of the security
+middleware that apply to JSON. It only exists under ASGI (app.asgi), the
+WSGI workers of manage.py serve send token requests to the DRF view.
+"""
+
+import asyncio
+import contextvars
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.urls import resolve, reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import FormParser, JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core import metrics, timing
+from user.serializers import AuthTokenSerializer
+
+
+PARSERS = {parser.media_type: parser() for parser in (JSONParser, FormParser)}
+
+
+def issue_token(data):
+    """Validate credentials and return the status and body of the response"""
+    close_old_connections()
+    try:
+        serializer = AuthTokenSerializer(data=data)
+        if not serializer.is_valid():
+            return 400, serializer.errors
+
+        token, _ = Token.objects.get_or_create(
+            user=serializer.validated_data["user"]
+        )
+        return 200, {"token": token.key}
+    finally:
+        close_old_connections()
+
+
+class TokenEndpoint:
+    """
+    Serve POSTs to the token URL from a thread pool, and everything else
+    from the wrapped application.
+    """
+
+    def __init__(self, app, path=None, workers=None, queue=None):
+        options = getattr(settings, "TOKEN_ENDPOINT", {})
+        self.app = app
+        self.path = path or reverse("user:token")
+        self.match = resolve(self.path)
+        self.workers = workers or options.get("WORKERS", 4)
+        self.queue = options.get("QUEUE", 32) if queue is None else queue
+        self.executor = ThreadPoolExecutor(
+            self.workers, thread_name_prefix="token"
+        )
+        self.pending = 0
+
+    async def __call__(self, scope, receive, send):
+        if not self.handles(scope):
+            return await self.app(scope, receive, send)
+
+        request_metrics = None
+        if settings.METRICS_ENABLED:
+            request_metrics = metrics.start_request(
+                self.match.view_name, "post", "POST"
+            )
+        timings = timing.sample(self.match.namespace)
+
+        status, payload, headers = await self.serve(
+            receive, scope, request_metrics, timings
+        )
+        if timings is not None:
+            headers.append((b"server-timing", timing.report(
+                timings, "POST", self.path, self.match.view_name, status
+            ).encode()))
+        if settings.SECURE_CONTENT_TYPE_NOSNIFF:
+            headers.append((b"x-content-type-options", b"nosniff"))
+        await self.respond(send, status, payload, headers)
+        if request_metrics is not None:
+            metrics.finish_request(request_metrics, status)
+
+    async def serve(self, receive, scope, request_metrics, timings):
+        """Return the status, payload and headers of a token request"""
+        # the event loop is single threaded, so the counter needs no lock
+        if self.pending >= self.workers + self.queue:
+            return 503, {"detail": "Too many login attempts, retry later."}, [
+                (b"retry-after", b"1"),
+            ]
+
+        self.pending += 1
+        try:
+            body = await self.read_body(receive)
+            if body is None:
+                return 413, {"detail": "Request body too large."}, []
+            try:
+                data = self.parse(scope, body)
+            except ParseError as exc:
+                return 400, {"detail": exc.detail}, []
+
+            # the queries of the thread count towards this request
+            context = contextvars.copy_context()
+            context.run(metrics.current.set, request_metrics)
+            context.run(timing.current.set, timings)
+            loop = asyncio.get_running_loop()
+            status, payload = await loop.run_in_executor(
+                self.executor, context.run, issue_token, data
+            )
+            return status, payload, []
+        finally:
+            self.pending -= 1
+
+    def handles(self, scope):
+        """Return whether the request is a token POST this endpoint parses"""
+        return (
+            scope["type"] == "http"
+            and scope["method"] == "POST"
+            and scope["path"] == self.path
+            and self.media_type(scope) in PARSERS
+        )
+
+    @staticmethod
+    def media_type(scope):
+        """Return the media type of the request body"""
+        for name, value in scope["headers"]:
+            if name == b"content-type":
+                return value.decode("latin-1").split(";")[0].strip().lower()
+
+        return None
+
+    @staticmethod
+    async def read_body(receive):
+        """Return the request body, or None when it is too large"""
+        limit = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if limit is not None and len(body) > limit:
+                return None
+
+        return body
+
+    def parse(self, scope, body):
+        """Parse the request body like the DRF view would"""
+        return PARSERS[self.media_type(scope)].parse(
+            io.BytesIO(body),
+            parser_context={"encoding": settings.DEFAULT_CHARSET},
+        )
+
+    @staticmethod
+    async def respond(send, status, payload, headers=()):
+        """Send payload as a JSON response"""
+        body = JSONRenderer().render(payload)
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"vary", b"Accept"),
+                *headers,
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
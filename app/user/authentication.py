@@ -0,0 +1,183 @@
+"""
+Token authentication backed by a cache of token lookups.
+
+Authenticated tokens are kept in a bounded in-process LRU with a time to
+live, optionally layered over Django's cache so processes share lookups.
+Entries are dropped when a token is deleted or its user is saved, which
+covers deactivation and password changes. With the shared layer, each
+token has a revocation generation in the cache that a drop replaces, and
+every local hit compares its entry against it, so other processes stop
+serving the entry at once while the other tokens stay cached. Without it
+the cache is only consistent within a process.
+"""
+
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+class TokenCache:
+    """Bounded LRU of token keys to their user and token, with a TTL"""
+
+    def __init__(self, maxsize=10000, ttl=60, shared=False):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.shared = shared
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.shared_hits = 0
+
+    @classmethod
+    def from_settings(cls):
+        """Create a cache configured by the TOKEN_AUTH_CACHE setting"""
+        options = getattr(settings, "TOKEN_AUTH_CACHE", {})
+        return cls(
+            maxsize=options.get("MAXSIZE", 10000),
+            ttl=options.get("TTL", 60),
+            shared=options.get("SHARED", False),
+        )
+
+    @staticmethod
+    def shared_key(key):
+        """Return the shared cache key of a token without exposing it"""
+        return "auth:token:" + hashlib.sha256(key.encode()).hexdigest()
+
+    @classmethod
+    def generation_key(cls, key):
+        """Return the shared cache key of the generation of a token"""
+        return cls.shared_key(key) + ":generation"
+
+    def generation(self, key):
+        """Return the revocation generation of the local entry of key"""
+        if not self.shared:
+            return None
+
+        generation_key = self.generation_key(key)
+        generation = cache.get(generation_key)
+        if generation is None:
+            # a random token, so an evicted generation is never minted
+            # again; local entries expire with it at the latest
+            cache.add(generation_key, uuid4().hex, self.ttl)
+            generation = cache.get(generation_key)
+
+        return generation
+
+    def get(self, key):
+        """Return the cached (user, token) of key, or None"""
+        now = time.monotonic()
+        generation = self.generation(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now and (
+                entry[1] == generation
+            ):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+
+        value = cache.get(self.shared_key(key)) if self.shared else None
+        with self._lock:
+            if value is None:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self.shared_hits += 1
+        self._store(key, value, now, generation)
+
+        return value
+
+    def set(self, key, value):
+        """Cache the (user, token) of key"""
+        self._store(key, value, time.monotonic(), self.generation(key))
+        if self.shared:
+            cache.set(self.shared_key(key), value, self.ttl)
+
+    def _store(self, key, value, now, generation):
+        """Store value in the local LRU, evicting the oldest entries"""
+        with self._lock:
+            self._entries[key] = (now + self.ttl, generation, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys):
+        """Drop keys from both layers and from other processes"""
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+        if self.shared and keys:
+            # the local entries of keys in every process fall back to the
+            # shared layer, which no longer has them
+            cache.delete_many([
+                name
+                for key in keys
+                for name in (self.shared_key(key), self.generation_key(key))
+            ])
+
+    def clear(self):
+        """Drop every local entry and reset the statistics"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.shared_hits = 0
+
+    def stats(self):
+        """Return the hit and miss counters and the local size"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+            }
+
+
+token_cache = TokenCache.from_settings()
+
+
+def invalidate_tokens(*keys):
+    """Drop cached tokens now and again once the transaction commits"""
+    # the second drop catches lookups that cached the old rows while the
+    # transaction was still open
+    token_cache.delete(*keys)
+    transaction.on_commit(lambda: token_cache.delete(*keys))
+
+
+def invalidate_user_tokens(user_id):
+    """Drop the cached tokens of a user"""
+    keys = list(
+        Token.objects.filter(user_id=user_id).values_list("key", flat=True)
+    )
+    if keys:
+        invalidate_tokens(*keys)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication reading tokens through the token cache"""
+
+    def authenticate_credentials(self, key):
+        """Return the user and token of key, from the cache when possible"""
+        cached = token_cache.get(key)
+        if cached is None:
+            cached = super().authenticate_credentials(key)
+            token_cache.set(key, cached)
+
+        user, token = cached
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _("User inactive or deleted.")
+            )
+
+        # requests may modify their user, so each gets its own copy
+        return copy.copy(user), token
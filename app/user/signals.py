@@ -0,0 +1,33 @@
+"""
+Signal handlers invalidating cached token lookups
+"""
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from user.authentication import invalidate_tokens, invalidate_user_tokens
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def token_changed(sender, instance, **kwargs):
+    """Drop a saved or deleted token from the cache"""
+    invalidate_tokens(instance.key)
+
+
+# saves of only other fields, such as last_login, leave the tokens cached
+REVOKING_FIELDS = {"password", "is_active"}
+
+
+@receiver(post_save, sender=get_user_model())
+def user_changed(sender, instance, created, update_fields=None, **kwargs):
+    """Drop the tokens of a saved user, e.g. deactivated or new password"""
+    if created or (
+        update_fields is not None and not REVOKING_FIELDS & update_fields
+    ):
+        return
+
+    invalidate_user_tokens(instance.pk)
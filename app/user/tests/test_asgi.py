@@ -0,0 +1,175 @@
+"""
+Tests for the ASGI token endpoint
+"""
+
+import asyncio
+import json
+import threading
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+
+from core import metrics
+from user.asgi import TokenEndpoint
+
+
+TOKEN_URL = reverse("user:token")
+
+
+async def fallback(scope, receive, send):
+    """Stand in for the Django application"""
+    await send({
+        "type": "http.response.start", "status": 299, "headers": [],
+    })
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def call(app, body=b"", method="POST", path=TOKEN_URL,
+               content_type=b"application/json"):
+    """Send a request through app and return its status and JSON body"""
+    messages = await exchange(app, body, method, path, content_type)
+    content = messages[1]["body"]
+    return messages[0]["status"], json.loads(content) if content else None
+
+
+async def exchange(app, body=b"", method="POST", path=TOKEN_URL,
+                   content_type=b"application/json"):
+    """Send a request through app and return the messages it sent"""
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "headers": [(b"content-type", content_type)],
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": body}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    return messages
+
+
+class TokenEndpointTests(TransactionTestCase):
+    """Test issuing tokens through the ASGI endpoint"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "user@example.com", "testpass123"
+        )
+        self.app = TokenEndpoint(fallback)
+
+    def tearDown(self):
+        self.app.executor.shutdown()
+
+    def test_create_token(self):
+        """Test valid credentials get the token of the user"""
+        body = json.dumps(
+            {"email": "user@example.com", "password": "testpass123"}
+        ).encode()
+
+        status, data = asyncio.run(call(self.app, body))
+
+        self.assertEqual(status, 200)
+        self.assertEqual(data["token"], Token.objects.get(user=self.user).key)
+
+    def test_create_token_form(self):
+        """Test form encoded credentials are accepted"""
+        status, data = asyncio.run(call(
+            self.app,
+            b"email=user%40example.com&password=testpass123",
+            content_type=b"application/x-www-form-urlencoded",
+        ))
+
+        self.assertEqual(status, 200)
+        self.assertIn("token", data)
+
+    def test_bad_credentials(self):
+        """Test wrong credentials are rejected like the DRF view does"""
+        body = json.dumps(
+            {"email": "user@example.com", "password": "wrong"}
+        ).encode()
+
+        status, data = asyncio.run(call(self.app, body))
+
+        self.assertEqual(status, 400)
+        self.assertIn("non_field_errors", data)
+        self.assertFalse(Token.objects.exists())
+
+    def test_malformed_json(self):
+        """Test a malformed body is rejected"""
+        status, data = asyncio.run(call(self.app, b"{"))
+
+        self.assertEqual(status, 400)
+        self.assertIn("JSON parse error", data["detail"])
+
+    def test_other_requests_delegated(self):
+        """Test other paths, methods and media types reach the app"""
+        for kwargs in (
+            {"path": "/api/recipe/recipes/"},
+            {"method": "GET"},
+            {"content_type": b"multipart/form-data; boundary=x"},
+        ):
+            status, _ = asyncio.run(call(self.app, **kwargs))
+
+            self.assertEqual(status, 299)
+
+    def test_saturated_requests_shed(self):
+        """Test requests beyond the workers and queue get a 503"""
+        app = TokenEndpoint(fallback, workers=1, queue=1)
+        release = threading.Event()
+
+        def blocked(data):
+            release.wait(5)
+            return 200, {}
+
+        async def burst():
+            held = [asyncio.ensure_future(call(app, b"{}")) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            shed = await call(app, b"{}")
+            release.set()
+            return shed, await asyncio.gather(*held)
+
+        with patch("user.asgi.issue_token", blocked):
+            shed, held = asyncio.run(burst())
+        app.executor.shutdown()
+
+        self.assertEqual(shed[0], 503)
+        self.assertEqual([status for status, _ in held], [200, 200])
+        self.assertEqual(app.pending, 0)
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+    def test_metrics_and_timing(self):
+        """Test token requests are measured like those Django serves"""
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+        body = json.dumps(
+            {"email": "user@example.com", "password": "testpass123"}
+        ).encode()
+
+        with self.assertLogs("core.timing"):
+            messages = asyncio.run(exchange(self.app, body))
+
+        headers = dict(messages[0]["headers"])
+        self.assertIn(b'db;dur=', headers[b"server-timing"])
+        self.assertEqual(headers[b"x-content-type-options"], b"nosniff")
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot["counters"]["http_requests_total"], {
+            metrics.labels(
+                route="user:token", action="post", method="POST", status=200
+            ): 1,
+        })
+        queries = snapshot["histograms"]["db_queries_per_request"]
+        self.assertGreater(
+            queries[metrics.labels(
+                route="user:token", action="post", method="POST"
+            )][-1],
+            0,
+        )
@@ -0,0 +1,165 @@
+"""
+Tests for cached token authentication
+"""
+
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user.authentication import TokenCache, token_cache
+
+
+ME_URL = reverse("user:me")
+TAGS_URL = reverse("recipe:tag-list")
+
+
+class TokenCacheTests(TestCase):
+    """Test the LRU behind token authentication"""
+
+    def test_evicts_least_recently_used(self):
+        """Test the oldest unused entry is evicted past maxsize"""
+        lru = TokenCache(maxsize=2)
+        lru.set("a", 1)
+        lru.set("b", 2)
+        lru.get("a")
+        lru.set("c", 3)
+
+        self.assertEqual(lru.get("a"), 1)
+        self.assertIsNone(lru.get("b"))
+        self.assertEqual(lru.get("c"), 3)
+
+    def test_entries_expire(self):
+        """Test entries are dropped once their TTL passed"""
+        lru = TokenCache(ttl=10)
+        with patch("user.authentication.time.monotonic", return_value=100):
+            lru.set("a", 1)
+        with patch("user.authentication.time.monotonic", return_value=111):
+            self.assertIsNone(lru.get("a"))
+
+        self.assertEqual(lru.stats()["size"], 0)
+
+    def test_shared_layer(self):
+        """Test lookups are shared through the Django cache"""
+        cache.clear()
+        TokenCache(shared=True).set("a", 1)
+        lru = TokenCache(shared=True)
+
+        self.assertEqual(lru.get("a"), 1)
+        self.assertEqual(lru.stats()["shared_hits"], 1)
+        lru.delete("a")
+        self.assertIsNone(TokenCache(shared=True).get("a"))
+
+    def test_shared_revocation(self):
+        """Test a token dropped by one process is dropped by the others"""
+        cache.clear()
+        writer, reader = TokenCache(shared=True), TokenCache(shared=True)
+        writer.set("a", 1)
+        writer.set("b", 2)
+        self.assertEqual(reader.get("a"), 1)
+        self.assertEqual(reader.get("b"), 2)
+        self.assertEqual(reader.get("b"), 2)
+        self.assertEqual(reader.stats()["hits"], 1)
+
+        writer.delete("a")
+
+        self.assertIsNone(reader.get("a"))
+        # the other entries stay cached locally
+        self.assertEqual(reader.get("b"), 2)
+        self.assertEqual(reader.stats()["shared_hits"], 2)
+        self.assertEqual(reader.stats()["hits"], 2)
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test authenticating requests through the token cache"""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            "user@example.com", "testpass123"
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_token_lookup_cached(self):
+        """Test only the first request looks the token up"""
+        self.client.get(TAGS_URL)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(token_cache.stats()["hits"], 1)
+
+    def test_invalid_token_rejected(self):
+        """Test an unknown token is rejected and not cached"""
+        self.client.credentials(HTTP_AUTHORIZATION="Token invalid")
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(token_cache.stats()["size"], 0)
+
+    def test_deleted_token_rejected(self):
+        """Test a deleted token stops authenticating"""
+        self.client.get(ME_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        """Test a deactivated user stops authenticating"""
+        self.client.get(ME_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_refreshes_user(self):
+        """Test changing the password drops the cached user"""
+        self.client.get(ME_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.patch(ME_URL, {"password": "newpass123"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(token_cache.stats()["size"], 0)
+
+    def test_unrelated_saves_keep_tokens(self):
+        """Test saves of other fields or users leave the token cached"""
+        self.client.get(ME_URL)
+        other = get_user_model().objects.create_user("o@example.com", "pw")
+        Token.objects.create(user=other)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save(update_fields=["last_login"])
+            other.name = "Other"
+            other.save()
+
+        self.assertEqual(token_cache.stats()["size"], 1)
+        with self.assertNumQueries(1):
+            self.client.get(TAGS_URL)
+
+    def test_requests_get_their_own_user(self):
+        """Test a request modifying its user does not alter the cache"""
+        self.client.get(ME_URL)
+
+        self.client.patch(ME_URL, {"name": ""})
+        with patch.object(get_user_model(), "save"):
+            self.client.patch(ME_URL, {"name": "Changed"})
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data["name"], "")